@@ -0,0 +1,120 @@
+"""Concurrency scaling of AsyncConversation vs. Conversation in a thread pool
+
+Sends N single-turn requests against a local mock server with a fixed
+latency, at increasing concurrency, and reports throughput for:
+
+- ``async``: AsyncConversation.get_response tasks gathered on one loop
+- ``executor``: Conversation.get_response through ``run_in_executor`` on
+  the default thread pool, the workaround AsyncConversation replaces
+
+With a fixed latency, ideal throughput is ``concurrency / latency``. The
+executor mode flattens out at the size of the thread pool; the async mode
+keeps scaling until the client is CPU bound (SDK request building and
+httpx's connection pool, a few ms per request). The mock server runs in
+a separate process so it doesn't take CPU from the client.
+
+Usage (from the repository root):
+
+    python benchmarks/async_concurrency.py
+    python benchmarks/async_concurrency.py --latency 0.5 --levels 1,16,256
+    python benchmarks/async_concurrency.py --json
+"""
+import argparse
+import asyncio
+import json
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core import budget, metrics  # noqa: E402
+from core.conversation import AsyncConversation, Conversation  # noqa: E402
+from core.mock_server import mock_server_process  # noqa: E402
+from core.openai_client import AsyncOpenAIClient, OpenAIClient  # noqa: E402
+from settings import ProfileConfig  # noqa: E402
+
+
+async def run_async(profile: ProfileConfig, concurrency: int, requests: int) -> float:
+    """Send requests with AsyncConversation, at most concurrency at a time
+
+    Returns:
+        float: Elapsed seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncOpenAIClient(profile) as client:
+
+        async def one(index: int) -> str:
+            async with semaphore:
+                conversation = AsyncConversation(profile, client)
+                conversation.add_user_message(f"request {index}")
+                return await conversation.get_response()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(requests)))
+        return time.perf_counter() - started
+
+
+async def run_executor(profile: ProfileConfig, concurrency: int, requests: int) -> float:
+    """Send requests with Conversation via run_in_executor
+
+    Returns:
+        float: Elapsed seconds
+    """
+    semaphore = asyncio.Semaphore(concurrency)
+    client = OpenAIClient(profile)
+    loop = asyncio.get_running_loop()
+
+    def blocking(index: int) -> str:
+        conversation = Conversation(profile, client)
+        conversation.add_user_message(f"request {index}")
+        return conversation.get_response()
+
+    async def one(index: int) -> str:
+        async with semaphore:
+            return await loop.run_in_executor(None, blocking, index)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return time.perf_counter() - started
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latency", type=float, default=0.2, help="Mock server latency in seconds")
+    parser.add_argument("--levels", default="1,8,32,64", help="Comma-separated concurrency levels")
+    parser.add_argument("--rounds", type=int, default=4, help="Requests per level, as a multiple of the level")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    # Synthetic requests go to neither the metrics log nor the real usage ledger
+    metrics.set_recording(False)
+    results = []
+    with tempfile.TemporaryDirectory(prefix="termgpt-bench-") as scratch, mock_server_process(latency=args.latency) as url:
+        budget.set_ledger(budget.Ledger(Path(scratch) / "usage.sqlite3"))
+        profile = ProfileConfig(name="mock", api_key="sk-mock", base_url=url, default_model="gpt-4o")
+        for level in (int(value) for value in args.levels.split(",")):
+            requests = level * args.rounds
+            for mode, runner in (("async", run_async), ("executor", run_executor)):
+                elapsed = asyncio.run(runner(profile, level, requests))
+                results.append({
+                    "mode": mode,
+                    "concurrency": level,
+                    "requests": requests,
+                    "seconds": round(elapsed, 3),
+                    "requests_per_second": round(requests / elapsed, 1),
+                    "ideal_per_second": round(level / args.latency, 1),
+                })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            print(f"{r['mode']:8}  concurrency {r['concurrency']:4}  {r['requests']:5} requests  "
+                  f"{r['requests_per_second']:8.1f} req/s  (ideal {r['ideal_per_second']:.1f})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
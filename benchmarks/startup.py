@@ -0,0 +1,137 @@
+"""Cold-start benchmark for the termgpt CLI
+
+Runs CLI commands in fresh interpreters with ``python -X importtime`` and
+compares the total import time against a per-command budget. It also
+checks that commands don't load heavy modules they have no use for, e.g.
+``config`` commands must never import ``openai``.
+
+Each command runs against a throwaway ``$HOME`` with a generated config,
+and ``chat single`` points at an unreachable endpoint, so no network
+access or API key is needed.
+
+Usage (from the repository root):
+
+    python benchmarks/startup.py              # check budgets, exit 1 on regression
+    python benchmarks/startup.py --runs 10    # more runs for a steadier median
+    python benchmarks/startup.py --json       # machine-readable results
+
+Budgets are milliseconds of import time (median over runs). Raise them
+deliberately, in the same change that adds the import, never to make CI
+green.
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+SRC_DIR = Path(__file__).resolve().parent.parent / "src"
+
+# name -> (argv, import budget in ms, modules that must not be imported)
+COMMANDS = {
+    "config list-profiles": (["config", "list-profiles"], 400, ["openai", "rich.live"]),
+    "config show": (["config", "show"], 400, ["openai", "rich.live"]),
+    "chat single": (["chat", "single", "hello", "--no-cache", "--no-stream"], 1200, []),
+}
+
+IMPORT_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)")
+
+CONFIG = {
+    "default_profile": "default",
+    "profiles": [{"name": "default", "api_key": "sk-benchmark-00000000000000000000", "default_model": "gpt-4o"}],
+}
+
+
+def parse_importtime(stderr: str):
+    """Parse ``-X importtime`` output
+
+    Args:
+        stderr: Interpreter stderr
+
+    Returns:
+        Tuple[float, Set[str]]: Total import time in ms, and imported modules
+    """
+    total_us = 0
+    modules = set()
+    for line in stderr.splitlines():
+        match = IMPORT_LINE.match(line)
+        if not match:
+            continue
+        _self_us, cumulative_us, indent, module = match.groups()
+        modules.add(module)
+        # Top-level entries already include their children
+        if not indent:
+            total_us += int(cumulative_us)
+    return total_us / 1000, modules
+
+
+def run_command(argv, home: str):
+    """Run one CLI command in a fresh interpreter
+
+    Args:
+        argv: CLI arguments
+        home: Directory to use as $HOME
+
+    Returns:
+        Tuple[float, float, Set[str]]: Import ms, wall ms, imported modules
+    """
+    env = dict(os.environ, HOME=home, OPENAI_BASE_URL="http://127.0.0.1:9/v1")
+    started = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "main.py", *argv],
+        cwd=SRC_DIR,
+        env=env,
+        stdin=subprocess.DEVNULL,
+        capture_output=True,
+        text=True,
+    )
+    wall_ms = (time.perf_counter() - started) * 1000
+    import_ms, modules = parse_importtime(result.stderr)
+    return import_ms, wall_ms, modules
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Runs per command (median is reported)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    with tempfile.TemporaryDirectory() as home:
+        config_dir = Path(home) / ".termgpt"
+        config_dir.mkdir()
+        (config_dir / "config.json").write_text(json.dumps(CONFIG))
+
+        for name, (argv, budget_ms, forbidden) in COMMANDS.items():
+            runs = [run_command(argv, home) for _ in range(args.runs)]
+            import_ms = statistics.median(r[0] for r in runs)
+            wall_ms = statistics.median(r[1] for r in runs)
+            loaded = sorted(m for m in forbidden if m in runs[0][2])
+            results.append({
+                "command": name,
+                "import_ms": round(import_ms, 1),
+                "wall_ms": round(wall_ms, 1),
+                "budget_ms": budget_ms,
+                "forbidden_imports": loaded,
+                "ok": import_ms <= budget_ms and not loaded,
+            })
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for r in results:
+            status = "ok" if r["ok"] else "FAIL"
+            extra = f"  loaded: {', '.join(r['forbidden_imports'])}" if r["forbidden_imports"] else ""
+            print(f"{status:4}  {r['command']:22} import {r['import_ms']:7.1f} ms "
+                  f"(budget {r['budget_ms']}) wall {r['wall_ms']:7.1f} ms{extra}")
+
+    return 0 if all(r["ok"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
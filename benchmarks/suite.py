@@ -0,0 +1,75 @@
+"""Full offline benchmark suite, with results saved for comparison
+
+Runs every suite of ``termgpt bench`` (cold start, per-request overhead,
+Markdown rendering, single vs. concurrent throughput) against local mock
+servers, so no API key, network or money is needed. Results are written
+as JSON named after the current commit, to compare across versions.
+
+Usage (from the repository root):
+
+    python benchmarks/suite.py                                # writes benchmarks/results/<commit>.json
+    python benchmarks/suite.py --baseline benchmarks/results/abc1234.json
+    python benchmarks/suite.py --error-rate 0.1 --latency 0.2 # exercise retries
+
+Exits with status 1 if any metric regressed by more than ``--threshold``
+percent against the baseline.
+"""
+import argparse
+import json
+import sys
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from core import bench  # noqa: E402
+
+RESULTS_DIR = Path(__file__).resolve().parent / "results"
+
+
+def worsening(row) -> float:
+    """How many percent a compared metric got worse (negative if better)"""
+    if row["change"] is None or row["metric"] in ("errors", "retries", "lines"):
+        return 0.0
+    # Throughput is better when higher, everything else when lower
+    return -row["change"] if row["metric"].endswith("_rps") else row["change"]
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per mode")
+    parser.add_argument("--concurrency", type=int, default=16, help="Requests in flight for concurrent modes")
+    parser.add_argument("--latency", type=float, default=0.05, help="Mock latency for the throughput suite")
+    parser.add_argument("--chunk-size", type=int, default=16, help="Characters per streamed chunk")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of mock requests that fail")
+    parser.add_argument("--output", type=Path, help="Results file (default: results/<commit>.json)")
+    parser.add_argument("--baseline", type=Path, help="Earlier results to compare against")
+    parser.add_argument("--threshold", type=float, default=20.0, help="Regression threshold in percent")
+    args = parser.parse_args()
+
+    result = bench.run_suites(
+        list(bench.SUITES),
+        requests=args.requests,
+        concurrency=args.concurrency,
+        latency=args.latency,
+        chunk_size=args.chunk_size,
+        error_rate=args.error_rate,
+        on_suite=lambda name: print(f"Running {name}...", file=sys.stderr),
+    )
+
+    output = args.output or RESULTS_DIR / f"{result['meta']['commit'] or result['meta']['version']}.json"
+    output.parent.mkdir(parents=True, exist_ok=True)
+    output.write_text(json.dumps(result, indent=2))
+
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else {}
+    failed = False
+    for row in bench.compare(result, baseline):
+        change = f"{row['change']:+7.1f}%" if row["change"] is not None else ""
+        worse = worsening(row) > args.threshold
+        failed |= worse
+        print(f"{'FAIL' if worse else 'ok':4}  {row['suite']:10} {row['metric']:24} {row['current']:>10g} {change}")
+    print(f"Results written to {output}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
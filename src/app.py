@@ -1,20 +1,61 @@
+from pathlib import Path
+
 import typer
 from rich import print as rprint
 
 from commands.config.app import app as config_app
 from commands.chat.app import app as chat_app
+from commands.cache.app import app as cache_app
+from commands.history.app import app as history_app
+from commands.daemon.app import app as daemon_app
+from commands.prompt.app import app as prompt_app
+from commands.jobs.app import app as jobs_app
+from commands.tool.app import app as tool_app
+from commands.stats.dashboard import stats_command
+from commands.bench.run import bench_command
+from commands.usage.report import usage_command
 
 app = typer.Typer(help="CLI tool for interacting with OpenAI models")
 
 # Register command groups
 app.add_typer(config_app, name="config", help="Configure settings like API tokens and defaults")
 app.add_typer(chat_app, name="chat", help="Chat with AI models")
+app.add_typer(cache_app, name="cache", help="Manage the local response cache")
+app.add_typer(history_app, name="history", help="Browse saved conversation sessions")
+app.add_typer(daemon_app, name="daemon", help="Manage the background daemon that keeps API connections warm")
+app.add_typer(prompt_app, name="prompt", help="Manage stored system prompts")
+app.add_typer(jobs_app, name="jobs", help="Run prompts through the provider's asynchronous Batch API")
+app.add_typer(tool_app, name="tool", help="Manage local tools the model can call")
+
+# Register top-level commands
+app.command(name="stats", help="Show latency, throughput and cost per model and profile")(stats_command)
+app.command(name="usage", help="Show token usage and cost against each profile's budget")(usage_command)
+app.command(name="bench", help="Benchmark termgpt's own overhead against a local mock server")(bench_command)
 
 
 @app.callback()
-def callback():
+def callback(
+    ctx: typer.Context,
+    profile_run: Path = typer.Option(
+        None,
+        "--profile-run",
+        help="Write a cProfile trace of the command to this file (view with snakeviz or flameprof)",
+        show_default=False,
+    ),
+):
     """TermGPT CLI"""
-    pass
+    if profile_run:
+        import cProfile
+        
+        profiler = cProfile.Profile()
+        
+        def dump_profile():
+            profiler.disable()
+            profiler.dump_stats(profile_run)
+            rprint(f"[dim]Profile written to {profile_run}[/dim]")
+        
+        ctx.call_on_close(dump_profile)
+        profiler.enable()
 
 def main():
     """Entry point for the application"""
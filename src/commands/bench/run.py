@@ -0,0 +1,73 @@
+import json
+from pathlib import Path
+
+import typer
+from rich import print as rprint
+from rich.table import Table
+
+
+def _format_change(change, metric: str) -> str:
+    if change is None:
+        return "-"
+    # Throughput is better when higher, everything else when lower
+    better = change > 0 if metric.endswith("_rps") else change < 0
+    color = "green" if better else "red"
+    return f"[{color}]{change:+.1f}%[/{color}]"
+
+
+def bench_command(
+    suite: str = typer.Option("all", help="Comma-separated suites: startup, overhead, render, throughput, or 'all'"),
+    requests: int = typer.Option(200, help="Requests per mode in the overhead and throughput suites"),
+    concurrency: int = typer.Option(16, help="Requests in flight for the concurrent modes"),
+    latency: float = typer.Option(0.05, help="Mock server latency in seconds, for the throughput suite"),
+    chunk_size: int = typer.Option(16, help="Characters per streamed chunk"),
+    error_rate: float = typer.Option(0.0, help="Share of mock requests that fail and are retried (0-1)"),
+    markdown_lines: int = typer.Option(2000, help="Size of the response rendered by the render suite"),
+    output: Path = typer.Option(None, "--output", "-o", help="Write results as JSON to this file", show_default=False),
+    compare: Path = typer.Option(None, help="Earlier JSON results to compare against", show_default=False),
+    as_json: bool = typer.Option(False, "--json", help="Print results as JSON"),
+):
+    # Imported here, the benchmarks pull in the SDK and the mock server
+    from core import bench
+
+    suites = list(bench.SUITES) if suite == "all" else [name.strip() for name in suite.split(",") if name.strip()]
+    unknown = [name for name in suites if name not in bench.SUITES]
+    if unknown:
+        rprint(f"[red]Unknown suite '{unknown[0]}'. Use one of: {', '.join(bench.SUITES)}.[/red]")
+        raise typer.Exit(code=1)
+
+    baseline = json.loads(compare.read_text()) if compare else None
+
+    result = bench.run_suites(
+        suites,
+        requests=requests,
+        concurrency=concurrency,
+        latency=latency,
+        chunk_size=chunk_size,
+        error_rate=error_rate,
+        markdown_lines=markdown_lines,
+        on_suite=None if as_json else lambda name: rprint(f"[dim]Running {name}...[/dim]"),
+    )
+
+    if output:
+        output.write_text(json.dumps(result, indent=2))
+    if as_json:
+        print(json.dumps(result, indent=2))
+        return
+
+    table = Table(title=f"termgpt {result['meta']['version']} ({result['meta']['commit'] or 'no commit'})")
+    table.add_column("Suite")
+    table.add_column("Metric")
+    table.add_column("Value", justify="right")
+    if baseline:
+        table.add_column("Baseline", justify="right")
+        table.add_column("Change", justify="right")
+    for row in bench.compare(result, baseline or {}):
+        cells = [row["suite"], row["metric"], f"{row['current']:g}"]
+        if baseline:
+            cells.append("-" if row["baseline"] is None else f"{row['baseline']:g}")
+            cells.append(_format_change(row["change"], row["metric"]))
+        table.add_row(*cells)
+    rprint(table)
+    if output:
+        rprint(f"[dim]Results written to {output}[/dim]")
@@ -0,0 +1,16 @@
+import typer
+
+# Import command implementations
+from commands.cache.manage import stats_command, prune_command, clear_command
+
+app = typer.Typer(help="Manage the local response cache")
+
+@app.callback()
+def callback():
+    """Manage the local response cache"""
+    pass
+
+# Register commands
+app.command(name="stats", help="Show cache size and hit rate")(stats_command)
+app.command(name="prune", help="Evict expired entries and entries over the size limits")(prune_command)
+app.command(name="clear", help="Remove all cached responses")(clear_command)
@@ -0,0 +1,68 @@
+from datetime import datetime
+
+import typer
+from rich import print as rprint
+
+from core import config, metrics
+from core.cache import ResponseCache
+from default import SEMANTIC_CACHE_FILE
+
+
+def _format_time(timestamp) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M") if timestamp else "-"
+
+
+def _semantic_cache(settings):
+    # Imported here, the semantic cache pulls in NumPy
+    from core.semantic_cache import from_config
+    
+    return from_config(settings.cache, settings.get_profile(settings.default_profile))
+
+
+def stats_command():
+    settings = config.get_settings()
+    stats = ResponseCache.from_config(settings.cache).stats()
+    
+    rprint("[bold]Response cache:[/bold]")
+    rprint(f"  • Enabled: {'[green]yes[/green]' if settings.cache.enabled else '[red]no[/red]'}")
+    rprint(f"  • Entries: {stats['entries']} (limit {settings.cache.max_entries})")
+    rprint(f"  • Size: {stats['size_bytes'] / 1024 / 1024:.1f} MB of responses, "
+           f"{stats['file_bytes'] / 1024 / 1024:.1f} MB on disk (limit {settings.cache.max_size_mb} MB)")
+    rprint(f"  • Oldest: {_format_time(stats['oldest'])} - Newest: {_format_time(stats['newest'])}")
+    rprint(f"  • Hits: {stats['hits']} - Misses: {stats['misses']} - Hit rate: {stats['hit_rate']:.1%}")
+    
+    if not (settings.cache.semantic.enabled or SEMANTIC_CACHE_FILE.exists()):
+        return
+    stats = _semantic_cache(settings).stats()
+    lookups = sorted(r["duration"] for r in metrics.read_spans() if r["span"] == "semantic_cache.lookup")
+    rprint("[bold]Semantic cache:[/bold]")
+    rprint(f"  • Enabled: {'[green]yes[/green]' if settings.cache.semantic.enabled else '[red]no[/red]'} "
+           f"(threshold {settings.cache.semantic.threshold}, {settings.cache.semantic.embedder} embedder)")
+    rprint(f"  • Entries: {stats['entries']} (limit {settings.cache.semantic.max_entries}), "
+           f"{stats['file_bytes'] / 1024 / 1024:.1f} MB on disk")
+    rprint(f"  • Hits: {stats['hits']} - Misses: {stats['misses']} - Hit rate: {stats['hit_rate']:.1%}")
+    if lookups:
+        rprint(f"  • Lookup latency: p50 {metrics.percentile(lookups, 50) * 1000:.1f} ms - "
+               f"p95 {metrics.percentile(lookups, 95) * 1000:.1f} ms ({len(lookups)} lookups)")
+
+
+def prune_command():
+    settings = config.get_settings()
+    removed = ResponseCache.from_config(settings.cache).prune()
+    if SEMANTIC_CACHE_FILE.exists():
+        removed += _semantic_cache(settings).prune()
+    rprint(f"[green]Removed {removed} expired or excess cache entries.[/green]")
+
+
+def clear_command(
+    yes: bool = typer.Option(False, "--yes", "-y", help="Don't ask for confirmation"),
+):
+    if not yes and not typer.confirm("Remove all cached responses?"):
+        rprint("[yellow]Operation cancelled.[/yellow]")
+        return
+    
+    settings = config.get_settings()
+    removed = ResponseCache.from_config(settings.cache).clear()
+    if SEMANTIC_CACHE_FILE.exists():
+        removed += _semantic_cache(settings).clear()
+    rprint(f"[green]Removed {removed} cache entries.[/green]")
@@ -3,6 +3,7 @@ import typer
 # Import command implementations
 from commands.chat.single import single_message_command
 from commands.chat.interactive import interactive_chat_command
+from commands.chat.batch import batch_command
 
 app = typer.Typer(help="Chat with AI models")
 
@@ -13,4 +14,5 @@ def callback():
 
 # Register commands
 app.command(name="single", help="Send a single message and get a response")(single_message_command)
-app.command(name="interactive", help="Start an interactive chat session")(interactive_chat_command)
\ No newline at end of file
+app.command(name="interactive", help="Start an interactive chat session")(interactive_chat_command)
+app.command(name="batch", help="Run prompts from a JSONL or CSV file with bounded concurrency")(batch_command)
\ No newline at end of file
@@ -0,0 +1,98 @@
+import json
+import sys
+from pathlib import Path
+
+import typer
+from rich.console import Console
+
+from core import config, profiles
+from core.cache import open_cache
+from default import BATCH_CONCURRENCY
+
+# Status goes to stderr so results can be piped from stdout
+console = Console(stderr=True)
+
+
+def batch_command(
+    input_file: str = typer.Argument(..., metavar="INPUT", help="JSONL or CSV file with prompts, or '-' for stdin", show_default=False),
+    output: Path = typer.Option(None, "--output", "-o", help="JSONL file for results (defaults to stdout)", show_default=False),
+    input_format: str = typer.Option(None, "--format", help="Input format: jsonl or csv (guessed from file name)", show_default=False),
+    concurrency: int = typer.Option(BATCH_CONCURRENCY, help="Maximum number of requests in flight", min=1),
+    order: str = typer.Option("input", help="Write results in 'input' or 'completion' order"),
+    resume: bool = typer.Option(False, help="Skip prompts that already succeeded in the output file"),
+    model: str = typer.Option(None, help="Model to use (defaults to profile's default)", show_default=False),
+    profile: str = typer.Option(None, help="Profile to use (defaults to default profile)", show_default=False),
+    system: str = typer.Option(None, help="Optional system message for prompts without one", show_default=False),
+    cache: bool = typer.Option(None, "--cache/--no-cache", help="Use the local response cache (default: cache.enabled)", show_default=False),
+    refresh: bool = typer.Option(False, help="Ignore cached responses and store fresh ones"),
+):
+    if order not in ("input", "completion"):
+        console.print(f"[red]Unknown order '{order}'. Use 'input' or 'completion'.[/red]")
+        return
+    if resume and output is None:
+        console.print("[red]--resume needs --output to know which prompts already ran.[/red]")
+        return
+
+    # Get settings
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    # Get profile
+    profile_obj, _profile_name = profiles.find_profile(settings, profile, quiet=output is None)
+    if not profile_obj:
+        return
+
+    # Heavy dependencies (openai) are only loaded once prompts are sent
+    from core import batch
+    from core.openai_client import OpenAIClient
+    
+    fmt = input_format or batch.detect_format(input_file)
+    skip = batch.completed_ids(output) if resume else set()
+    if skip:
+        console.print(f"[dim]Resuming: skipping {len(skip)} completed prompts[/dim]")
+
+    source = sys.stdin if input_file == "-" else open(input_file, "r", newline="")
+    sink = open(output, "a" if resume else "w") if output else sys.stdout
+    if resume and sink.tell() and not output.read_bytes().endswith(b"\n"):
+        # Terminate a partial line left by an interrupted run
+        sink.write("\n")
+    counts = {"ok": 0, "failed": 0}
+
+    def write_result(record):
+        counts["ok" if record["error"] is None else "failed"] += 1
+        sink.write(json.dumps(record) + "\n")
+        sink.flush()
+
+    try:
+        client = OpenAIClient(profile_obj, cache=open_cache(settings.cache, cache), refresh_cache=refresh)
+        items = (item for item in batch.read_prompts(source, fmt) if str(item["id"]) not in skip)
+        batch.run_batch(
+            client,
+            items,
+            write_result,
+            model=model,
+            system=system,
+            concurrency=concurrency,
+            ordered=order == "input",
+        )
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+
+    console.print(f"[green]{counts['ok']} succeeded[/green], [red]{counts['failed']} failed[/red]")
+    
+    from core import metrics
+    
+    counters = metrics.counters()
+    if counters:
+        console.print(
+            f"[dim]Retries: {counters.get('api.retries', 0):.0f} - "
+            f"Throttled: {counters.get('ratelimit.throttled', 0):.0f} "
+            f"({counters.get('ratelimit.wait_seconds', 0):.1f}s waiting)[/dim]"
+        )
+
@@ -0,0 +1,109 @@
+from typing import Any, Dict, List, Optional
+
+from rich import print as rprint
+from rich.columns import Columns
+from rich.markdown import Markdown
+from rich.panel import Panel
+from rich.table import Table
+
+from core import profiles
+from core.cache import open_cache
+from core.daemon import make_client
+from core.fanout import run_fanout
+from settings import AppSettings
+
+
+def split_names(value: Optional[str]) -> List[str]:
+    """Split a comma-separated option value
+
+    Args:
+        value: Option value, e.g. "gpt-4o,gpt-4o-mini"
+
+    Returns:
+        List[str]: Non-empty names
+    """
+    return [name.strip() for name in (value or "").split(",") if name.strip()]
+
+
+def _panel(record: Dict[str, Any]) -> Panel:
+    title = f"{record['profile']}/{record['model']}"
+    if record["error"]:
+        return Panel(f"[red]{record['error']}[/red]", title=title, border_style="red")
+    return Panel(Markdown(record["response"] or ""), title=title, subtitle=f"{record['latency']:.2f}s")
+
+
+def _summary(results: List[Dict[str, Any]]) -> Table:
+    table = Table(title="Per-model results")
+    table.add_column("Profile")
+    table.add_column("Model")
+    table.add_column("Latency", justify="right")
+    table.add_column("Prompt tokens", justify="right")
+    table.add_column("Completion tokens", justify="right")
+    table.add_column("Tokens/s", justify="right")
+    table.add_column("Status")
+    for record in results:
+        usage = record["usage"] or {}
+        completion = usage.get("completion_tokens")
+        rate = f"{completion / record['latency']:.1f}" if completion and record["latency"] else "-"
+        status = "[red]error[/red]" if record["error"] else "[green]ok[/green]"
+        table.add_row(
+            record["profile"],
+            record["model"],
+            f"{record['latency']:.2f}s",
+            str(usage.get("prompt_tokens", "-")),
+            str(completion if completion is not None else "-"),
+            rate,
+            status,
+        )
+    return table
+
+
+def fanout_command(
+    settings: AppSettings,
+    message: str,
+    model_names: List[str],
+    profile_names: List[str],
+    system: Optional[str] = None,
+    layout: str = "columns",
+    use_cache: Optional[bool] = None,
+    refresh: bool = False,
+) -> None:
+    """Send one prompt to several profiles/models and compare the answers
+
+    Args:
+        settings: Application settings
+        message: User message
+        model_names: Models to ask, or empty for each profile's default
+        profile_names: Profiles to use, or empty for the default profile
+        system: Optional system message
+        layout: "columns" to show answers side by side once all are done,
+            "stream" to show each answer as soon as it arrives
+        use_cache: Whether to use the response cache, or None for cache.enabled
+        refresh: Ignore cached responses and store fresh ones
+    """
+    if layout not in ("columns", "stream"):
+        rprint(f"[red]Unknown layout '{layout}'. Use 'columns' or 'stream'.[/red]")
+        return
+
+    cache = open_cache(settings.cache, use_cache)
+    clients = []
+    for name in profile_names or [None]:
+        profile_obj, _profile_name = profiles.find_profile(settings, name)
+        if not profile_obj:
+            return
+        clients.append(make_client(profile_obj, cache=cache, refresh_cache=refresh))
+
+    targets = [(client, model) for client in clients for model in (model_names or [None])]
+
+    messages = []
+    if system:
+        messages.append({"role": "system", "content": system})
+    messages.append({"role": "user", "content": message})
+
+    rprint(f"[bold]Asking {len(targets)} models...[/bold]")
+    on_result = (lambda record: rprint(_panel(record))) if layout == "stream" else (lambda record: None)
+    results = run_fanout(targets, messages, on_result)
+
+    if layout == "columns":
+        rprint(Columns([_panel(record) for record in results], equal=True, expand=True))
+    rprint(_summary(results))
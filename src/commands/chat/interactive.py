@@ -1,45 +1,145 @@
+import time
+
 import typer
 from rich import print as rprint
-from rich.markdown import Markdown
 
 from core import config, profiles
-from core.conversation import Conversation
+from core.history import HistoryStore
+from utils.rendering import FORMATS, resolve_format
 
 
 def interactive_chat_command(
     model: str = typer.Option(None, help="Model to use (defaults to profile's default)", show_default=False),
     profile: str = typer.Option(None, help="Profile to use (defaults to default profile)", show_default=False),
+    route: str = typer.Option(None, help="Route to send requests over, by health across its profiles and models (see 'termgpt config create-route')", show_default=False),
     system: str = typer.Option(None, help="Optional system message to set context", show_default=False),
+    prompt: str = typer.Option(None, help="Stored prompt to send as system message (defaults to the profile's default prompt)", show_default=False),
+    stream: bool = typer.Option(True, "--stream/--no-stream", help="Show responses as they are generated"),
+    warm: bool = typer.Option(True, "--warm/--no-warm", help="Warm up the connection and prepare requests in the background while you type"),
+    keep_partial: bool = typer.Option(False, "--keep-partial/--discard-partial", help="When a response is cancelled with Ctrl+C, keep the text received so far"),
+    resume: str = typer.Option(None, help="Resume a saved session by id (or unique id prefix)", show_default=False),
+    continue_: bool = typer.Option(False, "--continue", help="Resume the most recent session"),
+    save: bool = typer.Option(True, "--save/--no-save", help="Save the session to history"),
+    tools: bool = typer.Option(False, "--tools/--no-tools", help="Let the model call the profile's tools (see 'termgpt tool add')"),
+    output_format: str = typer.Option(None, "--format", help="Response format: raw, markdown or json (default: markdown on a terminal, raw when piped)", show_default=False),
 ):
+    if output_format and output_format not in FORMATS:
+        rprint(f"[red]Unknown format '{output_format}'. Use one of: {', '.join(FORMATS)}.[/red]")
+        raise typer.Exit(code=1)
+    fmt = resolve_format(output_format)
+    
     # Get settings
     settings = config.ensure_config_exists()
     if not settings:
         return
     
+    # Route over several profiles/models, starting from the first target
+    route_obj = None
+    if route:
+        route_obj = settings.get_route(route)
+        if not route_obj:
+            rprint(f"[red]Route '{route}' does not exist. Create it with 'termgpt config create-route'.[/red]")
+            raise typer.Exit(code=1)
+        if profile or model:
+            rprint("[red]--route picks profiles and models itself; don't combine it with --profile or --model.[/red]")
+            raise typer.Exit(code=1)
+        try:
+            profile, model = profiles.parse_target(settings, route_obj.targets[0])
+        except ValueError as e:
+            rprint(f"[red]{str(e)}[/red]")
+            raise typer.Exit(code=1)
+    
+    # Find session to resume
+    store = HistoryStore()
+    resumed = None
+    if resume or continue_:
+        resumed = store.get_session(resume) if resume else store.latest_session(profile)
+        if not resumed:
+            rprint(f"[red]No saved session matches '{resume}'.[/red]" if resume else "[red]No saved sessions to continue.[/red]")
+            return
+        profile = profile or resumed["profile"]
+        model = model or resumed["model"]
+    
     # Get profile
     profile_obj, profile_name = profiles.find_profile(settings, profile)
     if not profile_obj:
         return
+    prompt_obj, found = profiles.find_prompt(profile_obj, prompt)
+    if not found:
+        return
+    if tools and not profile_obj.tools:
+        rprint(f"[red]Profile '{profile_name}' has no tools. Add one with 'termgpt tool add'.[/red]")
+        raise typer.Exit(code=1)
+    
+    # Heavy dependencies (openai, markdown) are only loaded once a session starts
+    from core import metrics, warmup
+    from core.conversation import Conversation
+    from core.daemon import make_client
+    from utils.rendering import render_response, render_stream
     
+    conversation = None
+    warmer = None
+    registry = None
     try:
-        # Create conversation
-        conversation = Conversation(profile_obj)
+        # Create conversation, on a pool that keeps connections open between turns
+        http_client = warmup.http_client() if warm else None
+        if route_obj:
+            from core.router import make_routing_client
+            
+            client = make_routing_client(settings, route_obj, http_client=http_client)
+        else:
+            client = make_client(profile_obj, http_client=http_client)
+        if tools:
+            from core.tools import ToolRegistry, describe_call
+            
+            registry = ToolRegistry(
+                profile_obj.tools,
+                on_call=lambda name, arguments, memoized: rprint(
+                    f"[dim]Tool: {describe_call(name, arguments)}{' (memoized)' if memoized else ''}[/dim]"
+                ),
+            )
+        conversation = Conversation(profile_obj, client=client, tools=registry)
+        model_name = model or profile_obj.default_model
+        
+        # Restore or start the saved session
+        if resumed:
+            conversation.load_messages(store.load_messages(resumed["id"]))
+            if save:
+                conversation.record_to(store.open_session(resumed["id"]))
+            rprint(f"[dim]Resumed session {resumed['id']} ({len(conversation.messages)} messages)[/dim]")
+        elif save:
+            conversation.record_to(store.create_session(profile_name, model_name))
+            rprint(f"[dim]Session: {conversation.session.id}[/dim]")
+        
+        # Stored prompt first, so requests share the same prefix
+        if prompt_obj and not resumed:
+            conversation.add_prompt(prompt_obj)
+            rprint(f"[dim]Prompt: {prompt_obj.name}[/dim]")
         
         # Add system message if provided
-        if system:
+        if system and not resumed:
             conversation.add_system_message(system)
             rprint(f"[dim]System message set: {system}[/dim]")
         
+        # Connect and prepare the first request while the user types
+        if warm:
+            warmer = warmup.Warmer(client, prepare=lambda: conversation.prepare(model)).start()
+        first_turn = True
+        
         # Display welcome message
-        model_name = model or profile_obj.default_model
         rprint(f"[bold]Starting chat with {model_name} using profile '{profile_name}'[/bold]")
         rprint("[dim]Type 'exit', 'quit', or press Ctrl+C to end the conversation[/dim]")
+        rprint("[dim]Press Ctrl+C while a response is generated to cancel only that response[/dim]")
         rprint("[dim]Type 'clear' to clear the conversation history[/dim]")
         
         # Main chat loop
         while True:
             # Get user input
             user_input = typer.prompt("\nYou")
+            entered = time.perf_counter()
+            if warmer:
+                warmer.wait_ready()
+            waited = time.perf_counter() - entered
             
             # Check for exit commands
             if user_input.lower() in ("exit", "quit"):
@@ -49,8 +149,14 @@ def interactive_chat_command(
             # Check for clear command
             if user_input.lower() == "clear":
                 conversation.clear()
+                if save:
+                    conversation.record_to(store.create_session(profile_name, model_name))
+                if prompt_obj:
+                    conversation.add_prompt(prompt_obj)
                 if system:
                     conversation.add_system_message(system)
+                if warmer:
+                    warmer.turn_done()
                 rprint("[bold]Conversation history cleared[/bold]")
                 continue
             
@@ -59,12 +165,57 @@ def interactive_chat_command(
             
             # Get and display response
             rprint("[bold]Thinking...[/bold]")
-            response = conversation.get_response(model)
+            connection = "warm" if warmer and warmer.warm.is_set() else "cold"
+            chunks = None
+            try:
+                if stream and fmt != "json":
+                    rprint("\n[bold green]AI:[/bold green]")
+                    chunks = conversation.stream_response(model)
+                    render_stream(chunks, fmt)
+                    ttft = conversation.last_metrics.get("time_to_first_token")
+                    latency = waited + ttft if ttft is not None else None
+                    if ttft is not None:
+                        rprint(f"[dim]Time to first token: {ttft:.2f}s[/dim]")
+                else:
+                    started = time.perf_counter()
+                    response = conversation.get_response(model)
+                    latency = waited + time.perf_counter() - started
+                    
+                    if fmt != "json":
+                        rprint("\n[bold green]AI:[/bold green]")
+                    render_response(response, fmt, profile=profile_name, model=model_name)
+            except KeyboardInterrupt:
+                # Cancel only this response; closing the generator closes the HTTP stream
+                if chunks is not None:
+                    chunks.close()
+                if conversation.cancel_turn(keep_partial):
+                    rprint("\n[yellow]Response cancelled, partial response kept.[/yellow]")
+                else:
+                    rprint("\n[yellow]Response cancelled.[/yellow]")
+                continue
+            finally:
+                if warmer:
+                    warmer.turn_done()
             
-            rprint("\n[bold green]AI:[/bold green]")
-            rprint(Markdown(response))
+            # Compare first turns on warm and cold connections in 'termgpt stats'
+            if first_turn and latency is not None and "prompt_tokens" in conversation.last_metrics:
+                first_turn = False
+                metrics.add_span({"span": f"interactive.first_turn.{connection}", "ts": time.time(), "duration": latency})
+                rprint(f"[dim]First turn: {latency:.2f}s after Enter ({connection} connection)[/dim]")
+            if route_obj and client.served:
+                rprint(f"[dim]Answered by {client.served}[/dim]")
+            cached_tokens = conversation.last_metrics.get("cached_tokens")
+            if cached_tokens is not None:
+                rprint(f"[dim]Prompt tokens: {conversation.last_metrics['prompt_tokens']} ({cached_tokens} cached)[/dim]")
             
     except KeyboardInterrupt:
         rprint("\n[bold]Conversation ended by user[/bold]")
     except Exception as e:
-        rprint(f"\n[bold red]Error:[/bold red] {str(e)}")
\ No newline at end of file
+        rprint(f"\n[bold red]Error:[/bold red] {str(e)}")
+    finally:
+        if warmer:
+            warmer.stop()
+        if registry:
+            registry.close()
+        if conversation:
+            conversation.record_to(None)
\ No newline at end of file
@@ -1,43 +1,159 @@
+from typing import List
+
 import typer
 from rich import print as rprint
-from rich.markdown import Markdown
+from rich.console import Console
 
 from core import config, profiles
-from core.conversation import Conversation
+from core.cache import open_cache
+from utils.rendering import FORMATS, resolve_format
 
 
 def single_message_command(
-    message: str = typer.Argument(..., help="Message to send to the AI", show_default=False),
+    message: str = typer.Argument(None, help="Message to send to the AI", show_default=False),
     model: str = typer.Option(None, help="Model to use (defaults to profile's default)", show_default=False),
     profile: str = typer.Option(None, help="Profile to use (defaults to default profile)", show_default=False),
+    route: str = typer.Option(None, help="Route to send requests over, by health across its profiles and models (see 'termgpt config create-route')", show_default=False),
     system: str = typer.Option(None, help="Optional system message to set context", show_default=False),
+    prompt: str = typer.Option(None, help="Stored prompt to send as system message (defaults to the profile's default prompt)", show_default=False),
+    stream: bool = typer.Option(True, "--stream/--no-stream", help="Show the response as it is generated"),
+    cache: bool = typer.Option(None, "--cache/--no-cache", help="Use the local response cache (default: cache.enabled)", show_default=False),
+    refresh: bool = typer.Option(False, help="Ignore cached responses and store fresh ones"),
+    semantic: bool = typer.Option(None, "--semantic/--no-semantic", help="Answer prompts worded like earlier ones from the semantic cache (default: cache.semantic.enabled)", show_default=False),
+    models: str = typer.Option(None, help="Comma-separated models to ask in parallel and compare", show_default=False),
+    profiles_: str = typer.Option(None, "--profiles", help="Comma-separated profiles to ask in parallel and compare", show_default=False),
+    layout: str = typer.Option("columns", help="Comparison layout: 'columns' (side by side) or 'stream' (as they finish)"),
+    tools: bool = typer.Option(False, "--tools/--no-tools", help="Let the model call the profile's tools (see 'termgpt tool add')"),
+    output_format: str = typer.Option(None, "--format", help="Output format: raw, markdown or json (default: markdown on a terminal, raw when piped)", show_default=False),
+    files: List[str] = typer.Option(None, "--file", "-f", help="File to include in the prompt, '-' for stdin (repeatable)", show_default=False),
+    concurrency: int = typer.Option(4, help="Chunks of a long --file input processed in parallel"),
+    chunk_tokens: int = typer.Option(None, help="Tokens per chunk of a long --file input (defaults to what fits the model)", show_default=False),
 ):
+    if output_format and output_format not in FORMATS:
+        rprint(f"[red]Unknown format '{output_format}'. Use one of: {', '.join(FORMATS)}.[/red]")
+        raise typer.Exit(code=1)
+    if not message and not files:
+        rprint("[red]Provide a message, a --file, or both.[/red]")
+        raise typer.Exit(code=1)
+    fmt = resolve_format(output_format)
+    # Keep stdout for the response itself unless rendering for a person
+    status = Console() if fmt == "markdown" else Console(stderr=True)
+    
     # Get settings
     settings = config.ensure_config_exists()
     if not settings:
         return
     
+    # Route over several profiles/models, starting from the first target
+    route_obj = None
+    if route:
+        route_obj = settings.get_route(route)
+        if not route_obj:
+            rprint(f"[red]Route '{route}' does not exist. Create it with 'termgpt config create-route'.[/red]")
+            raise typer.Exit(code=1)
+        if profile or model or models or profiles_:
+            rprint("[red]--route picks profiles and models itself; don't combine it with --profile, --model, --models or --profiles.[/red]")
+            raise typer.Exit(code=1)
+        try:
+            profile, model = profiles.parse_target(settings, route_obj.targets[0])
+        except ValueError as e:
+            rprint(f"[red]{str(e)}[/red]")
+            raise typer.Exit(code=1)
+    
+    # Compare several models/profiles instead of a single answer
+    if models or profiles_:
+        if files:
+            rprint("[red]--file can't be combined with --models or --profiles.[/red]")
+            raise typer.Exit(code=1)
+        from commands.chat.fanout import fanout_command, split_names
+        
+        model_names = split_names(models) or ([model] if model else [])
+        profile_names = split_names(profiles_) or ([profile] if profile else [])
+        try:
+            fanout_command(settings, message, model_names, profile_names, system, layout, cache, refresh)
+        except Exception as e:
+            rprint(f"[bold red]Error:[/bold red] {str(e)}")
+        return
+    
     # Get profile
-    profile_obj, _profile_name = profiles.find_profile(settings, profile)
+    profile_obj, profile_name = profiles.find_profile(settings, profile, quiet=fmt != "markdown")
     if not profile_obj:
         return
+    prompt_obj, found = profiles.find_prompt(profile_obj, prompt)
+    if not found:
+        return
+    if tools and not profile_obj.tools:
+        rprint(f"[red]Profile '{profile_name}' has no tools. Add one with 'termgpt tool add'.[/red]")
+        raise typer.Exit(code=1)
+    
+    # Heavy dependencies (openai, markdown) are only loaded once a request is made
+    from core.conversation import Conversation
+    from core.daemon import make_client
+    from utils.rendering import render_response, render_stream
     
     try:
         # Create conversation
-        conversation = Conversation(profile_obj)
+        if route_obj:
+            from core.router import make_routing_client
+            
+            client = make_routing_client(settings, route_obj, cache=open_cache(settings.cache, cache), refresh_cache=refresh)
+        else:
+            client = make_client(profile_obj, cache=open_cache(settings.cache, cache), refresh_cache=refresh)
+        semantic_cache = None
+        if cache is not False and semantic is not False and (semantic or settings.cache.semantic.enabled):
+            from core.semantic_cache import from_config
+            
+            semantic_cache = from_config(settings.cache, profile_obj)
+        registry = None
+        if tools:
+            from core.tools import ToolRegistry, describe_call
+            
+            registry = ToolRegistry(
+                profile_obj.tools,
+                on_call=lambda name, arguments, memoized: status.print(
+                    f"[dim]Tool: {describe_call(name, arguments)}{' (memoized)' if memoized else ''}[/dim]"
+                ),
+            )
+        conversation = Conversation(profile_obj, client=client, semantic_cache=semantic_cache, tools=registry)
+        
+        # Stored prompt first, so requests share the same prefix
+        if prompt_obj:
+            conversation.add_prompt(prompt_obj)
         
         # Add system message if provided
         if system:
             conversation.add_system_message(system)
         
-        # Add user message
-        conversation.add_user_message(message)
+        # Add user message, with any files or stdin attached
+        if files:
+            from core import ingest
+
+            system_text = "\n\n".join(m["content"] for m in conversation.messages) or None
+            content = ingest.build_prompt(
+                client, message or "", files, model, system_text, concurrency, chunk_tokens,
+                on_result=lambda record: status.print(f"[dim]Processed part {record['id']}[/dim]"),
+            )
+            conversation.add_user_message(content)
+        else:
+            conversation.add_user_message(message)
         
         # Get and display response
-        rprint("[bold]Thinking...[/bold]")
-        response = conversation.get_response(model)
-        
-        rprint(Markdown(response))
+        status.print("[bold]Thinking...[/bold]")
+        if stream and fmt != "json":
+            render_stream(conversation.stream_response(model), fmt)
+            ttft = conversation.last_metrics.get("time_to_first_token")
+            if ttft is not None:
+                status.print(f"[dim]Time to first token: {ttft:.2f}s[/dim]")
+        else:
+            response = conversation.get_response(model)
+            render_response(response, fmt, profile=profile_name, model=model or profile_obj.default_model)
+        if conversation.last_metrics.get("semantic_cache_hit"):
+            status.print("[dim]Answered from the semantic cache[/dim]")
+        elif route_obj and client.served:
+            status.print(f"[dim]Answered by {client.served}[/dim]")
+        cached_tokens = conversation.last_metrics.get("cached_tokens")
+        if cached_tokens is not None:
+            status.print(f"[dim]Prompt tokens: {conversation.last_metrics['prompt_tokens']} ({cached_tokens} cached)[/dim]")
         
     except Exception as e:
-        rprint(f"[bold red]Error:[/bold red] {str(e)}")
\ No newline at end of file
+        status.print(f"[bold red]Error:[/bold red] {str(e)}")
\ No newline at end of file
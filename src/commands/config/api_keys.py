@@ -23,9 +23,14 @@ def set_api_key_command(
     if not validators.validate_api_key(api_key):
         rprint("[yellow]Warning: API key format looks unusual. Continuing anyway.[/yellow]")
     
-    # Update profile
-    profile_obj.api_key = api_key
+    # Update profile against the latest config, other processes may have changed it
+    def apply(settings):
+        latest = settings.get_profile(profile_name)
+        if not latest:
+            rprint(f"[red]Profile '{profile_name}' no longer exists.[/red]")
+            return False
+        latest.api_key = api_key
     
     # Save configuration
-    if config.save_settings(settings):
+    if config.update_settings(apply):
         rprint(f"[green]API key set for profile '{profile_name}'.[/green]")
\ No newline at end of file
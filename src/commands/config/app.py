@@ -4,6 +4,8 @@ import typer
 from commands.config.init import init_command
 from commands.config.profiles import create_profile_command, list_profiles_command, set_default_profile_command
 from commands.config.api_keys import set_api_key_command
+from commands.config.budget import set_budget_command
+from commands.config.routes import create_route_command, list_routes_command
 from commands.config.show import show_command
 
 app = typer.Typer(help="Configure settings like API tokens and profiles")
@@ -19,4 +21,7 @@ app.command(name="show", help="Show current configuration")(show_command)
 app.command(name="create-profile", help="Create a new profile with custom settings")(create_profile_command)
 app.command(name="list-profiles", help="List all available profiles")(list_profiles_command)
 app.command(name="set-default-profile", help="Set the default profile to use")(set_default_profile_command)
-app.command(name="set-api-key", help="Set API key for a specific profile")(set_api_key_command)
\ No newline at end of file
+app.command(name="set-api-key", help="Set API key for a specific profile")(set_api_key_command)
+app.command(name="set-budget", help="Set daily and monthly token and cost limits of a profile")(set_budget_command)
+app.command(name="create-route", help="Create a route that spreads requests over several profiles and models")(create_route_command)
+app.command(name="list-routes", help="List routes with the recent health of their targets")(list_routes_command)
@@ -0,0 +1,52 @@
+import typer
+from rich import print as rprint
+
+from core import config
+from core import profiles
+from settings import BudgetConfig
+
+def set_budget_command(
+    daily_tokens: int = typer.Option(None, help="Tokens per day", show_default=False),
+    monthly_tokens: int = typer.Option(None, help="Tokens per calendar month", show_default=False),
+    daily_cost: float = typer.Option(None, help="USD per day", show_default=False),
+    monthly_cost: float = typer.Option(None, help="USD per calendar month", show_default=False),
+    clear: bool = typer.Option(False, help="Remove the limits not given"),
+    profile: str = typer.Option(None, help="Profile name (uses default profile if not specified)", show_default=False)
+):
+    limits = {
+        "daily_tokens": daily_tokens,
+        "monthly_tokens": monthly_tokens,
+        "daily_cost": daily_cost,
+        "monthly_cost": monthly_cost,
+    }
+    given = {key: value for key, value in limits.items() if value is not None}
+    if not given and not clear:
+        rprint("[red]Give at least one limit, or --clear to remove them all.[/red]")
+        raise typer.Exit(code=1)
+    
+    # Ensure config exists
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+    
+    # Find profile
+    profile_obj, profile_name = profiles.find_profile(settings, profile)
+    if not profile_obj:
+        return
+    
+    # Update profile against the latest config, other processes may have changed it
+    def apply(settings):
+        latest = settings.get_profile(profile_name)
+        if not latest:
+            rprint(f"[red]Profile '{profile_name}' no longer exists.[/red]")
+            return False
+        current = {} if clear else latest.budget.model_dump()
+        latest.budget = BudgetConfig(**{**current, **given})
+    
+    # Save configuration
+    if config.update_settings(apply):
+        if given:
+            summary = ", ".join(f"{key.replace('_', ' ')} {value}" for key, value in given.items())
+            rprint(f"[green]Budget of profile '{profile_name}' set: {summary}.[/green]")
+        else:
+            rprint(f"[green]Budget of profile '{profile_name}' removed.[/green]")
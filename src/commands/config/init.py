@@ -11,15 +11,13 @@ def init_command():
         rprint("[yellow]Operation cancelled.[/yellow]")
         return
     
-    # Get default settings or existing settings
-    settings = config.get_settings()
-
     # Request API key
     api_key = validators.prompt_for_api_key()
     
-    # Update or create default profile with API key
-    profiles.create_or_update_profile(settings, settings.default_profile, api_key=api_key)
+    # Update or create default profile with API key, keeping existing settings
+    def apply(settings):
+        profiles.create_or_update_profile(settings, settings.default_profile, api_key=api_key)
 
     # Save configuration
-    if config.save_settings(settings):
+    if config.update_settings(apply):
         rprint("[green]Configuration initialized successfully.[/green]")
@@ -18,14 +18,12 @@ def create_profile_command(
         return
     
     # Check if profile already exists
-    profile_exists = any(p.name == name for p in settings.profiles)
+    profile_exists = settings.get_profile(name) is not None
     if profile_exists:
         overwrite = typer.confirm(f"Profile '{name}' already exists. Do you want to overwrite it?")
         if not overwrite:
             rprint("[yellow]Operation cancelled.[/yellow]")
             return
-        # Remove existing profile
-        settings.profiles = [p for p in settings.profiles if p.name != name]
     
     # Request API key if not provided
     if api_key is None:
@@ -70,24 +68,27 @@ def create_profile_command(
             presence_penalty=default_config.presence_penalty
         )]
     
-    settings.profiles.append(new_profile)
-    
     # Ask if this should be the default profile if not specified in options
     if set_as_default is None:
         # If this is the first profile, suggest making it default
-        is_first_profile = len(settings.profiles) == 1
+        is_first_profile = all(p.name == name for p in settings.profiles)
         default_choice = is_first_profile
         set_as_default = typer.confirm(
             f"Do you want to set '{name}' as the default profile?", 
             default=default_choice
         )
     
-    if set_as_default:
-        settings.default_profile = name
-        rprint(f"[green]Profile '{name}' set as default.[/green]")
+    # Replace any existing profile in the latest config
+    def apply(settings):
+        settings.profiles = [p for p in settings.profiles if p.name != name]
+        settings.profiles.append(new_profile)
+        if set_as_default:
+            settings.default_profile = name
     
     # Save configuration
-    if config.save_settings(settings):
+    if config.update_settings(apply):
+        if set_as_default:
+            rprint(f"[green]Profile '{name}' set as default.[/green]")
         rprint(f"[green]Profile '{name}' created successfully.[/green]")
 
 def list_profiles_command():
@@ -109,14 +110,18 @@ def set_default_profile_command(
         return
     
     # Check if profile exists
-    profile_exists = any(p.name == name for p in settings.profiles)
+    profile_exists = settings.get_profile(name) is not None
     if not profile_exists:
         rprint(f"[red]Profile '{name}' does not exist. Create it first with 'termgpt config create-profile'.[/red]")
         return
     
-    # Set as default
-    settings.default_profile = name
+    # Set as default, unless it was deleted in the meantime
+    def apply(settings):
+        if settings.get_profile(name) is None:
+            rprint(f"[red]Profile '{name}' no longer exists.[/red]")
+            return False
+        settings.default_profile = name
     
     # Save configuration
-    if config.save_settings(settings):
+    if config.update_settings(apply):
         rprint(f"[green]Default profile set to '{name}'.[/green]")
\ No newline at end of file
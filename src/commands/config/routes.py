@@ -0,0 +1,76 @@
+import typer
+from rich import print as rprint
+
+from core import config
+from core import profiles
+from settings import RouteConfig
+
+def create_route_command(
+    name: str = typer.Argument(..., help="Route name", show_default=False),
+    targets: str = typer.Argument(..., help="Comma-separated 'profile' or 'profile/model' targets, in order of preference", show_default=False),
+    hedge: bool = typer.Option(False, help="Send a duplicate request to the next target when one is slower than its p95"),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    specs = [spec.strip() for spec in targets.split(",") if spec.strip()]
+    if not specs:
+        rprint("[red]Give at least one target.[/red]")
+        raise typer.Exit(code=1)
+    try:
+        resolved = [profiles.parse_target(settings, spec) for spec in specs]
+    except ValueError as e:
+        rprint(f"[red]{str(e)}[/red]")
+        raise typer.Exit(code=1)
+    if hedge and len(resolved) < 2:
+        rprint("[red]Hedging needs at least two targets.[/red]")
+        raise typer.Exit(code=1)
+
+    if settings.get_route(name):
+        overwrite = typer.confirm(f"Route '{name}' already exists. Do you want to overwrite it?")
+        if not overwrite:
+            rprint("[yellow]Operation cancelled.[/yellow]")
+            return
+
+    route = RouteConfig(name=name, targets=[f"{profile}/{model}" for profile, model in resolved], hedge=hedge)
+
+    def apply(settings):
+        settings.routes = [r for r in settings.routes if r.name != name] + [route]
+
+    if config.update_settings(apply):
+        rprint(f"[green]Route '{name}' saved: {', '.join(route.targets)}{' (hedged)' if hedge else ''}.[/green]")
+        rprint(f"[dim]Use it with 'termgpt chat single --route {name}' or 'termgpt chat interactive --route {name}'.[/dim]")
+
+def list_routes_command():
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    if not settings.routes:
+        rprint("[yellow]No routes configured. Create one with 'termgpt config create-route'.[/yellow]")
+        return
+
+    from core import metrics, router
+
+    rprint("[bold]Routes (health from the last hour of requests):[/bold]")
+    for route in settings.routes:
+        rprint(f"  • [bold]{route.name}[/bold]{' (hedged)' if route.hedge else ''}")
+        try:
+            client = router.make_routing_client(settings, route)
+        except Exception as e:
+            rprint(f"    [red]{str(e)}[/red]")
+            continue
+        for target in client.ranked():
+            health = target.health
+            samples = health.snapshot()
+            latencies = health.latencies(samples)
+            if not samples:
+                rprint(f"    - {target}: no recent requests")
+                continue
+            median = f"{metrics.percentile(latencies, 50) * 1000:.0f} ms" if latencies else "-"
+            p95 = health.p95()
+            rprint(
+                f"    - {target}: {len(samples)} requests, p50 {median}, "
+                f"p95 {f'{p95 * 1000:.0f} ms' if p95 is not None else '-'}, {health.error_rate(samples):.0%} errors"
+            )
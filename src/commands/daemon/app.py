@@ -0,0 +1,17 @@
+import typer
+
+# Import command implementations
+from commands.daemon.control import start_command, stop_command, status_command, run_command
+
+app = typer.Typer(help="Manage the background daemon that keeps API connections warm")
+
+@app.callback()
+def callback():
+    """Manage the background daemon"""
+    pass
+
+# Register commands
+app.command(name="start", help="Start the daemon in the background")(start_command)
+app.command(name="stop", help="Stop the daemon")(stop_command)
+app.command(name="status", help="Show whether the daemon is running")(status_command)
+app.command(name="run", help="Run the daemon in the foreground", hidden=True)(run_command)
@@ -0,0 +1,74 @@
+from rich import print as rprint
+
+from default import DAEMON_LOG_FILE
+
+
+def _check_supported() -> bool:
+    from core import daemon
+    
+    if not daemon.is_supported():
+        rprint("[red]The daemon needs Unix domain sockets, which this platform doesn't support.[/red]")
+        return False
+    return True
+
+
+def start_command():
+    from core import daemon
+    
+    if not _check_supported():
+        return
+    
+    status = daemon.ping()
+    if status:
+        rprint(f"[yellow]Daemon is already running (pid {status['pid']}).[/yellow]")
+        return
+    
+    status = daemon.start()
+    if not status:
+        rprint(f"[red]Daemon did not start. See {DAEMON_LOG_FILE} for details.[/red]")
+        return
+    rprint(f"[green]Daemon started (pid {status['pid']}).[/green]")
+
+
+def stop_command():
+    from core import daemon
+    
+    if not _check_supported():
+        return
+    
+    if daemon.stop():
+        rprint("[green]Daemon stopped.[/green]")
+    else:
+        rprint("[yellow]Daemon is not running.[/yellow]")
+
+
+def status_command():
+    from core import daemon
+    
+    if not _check_supported():
+        return
+    
+    status = daemon.ping()
+    if not status:
+        rprint("[yellow]Daemon is not running. Chat commands run in-process.[/yellow]")
+        return
+    
+    profiles = ", ".join(status["profiles"]) or "none yet"
+    rprint("[bold]Daemon is running:[/bold]")
+    rprint(f"  • PID: {status['pid']}")
+    rprint(f"  • Uptime: {status['uptime']:.0f}s")
+    rprint(f"  • Requests served: {status['requests']}")
+    rprint(f"  • Warm profiles: {profiles}")
+    counters = status.get("counters", {})
+    rprint(f"  • Retries: {counters.get('api.retries', 0):.0f} - "
+           f"Throttled: {counters.get('ratelimit.throttled', 0):.0f} "
+           f"({counters.get('ratelimit.wait_seconds', 0):.1f}s waiting)")
+
+
+def run_command():
+    if not _check_supported():
+        return
+    
+    from core import daemon_server
+    
+    daemon_server.run()
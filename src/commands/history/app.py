@@ -0,0 +1,16 @@
+import typer
+
+# Import command implementations
+from commands.history.sessions import list_command, show_command, export_command
+
+app = typer.Typer(help="Browse saved conversation sessions")
+
+@app.callback()
+def callback():
+    """Browse saved conversation sessions"""
+    pass
+
+# Register commands
+app.command(name="list", help="List saved sessions, most recent first")(list_command)
+app.command(name="show", help="Show the messages of a saved session")(show_command)
+app.command(name="export", help="Export a saved session as JSON or Markdown")(export_command)
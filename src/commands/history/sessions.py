@@ -0,0 +1,103 @@
+import json
+from datetime import datetime
+from pathlib import Path
+
+import typer
+from rich import print as rprint
+
+from core.history import HistoryStore
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def _find_session(store: HistoryStore, session_id: str):
+    session = store.get_session(session_id)
+    if not session:
+        rprint(f"[red]No saved session matches '{session_id}'. Run 'termgpt history list' to see sessions.[/red]")
+    return session
+
+
+def _tool_calls(message) -> str:
+    """Names of the tools an assistant message called, for display"""
+    return ", ".join(call["function"]["name"] for call in message.get("tool_calls") or ())
+
+
+def list_command(
+    limit: int = typer.Option(20, help="Maximum number of sessions to show"),
+):
+    sessions = HistoryStore().list_sessions(limit)
+    if not sessions:
+        rprint("[yellow]No saved sessions.[/yellow]")
+        return
+    
+    rprint("[bold]Saved sessions:[/bold]")
+    for session in sessions:
+        title = session["title"] or "[dim](empty)[/dim]"
+        rprint(f"  • [bold]{session['id']}[/bold] {_format_time(session['updated'])} - "
+               f"{session['profile']}/{session['model']} - {session['message_count']} messages - {title}")
+
+
+def show_command(
+    session_id: str = typer.Argument(..., help="Session id (or unique id prefix)", show_default=False),
+    include_system: bool = typer.Option(False, help="Include system messages"),
+):
+    from rich.markdown import Markdown
+    
+    store = HistoryStore()
+    session = _find_session(store, session_id)
+    if not session:
+        return
+    
+    rprint(f"[bold]Session {session['id']}[/bold] - {session['profile']}/{session['model']}")
+    for message in store.load_messages(session["id"]):
+        role = message["role"]
+        if role == "user":
+            rprint("\n[bold blue]You:[/bold blue]")
+            rprint(message["content"])
+        elif role == "assistant" and message.get("tool_calls"):
+            # Tool results are left out; the answer that uses them follows
+            rprint(f"[dim]Called tools: {_tool_calls(message)}[/dim]")
+        elif role == "assistant":
+            rprint("\n[bold green]AI:[/bold green]")
+            rprint(Markdown(message["content"] or ""))
+        elif role == "system" and include_system:
+            rprint("\n[bold yellow]System:[/bold yellow]")
+            rprint(message["content"])
+
+
+def export_command(
+    session_id: str = typer.Argument(..., help="Session id (or unique id prefix)", show_default=False),
+    format: str = typer.Option("json", help="Export format: json or markdown"),
+    output: Path = typer.Option(None, "--output", "-o", help="File to write (defaults to stdout)", show_default=False),
+):
+    if format not in ("json", "markdown"):
+        rprint(f"[red]Unknown format '{format}'. Use 'json' or 'markdown'.[/red]")
+        return
+    
+    store = HistoryStore()
+    session = _find_session(store, session_id)
+    if not session:
+        return
+    
+    messages = store.load_messages(session["id"])
+    if format == "json":
+        text = json.dumps({**dict(session), "messages": messages}, indent=2, ensure_ascii=False)
+    else:
+        headings = {"system": "System", "user": "You", "assistant": "AI"}
+        parts = [f"# {session['title'] or session['id']}"]
+        for m in messages:
+            if m["role"] == "tool":
+                continue
+            if m.get("tool_calls"):
+                parts.append(f"_Called tools: {_tool_calls(m)}_")
+            else:
+                parts.append(f"## {headings.get(m['role'], m['role'])}\n\n{m['content'] or ''}")
+        text = "\n\n".join(parts)
+    
+    if output:
+        output.write_text(text + "\n", encoding="utf-8")
+        rprint(f"[green]Session exported to {output}.[/green]")
+    else:
+        print(text)
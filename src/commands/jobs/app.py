@@ -0,0 +1,17 @@
+import typer
+
+# Import command implementations
+from commands.jobs.manage import submit_command, status_command, fetch_command, cancel_command
+
+app = typer.Typer(help="Run prompts through the provider's asynchronous Batch API")
+
+@app.callback()
+def callback():
+    """Run prompts through the provider's asynchronous Batch API"""
+    pass
+
+# Register commands
+app.command(name="submit", help="Upload a prompts file and start a batch job")(submit_command)
+app.command(name="status", help="Show the status of one job, or list recent jobs")(status_command)
+app.command(name="fetch", help="Download the results of a finished job as JSONL")(fetch_command)
+app.command(name="cancel", help="Cancel a running job")(cancel_command)
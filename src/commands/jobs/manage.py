@@ -0,0 +1,200 @@
+import sys
+from datetime import datetime
+from pathlib import Path
+
+import typer
+from rich.console import Console
+
+from core import config, profiles
+from core.jobs import FINAL_STATUSES, JobIndex
+
+# Status goes to stderr so results can be piped from stdout
+console = Console(stderr=True)
+
+
+def _format_time(timestamp: float) -> str:
+    return datetime.fromtimestamp(timestamp).strftime("%Y-%m-%d %H:%M")
+
+
+def _find_job(index: JobIndex, job_id: str):
+    job = index.get(job_id)
+    if not job:
+        console.print(f"[red]No job matches '{job_id}'. Run 'termgpt jobs status' to see jobs.[/red]")
+    return job
+
+
+def _client_for(settings, profile_name: str):
+    # Jobs and their files belong to the account of the profile that submitted them
+    profile_obj = settings.get_profile(profile_name)
+    if not profile_obj:
+        console.print(f"[red]Profile '{profile_name}' of this job no longer exists.[/red]")
+        return None
+
+    from core.openai_client import OpenAIClient
+
+    return OpenAIClient(profile_obj)
+
+
+def _print_job(job) -> None:
+    done = job["completed"] + job["failed"]
+    console.print(
+        f"  • [bold]{job['id']}[/bold] {_format_time(job['created'])} - {job['profile']}/{job['model']} - "
+        f"{job['status']} - {done}/{job['total']} done, {job['failed']} failed - {job['input']}"
+    )
+
+
+def submit_command(
+    input_file: str = typer.Argument(..., metavar="INPUT", help="JSONL or CSV file with prompts, or '-' for stdin", show_default=False),
+    input_format: str = typer.Option(None, "--format", help="Input format: jsonl or csv (guessed from file name)", show_default=False),
+    model: str = typer.Option(None, help="Model to use (defaults to profile's default)", show_default=False),
+    profile: str = typer.Option(None, help="Profile to use (defaults to default profile)", show_default=False),
+    system: str = typer.Option(None, help="Optional system message for prompts without one", show_default=False),
+    window: str = typer.Option("24h", help="Time the provider has to finish the job"),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    # Keep stdout for the job id
+    profile_obj, _profile_name = profiles.find_profile(settings, profile, quiet=True)
+    if not profile_obj:
+        return
+
+    # Heavy dependencies (openai) are only loaded once prompts are sent
+    from core import batch, jobs
+    from core.openai_client import OpenAIClient
+
+    fmt = input_format or batch.detect_format(input_file)
+    source = sys.stdin if input_file == "-" else open(input_file, "r", newline="")
+    try:
+        client = OpenAIClient(profile_obj)
+        job = jobs.submit(client, batch.read_prompts(source, fmt), input_file, model=model, system=system, completion_window=window)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+        raise typer.Exit(code=1)
+    finally:
+        if source is not sys.stdin:
+            source.close()
+
+    console.print(f"[green]Submitted job {job.id} with {job.request_counts.total if job.request_counts else '?'} requests ({job.status}).[/green]")
+    console.print(f"[dim]Check it with 'termgpt jobs status {job.id}' and download results with 'termgpt jobs fetch {job.id}'.[/dim]")
+    # The job id alone on stdout, for scripts
+    print(job.id)
+
+
+def status_command(
+    job_id: str = typer.Argument(None, help="Job id (or unique id prefix); lists recent jobs if omitted", show_default=False),
+    limit: int = typer.Option(20, help="Maximum number of jobs to list"),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    index = JobIndex()
+    if job_id:
+        job = _find_job(index, job_id)
+        if not job:
+            raise typer.Exit(code=1)
+        rows = [job]
+    else:
+        rows = index.list_jobs(limit)
+        if not rows:
+            console.print("[yellow]No jobs submitted. Start one with 'termgpt jobs submit'.[/yellow]")
+            return
+
+    from core import jobs
+
+    # Only ask the provider about jobs that can still change
+    clients = {}
+    for row in rows:
+        if row["status"] in FINAL_STATUSES:
+            continue
+        if row["profile"] not in clients:
+            clients[row["profile"]] = _client_for(settings, row["profile"])
+        if clients[row["profile"]]:
+            try:
+                jobs.refresh(clients[row["profile"]], row["id"], index)
+            except Exception as e:
+                console.print(f"[red]Could not refresh job {row['id']}: {str(e)}[/red]")
+
+    console.print("[bold]Jobs:[/bold]" if not job_id else "[bold]Job:[/bold]")
+    for row in rows:
+        _print_job(index.get(row["id"]))
+
+
+def fetch_command(
+    job_id: str = typer.Argument(..., help="Job id (or unique id prefix)", show_default=False),
+    output: Path = typer.Option(None, "--output", "-o", help="JSONL file for results (defaults to stdout)", show_default=False),
+    errors: bool = typer.Option(True, "--errors/--no-errors", help="Also write records of failed requests"),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    index = JobIndex()
+    job = _find_job(index, job_id)
+    if not job:
+        raise typer.Exit(code=1)
+    client = _client_for(settings, job["profile"])
+    if not client:
+        raise typer.Exit(code=1)
+
+    from core import jobs
+
+    try:
+        batch_job = jobs.refresh(client, job["id"], index)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+        raise typer.Exit(code=1)
+    # Cancelled and expired jobs can still have results for the requests that ran
+    if batch_job.status not in FINAL_STATUSES:
+        console.print(f"[yellow]Job {batch_job.id} is still {batch_job.status}. Try again later.[/yellow]")
+        raise typer.Exit(code=1)
+    files = [batch_job.output_file_id] + ([batch_job.error_file_id] if errors else [])
+    files = [file_id for file_id in files if file_id]
+    if not files:
+        console.print(f"[yellow]Job {batch_job.id} ({batch_job.status}) has no results to download.[/yellow]")
+        return
+
+    sink = open(output, "w") if output else sys.stdout
+    counts = {"ok": 0, "failed": 0}
+    try:
+        for file_id in files:
+            for key, value in jobs.download_results(client, file_id, sink).items():
+                counts[key] += value
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+        raise typer.Exit(code=1)
+    finally:
+        if sink is not sys.stdout:
+            sink.close()
+
+    console.print(f"[green]{counts['ok']} succeeded[/green], [red]{counts['failed']} failed[/red]")
+
+
+def cancel_command(
+    job_id: str = typer.Argument(..., help="Job id (or unique id prefix)", show_default=False),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    index = JobIndex()
+    job = _find_job(index, job_id)
+    if not job:
+        raise typer.Exit(code=1)
+    if job["status"] in FINAL_STATUSES:
+        console.print(f"[yellow]Job {job['id']} is already {job['status']}.[/yellow]")
+        return
+    client = _client_for(settings, job["profile"])
+    if not client:
+        raise typer.Exit(code=1)
+
+    from core import jobs
+
+    try:
+        batch_job = jobs.cancel(client, job["id"], index)
+    except Exception as e:
+        console.print(f"[bold red]Error:[/bold red] {str(e)}")
+        raise typer.Exit(code=1)
+    console.print(f"[green]Job {batch_job.id} is {batch_job.status}.[/green]")
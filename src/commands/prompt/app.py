@@ -0,0 +1,16 @@
+import typer
+
+# Import command implementations
+from commands.prompt.manage import add_command, list_command, use_command
+
+app = typer.Typer(help="Manage stored system prompts")
+
+@app.callback()
+def callback():
+    """Manage stored system prompts"""
+    pass
+
+# Register commands
+app.command(name="add", help="Store a system prompt in a profile")(add_command)
+app.command(name="list", help="List the stored prompts of a profile")(list_command)
+app.command(name="use", help="Set the prompt sent by default with every chat")(use_command)
@@ -0,0 +1,123 @@
+import sys
+from pathlib import Path
+
+import typer
+from rich import print as rprint
+
+from core import config, profiles
+from settings import PromptConfig
+
+
+def add_command(
+    name: str = typer.Argument(..., help="Prompt name", show_default=False),
+    file: str = typer.Option(None, "--file", "-f", help="Read the prompt from this file, '-' for stdin", show_default=False),
+    content: str = typer.Option(None, help="Prompt text, if not read from a file", show_default=False),
+    profile: str = typer.Option(None, help="Profile name (uses default profile if not specified)", show_default=False),
+    use: bool = typer.Option(False, help="Also make it the profile's default prompt"),
+):
+    if (file is None) == (content is None):
+        rprint("[red]Give the prompt either with --file or with --content.[/red]")
+        raise typer.Exit(code=1)
+    if file == "-":
+        content = sys.stdin.read()
+    elif file is not None:
+        content = Path(file).read_text(encoding="utf-8")
+    if not content.strip():
+        rprint("[red]The prompt is empty.[/red]")
+        raise typer.Exit(code=1)
+    
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+    
+    profile_obj, profile_name = profiles.find_profile(settings, profile)
+    if not profile_obj:
+        return
+    
+    if profile_obj.get_prompt(name):
+        overwrite = typer.confirm(f"Prompt '{name}' already exists. Do you want to overwrite it?")
+        if not overwrite:
+            rprint("[yellow]Operation cancelled.[/yellow]")
+            return
+    
+    # Count tokens once now instead of on every request
+    models = [profile_obj.default_model] + [m.name for m in profile_obj.models]
+    prompt = PromptConfig(name=name, content=content, tokens=profiles.prompt_token_counts(content, models))
+    
+    def apply(settings):
+        latest = settings.get_profile(profile_name)
+        if not latest:
+            rprint(f"[red]Profile '{profile_name}' no longer exists.[/red]")
+            return False
+        latest.prompts = [p for p in latest.prompts if p.name != name] + [prompt]
+        if use:
+            latest.default_prompt = name
+    
+    if config.update_settings(apply):
+        tokens = prompt.tokens[profile_obj.default_model]
+        rprint(f"[green]Prompt '{name}' saved to profile '{profile_name}' ({tokens} tokens).[/green]")
+        if use:
+            rprint(f"[green]Default prompt set to '{name}'.[/green]")
+
+
+def list_command(
+    profile: str = typer.Option(None, help="Profile name (uses default profile if not specified)", show_default=False),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+    
+    profile_obj, profile_name = profiles.find_profile(settings, profile)
+    if not profile_obj:
+        return
+    
+    if not profile_obj.prompts:
+        rprint(f"[yellow]No prompts stored in profile '{profile_name}'. Add one with 'termgpt prompt add'.[/yellow]")
+        return
+    
+    rprint(f"[bold]Prompts of profile '{profile_name}':[/bold]")
+    for prompt in profile_obj.prompts:
+        is_default = " [green](default)[/green]" if prompt.name == profile_obj.default_prompt else ""
+        tokens = prompt.tokens.get(profile_obj.default_model)
+        size = f"{tokens} tokens" if tokens is not None else f"{len(prompt.content)} chars"
+        preview = prompt.content.strip().splitlines()[0][:60]
+        rprint(f"  • {prompt.name}{is_default} - {size} - {preview}")
+
+
+def use_command(
+    name: str = typer.Argument(None, help="Prompt name", show_default=False),
+    profile: str = typer.Option(None, help="Profile name (uses default profile if not specified)", show_default=False),
+    none: bool = typer.Option(False, "--none", help="Stop sending a prompt by default"),
+):
+    if not name and not none:
+        rprint("[red]Give a prompt name, or --none to unset the default prompt.[/red]")
+        raise typer.Exit(code=1)
+    
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+    
+    profile_obj, profile_name = profiles.find_profile(settings, profile)
+    if not profile_obj:
+        return
+    
+    if not none and not profile_obj.get_prompt(name):
+        rprint(f"[red]Prompt '{name}' does not exist in profile '{profile_name}'. Add it with 'termgpt prompt add'.[/red]")
+        return
+    
+    # Set as default, unless the profile or prompt was deleted in the meantime
+    def apply(settings):
+        latest = settings.get_profile(profile_name)
+        if not latest:
+            rprint(f"[red]Profile '{profile_name}' no longer exists.[/red]")
+            return False
+        if not none and not latest.get_prompt(name):
+            rprint(f"[red]Prompt '{name}' no longer exists.[/red]")
+            return False
+        latest.default_prompt = None if none else name
+    
+    if config.update_settings(apply):
+        if none:
+            rprint(f"[green]Profile '{profile_name}' no longer sends a default prompt.[/green]")
+        else:
+            rprint(f"[green]Default prompt of profile '{profile_name}' set to '{name}'.[/green]")
@@ -0,0 +1,93 @@
+import re
+import time
+from collections import defaultdict
+
+import typer
+from rich import print as rprint
+from rich.table import Table
+
+from core import metrics
+from default import METRICS_FILE
+
+SINCE_UNITS = {"m": 60, "h": 3600, "d": 86400}
+
+
+def _parse_since(value: str):
+    if value == "all":
+        return None
+    match = re.fullmatch(r"(\d+)([mhd])", value)
+    if not match:
+        raise typer.BadParameter("Use a duration like 30m, 24h or 7d, or 'all'")
+    return time.time() - int(match.group(1)) * SINCE_UNITS[match.group(2)]
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f} ms"
+
+
+def stats_command(
+    since: str = typer.Option("7d", help="Time window, e.g. 30m, 24h, 7d, or 'all'"),
+    clear: bool = typer.Option(False, help="Delete the metrics log"),
+):
+    if clear:
+        for log in (METRICS_FILE, METRICS_FILE.with_suffix(".jsonl.1")):
+            log.unlink(missing_ok=True)
+        rprint("[green]Metrics log cleared.[/green]")
+        return
+    
+    requests = defaultdict(list)
+    overhead = defaultdict(list)
+    for record in metrics.read_spans(since=_parse_since(since)):
+        if record["span"] == "chat.completion":
+            requests[(record.get("profile", "-"), record.get("model", "-"))].append(record)
+        else:
+            overhead[record["span"]].append(record["duration"])
+    
+    if not requests and not overhead:
+        rprint(f"[yellow]No metrics recorded in {METRICS_FILE} for this window.[/yellow]")
+        return
+    
+    table = Table(title=f"Requests ({since})")
+    for column in ("Profile/model", "Req", "Cached", "Err", "p50/p95/p99 ms", "TTFT p50", "Tok/s", "Tokens in/out", "In cached", "Cost"):
+        table.add_column(column, justify="left" if column == "Profile/model" else "right")
+    
+    for (profile, model), records in sorted(requests.items()):
+        sent = [r for r in records if not r.get("cached")]
+        ok = [r for r in sent if "error" not in r]
+        durations = sorted(r["duration"] for r in ok)
+        ttfts = sorted(r["ttft"] for r in ok if "ttft" in r)
+        prompt_tokens = sum(r.get("prompt_tokens", 0) for r in ok)
+        completion_tokens = sum(r.get("completion_tokens", 0) for r in ok)
+        # Share of input served from the provider's prompt cache, where reported
+        reported = [r for r in ok if "cached_tokens" in r]
+        reported_tokens = sum(r.get("prompt_tokens", 0) for r in reported)
+        timed = sum(r["duration"] for r in ok if "completion_tokens" in r)
+        cost = metrics.cost(model, prompt_tokens, completion_tokens)
+        latency = "/".join(f"{metrics.percentile(durations, pct) * 1000:.0f}" for pct in (50, 95, 99))
+        table.add_row(
+            f"{profile}/{model}",
+            str(len(records)),
+            str(len(records) - len(sent)),
+            str(len(sent) - len(ok)),
+            latency,
+            _ms(metrics.percentile(ttfts, 50)) if ttfts else "-",
+            f"{completion_tokens / timed:.1f}" if timed else "-",
+            f"{prompt_tokens}/{completion_tokens}",
+            f"{sum(r['cached_tokens'] for r in reported) / reported_tokens:.0%}" if reported_tokens else "-",
+            f"${cost:.4f}" if cost is not None else "-",
+        )
+    rprint(table)
+    
+    table = Table(title="Overhead")
+    for column in ("Span", "Count", "p50", "p95", "p99"):
+        table.add_column(column, justify="left" if column == "Span" else "right")
+    for name, durations in sorted(overhead.items()):
+        durations.sort()
+        table.add_row(
+            name,
+            str(len(durations)),
+            _ms(metrics.percentile(durations, 50)),
+            _ms(metrics.percentile(durations, 95)),
+            _ms(metrics.percentile(durations, 99)),
+        )
+    rprint(table)
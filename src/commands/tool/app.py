@@ -0,0 +1,16 @@
+import typer
+
+# Import command implementations
+from commands.tool.manage import add_command, list_command, remove_command
+
+app = typer.Typer(help="Manage local tools the model can call")
+
+@app.callback()
+def callback():
+    """Manage local tools the model can call"""
+    pass
+
+# Register commands
+app.command(name="add", help="Add a shell command or Python function as a tool of a profile")(add_command)
+app.command(name="list", help="List the tools of a profile")(list_command)
+app.command(name="remove", help="Remove a tool from a profile")(remove_command)
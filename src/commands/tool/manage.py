@@ -0,0 +1,143 @@
+import json
+import string
+from typing import List
+
+import typer
+from rich import print as rprint
+
+from core import config, profiles
+from default import DEFAULT_TOOL_TIMEOUT
+from settings import ToolConfig
+
+# Types a --param can declare
+PARAM_TYPES = ("string", "integer", "number", "boolean")
+
+
+def _parameters(params: List[str], command: str) -> dict:
+    """Build the JSON Schema of a tool's arguments
+
+    Each param is "name", "name:type" or "name:type:description". Without
+    params, the placeholders of the command become string arguments.
+    """
+    if not params and command:
+        params = [field for _, field, _, _ in string.Formatter().parse(command) if field]
+    properties = {}
+    for param in params:
+        name, _, rest = param.partition(":")
+        param_type, _, description = rest.partition(":")
+        param_type = param_type or "string"
+        if param_type not in PARAM_TYPES:
+            raise ValueError(f"Unknown type '{param_type}' of '{name}'. Use one of: {', '.join(PARAM_TYPES)}.")
+        properties[name] = {"type": param_type}
+        if description:
+            properties[name]["description"] = description
+    return {"type": "object", "properties": properties, "required": list(properties)}
+
+
+def add_command(
+    name: str = typer.Argument(..., help="Tool name, as the model will call it", show_default=False),
+    command: str = typer.Option(None, help="Shell command; {name} placeholders get the quoted arguments", show_default=False),
+    function: str = typer.Option(None, help="Python callable as 'package.module:function', called with the arguments", show_default=False),
+    description: str = typer.Option("", help="What the tool does, for the model"),
+    params: List[str] = typer.Option(None, "--param", help="Argument as name[:type[:description]] (repeatable; defaults to the command's placeholders)", show_default=False),
+    schema: str = typer.Option(None, help="JSON Schema of the arguments, instead of --param", show_default=False),
+    timeout: float = typer.Option(DEFAULT_TOOL_TIMEOUT, help="Seconds before a call is given up"),
+    cache: bool = typer.Option(True, "--cache/--no-cache", help="Reuse results of calls with the same arguments within a session"),
+    profile: str = typer.Option(None, help="Profile name (uses default profile if not specified)", show_default=False),
+):
+    if (command is None) == (function is None):
+        rprint("[red]Give the tool either a --command or a --function.[/red]")
+        raise typer.Exit(code=1)
+    if function is not None and ":" not in function:
+        rprint("[red]Give the function as 'package.module:function'.[/red]")
+        raise typer.Exit(code=1)
+    try:
+        parameters = json.loads(schema) if schema else _parameters(params or [], command)
+    except (ValueError, json.JSONDecodeError) as e:
+        rprint(f"[red]{str(e)}[/red]")
+        raise typer.Exit(code=1)
+
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    profile_obj, profile_name = profiles.find_profile(settings, profile)
+    if not profile_obj:
+        return
+
+    if profile_obj.get_tool(name):
+        overwrite = typer.confirm(f"Tool '{name}' already exists. Do you want to overwrite it?")
+        if not overwrite:
+            rprint("[yellow]Operation cancelled.[/yellow]")
+            return
+
+    tool = ToolConfig(
+        name=name,
+        description=description,
+        parameters=parameters,
+        command=command,
+        function=function,
+        timeout=timeout,
+        cache=cache,
+    )
+
+    def apply(settings):
+        latest = settings.get_profile(profile_name)
+        if not latest:
+            rprint(f"[red]Profile '{profile_name}' no longer exists.[/red]")
+            return False
+        latest.tools = [t for t in latest.tools if t.name != name] + [tool]
+
+    if config.update_settings(apply):
+        rprint(f"[green]Tool '{name}' added to profile '{profile_name}'.[/green]")
+        rprint("[dim]Let the model call it with 'termgpt chat single --tools' or 'termgpt chat interactive --tools'.[/dim]")
+
+
+def list_command(
+    profile: str = typer.Option(None, help="Profile name (uses default profile if not specified)", show_default=False),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    profile_obj, profile_name = profiles.find_profile(settings, profile)
+    if not profile_obj:
+        return
+
+    if not profile_obj.tools:
+        rprint(f"[yellow]No tools in profile '{profile_name}'. Add one with 'termgpt tool add'.[/yellow]")
+        return
+
+    rprint(f"[bold]Tools of profile '{profile_name}':[/bold]")
+    for tool in profile_obj.tools:
+        arguments = ", ".join(tool.parameters.get("properties", {}))
+        target = f"$ {tool.command}" if tool.command else tool.function
+        cached = "" if tool.cache else ", not cached"
+        rprint(f"  • {tool.name}({arguments}) - {target} - {tool.timeout:g}s timeout{cached}")
+
+
+def remove_command(
+    name: str = typer.Argument(..., help="Tool name", show_default=False),
+    profile: str = typer.Option(None, help="Profile name (uses default profile if not specified)", show_default=False),
+):
+    settings = config.ensure_config_exists()
+    if not settings:
+        return
+
+    profile_obj, profile_name = profiles.find_profile(settings, profile)
+    if not profile_obj:
+        return
+
+    if not profile_obj.get_tool(name):
+        rprint(f"[red]Tool '{name}' does not exist in profile '{profile_name}'.[/red]")
+        return
+
+    def apply(settings):
+        latest = settings.get_profile(profile_name)
+        if not latest:
+            rprint(f"[red]Profile '{profile_name}' no longer exists.[/red]")
+            return False
+        latest.tools = [t for t in latest.tools if t.name != name]
+
+    if config.update_settings(apply):
+        rprint(f"[green]Tool '{name}' removed from profile '{profile_name}'.[/green]")
@@ -0,0 +1,65 @@
+import typer
+from rich import print as rprint
+from rich.table import Table
+
+from core import config
+from core.budget import LIMITS, get_ledger, periods
+
+
+def _cost(value: float) -> str:
+    return f"${value:.4f}"
+
+
+def usage_command(
+    profile: str = typer.Option(None, help="Only show this profile", show_default=False),
+    month: str = typer.Option(None, help="Month to report as YYYY-MM (defaults to the current one)", show_default=False),
+):
+    if month and not (len(month) == 7 and month[4] == "-" and month.replace("-", "").isdigit()):
+        raise typer.BadParameter("Use a month like 2025-01")
+    current = periods()
+    month = month or current["month"]
+    ledger = get_ledger()
+    
+    rows = ledger.report(month, profile)
+    if not rows:
+        rprint(f"[yellow]No usage recorded for {month}.[/yellow]")
+        return
+    
+    today = {(r["profile"], r["model"]): r for r in ledger.report(current["day"], profile)} if month == current["month"] else {}
+    table = Table(title=f"Usage ({month})")
+    for column in ("Profile/model", "Req", "Tokens in/out", "Cost", "Today tokens", "Today cost"):
+        table.add_column(column, justify="left" if column == "Profile/model" else "right")
+    for row in rows:
+        day = today.get((row["profile"], row["model"]))
+        table.add_row(
+            f"{row['profile']}/{row['model']}",
+            str(row["requests"]),
+            f"{row['prompt_tokens']}/{row['completion_tokens']}",
+            _cost(row["cost"]),
+            str(day["prompt_tokens"] + day["completion_tokens"]) if day else "-",
+            _cost(day["cost"]) if day else "-",
+        )
+    rprint(table)
+    
+    # Budgets only apply to the current day and month
+    if month != current["month"]:
+        return
+    settings = config.get_settings()
+    table = Table(title="Budgets")
+    for column in ("Profile", "Limit", "Used", "Remaining"):
+        table.add_column(column, justify="left" if column in ("Profile", "Limit") else "right")
+    for profile_obj in settings.profiles:
+        if profile and profile_obj.name != profile:
+            continue
+        for field, kind, label in LIMITS:
+            limit = getattr(profile_obj.budget, field)
+            if limit is None:
+                continue
+            unit = field.split("_")[1]
+            used = ledger.totals(profile_obj.name, current[kind])[unit]
+            remaining = limit - used
+            fmt = _cost if unit == "cost" else lambda value: f"{int(value):,}"
+            color = "red" if remaining <= 0 else "green"
+            table.add_row(profile_obj.name, f"{label} ({fmt(limit)})", fmt(used), f"[{color}]{fmt(max(remaining, 0))}[/{color}]")
+    if table.row_count:
+        rprint(table)
@@ -0,0 +1,188 @@
+import csv
+import json
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, Iterator, Optional, Set, TextIO
+
+from core.openai_client import OpenAIClient
+
+
+def detect_format(path: str) -> str:
+    """Guess the input format from a file name
+
+    Args:
+        path: Input path, or "-" for stdin
+
+    Returns:
+        str: "csv" or "jsonl"
+    """
+    return "csv" if path.lower().endswith(".csv") else "jsonl"
+
+
+def read_prompts(source: TextIO, fmt: str = "jsonl") -> Iterator[Dict[str, Any]]:
+    """Read prompts from a JSONL or CSV stream, one at a time
+
+    JSONL lines may be objects with a "prompt" key (and optional "id" and
+    "system") or bare JSON strings. CSV files need a "prompt" column. Items
+    without an id get their zero-based position in the input. An item that
+    can't be used (invalid JSON, not an object, no prompt) comes out with
+    just its id and an "invalid" message, so one bad line fails on its own
+    instead of stopping the run.
+
+    Args:
+        source: Text stream to read from
+        fmt: "jsonl" or "csv"
+
+    Returns:
+        Iterator[Dict[str, Any]]: Prompt items
+    """
+    if fmt == "csv":
+        rows: Iterable[Any] = csv.DictReader(source)
+    else:
+        rows = (_parse_line(line) for line in source if line.strip())
+
+    for index, row in enumerate(rows):
+        if isinstance(row, str):
+            row = {"prompt": row}
+        if isinstance(row, ValueError):
+            yield {"id": index, "invalid": f"Input item {index} is not valid JSON: {row}"}
+            continue
+        if not isinstance(row, dict):
+            yield {"id": index, "invalid": f"Input item {index} is not an object or a string"}
+            continue
+        if row.get("id") in ("", None):
+            row["id"] = index
+        if not row.get("prompt"):
+            yield {"id": row["id"], "invalid": f"Input item {index} has no 'prompt'"}
+            continue
+        yield row
+
+
+def _parse_line(line: str) -> Any:
+    """Decode a JSONL line, returning the error instead of raising it"""
+    try:
+        return json.loads(line)
+    except ValueError as e:
+        return e
+
+
+def completed_ids(output: Path) -> Set[str]:
+    """Collect ids of successful results from a previous run
+
+    Args:
+        output: JSONL results file
+
+    Returns:
+        Set[str]: Ids (as strings) that do not need to run again
+    """
+    done: Set[str] = set()
+    if not output.exists():
+        return done
+
+    with open(output, "r") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A run killed mid-write can leave a partial last line
+                continue
+            if record.get("error") is None:
+                done.add(str(record.get("id")))
+    return done
+
+
+def run_prompt(
+    client: OpenAIClient,
+    item: Dict[str, Any],
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+) -> Dict[str, Any]:
+    """Send one prompt and build its result record
+
+    Args:
+        client: Shared OpenAI client
+        item: Prompt item
+        model: Model name to use, or None for default
+        system: System message used when the item has none
+
+    Returns:
+        Dict[str, Any]: Result record
+    """
+    if "invalid" in item:
+        return {"id": item["id"], "prompt": None, "model": None, "response": None, "error": item["invalid"]}
+
+    messages = []
+    system_message = item.get("system") or system
+    if system_message:
+        messages.append({"role": "system", "content": system_message})
+    messages.append({"role": "user", "content": item["prompt"]})
+
+    model_name = item.get("model") or model or client.profile.default_model
+    record: Dict[str, Any] = {"id": item["id"], "prompt": item["prompt"], "model": model_name}
+    try:
+        response = client.chat_completion(messages, model=model_name)
+        record["response"] = response.choices[0].message.content
+        record["usage"] = response.usage.model_dump() if response.usage else None
+        record["error"] = None
+    except Exception as e:
+        record["response"] = None
+        record["error"] = str(e)
+    return record
+
+
+def run_batch(
+    client: OpenAIClient,
+    items: Iterable[Dict[str, Any]],
+    on_result: Callable[[Dict[str, Any]], None],
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+    concurrency: int = 4,
+    ordered: bool = True,
+) -> None:
+    """Run prompts through one client with bounded concurrency
+
+    Items are pulled from the iterable only as slots free up, so inputs are
+    never loaded into memory all at once.
+
+    Args:
+        client: Shared OpenAI client
+        items: Prompt items
+        on_result: Called with each result record
+        model: Model name to use, or None for default
+        system: Default system message
+        concurrency: Maximum number of requests in flight
+        ordered: Emit results in input order instead of completion order
+    """
+    items = iter(items)
+    in_flight: Dict[Future, int] = {}
+    finished: Dict[int, Dict[str, Any]] = {}
+    next_index = 0
+    submitted = 0
+
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        def fill() -> None:
+            nonlocal submitted
+            # Bound buffered results too, so one slow item can't pile up the rest
+            while len(in_flight) + len(finished) < concurrency * 2:
+                item = next(items, None)
+                if item is None:
+                    return
+                future = executor.submit(run_prompt, client, item, model, system)
+                in_flight[future] = submitted
+                submitted += 1
+
+        fill()
+        while in_flight:
+            done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in done:
+                index = in_flight.pop(future)
+                if ordered:
+                    finished[index] = future.result()
+                else:
+                    on_result(future.result())
+
+            while next_index in finished:
+                on_result(finished.pop(next_index))
+                next_index += 1
+
+            fill()
@@ -0,0 +1,326 @@
+import asyncio
+import io
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+
+import httpx
+from rich.console import Console
+from rich.markdown import Markdown
+
+from core import budget, metrics
+from core.batch import run_batch
+from core.mock_server import mock_server_process
+from core.openai_client import AsyncOpenAIClient, OpenAIClient
+from settings import ProfileConfig, RetryConfig
+from utils.rendering import MarkdownStream
+
+SUITES = ("startup", "overhead", "render", "throughput")
+SRC_DIR = Path(__file__).resolve().parent.parent
+BENCH_MODEL = "gpt-4o"
+BENCH_MESSAGES = [{"role": "user", "content": "Benchmark request"}]
+# (name, CLI arguments) of the cold start runs
+STARTUP_COMMANDS = [("config_show", ["config", "show"]), ("config_list_profiles", ["config", "list-profiles"])]
+
+
+def bench_profile(base_url: str) -> ProfileConfig:
+    """Build a profile pointed at a mock server
+
+    Retries back off in milliseconds, so injected errors cost retries
+    rather than wall time.
+
+    Args:
+        base_url: Mock server base URL
+
+    Returns:
+        ProfileConfig: Benchmark profile
+    """
+    return ProfileConfig(
+        name="bench",
+        api_key="sk-bench-00000000000000000000",
+        base_url=base_url,
+        default_model=BENCH_MODEL,
+        retry=RetryConfig(max_retries=5, initial_delay=0.001, max_delay=0.01),
+    )
+
+
+def _ms(samples: List[float], prefix: str) -> Dict[str, float]:
+    """Summarize durations in seconds as p50/p95 milliseconds"""
+    samples = sorted(samples)
+    return {
+        f"{prefix}_p50_ms": round(metrics.percentile(samples, 50) * 1000, 3),
+        f"{prefix}_p95_ms": round(metrics.percentile(samples, 95) * 1000, 3),
+    }
+
+
+def _timed(fn: Callable[[], Any], runs: int) -> List[float]:
+    """Time runs of a function, in seconds"""
+    samples = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+
+def bench_startup(runs: int = 5) -> Dict[str, float]:
+    """Measure CLI cold start: wall time of fresh interpreters
+
+    Args:
+        runs: Runs per command (the median is reported)
+
+    Returns:
+        Dict[str, float]: Median milliseconds per command
+    """
+    config = {"default_profile": "bench", "profiles": [bench_profile("http://127.0.0.1:9/v1").model_dump()]}
+    results = {}
+    with tempfile.TemporaryDirectory() as home:
+        (Path(home) / ".termgpt").mkdir()
+        (Path(home) / ".termgpt" / "config.json").write_text(json.dumps(config))
+        for name, argv in STARTUP_COMMANDS:
+            command = [sys.executable, str(SRC_DIR / "main.py"), *argv]
+            env = dict(os.environ, HOME=home)
+            samples = _timed(lambda: subprocess.run(command, env=env, capture_output=True, check=True), runs)
+            results[f"{name}_ms"] = round(statistics.median(samples) * 1000, 1)
+    return results
+
+
+def bench_overhead(base_url: str, requests: int = 200) -> Dict[str, float]:
+    """Measure termgpt's per-request overhead over a bare HTTP call
+
+    Args:
+        base_url: Mock server base URL, ideally with no latency
+        requests: Requests per mode
+
+    Returns:
+        Dict[str, float]: p50/p95 of each mode and the p50 overhead
+    """
+    client = OpenAIClient(bench_profile(base_url))
+    params = client.build_params(BENCH_MESSAGES)
+    headers = {"Authorization": f"Bearer {client.profile.api_key}"}
+
+    with httpx.Client(base_url=base_url, headers=headers) as http:
+        raw = _timed(lambda: http.post("/chat/completions", json=params).json(), requests)
+    completion = _timed(lambda: client.chat_completion(BENCH_MESSAGES), requests)
+    stream = _timed(lambda: "".join(client.stream_completion(BENCH_MESSAGES)), requests)
+
+    results = {**_ms(raw, "raw"), **_ms(completion, "completion"), **_ms(stream, "stream")}
+    results["overhead_p50_ms"] = round(results["completion_p50_ms"] - results["raw_p50_ms"], 3)
+    return results
+
+
+def large_markdown(lines: int) -> str:
+    """Generate a Markdown document mixing prose, lists and code blocks
+
+    Args:
+        lines: Approximate number of lines
+
+    Returns:
+        str: Markdown text
+    """
+    sections = []
+    for index in range(max(lines // 20, 1)):
+        sections.append(f"## Section {index}\n\nSome **bold** text, `inline code` and a [link](https://example.com).\n")
+        sections.append("\n".join(f"- item {i} with *emphasis*" for i in range(5)) + "\n")
+        code = "\n".join(f"    result_{i} = compute({i}, value={i * 2})" for i in range(8))
+        sections.append(f"```python\ndef block_{index}():\n{code}\n```\n")
+    return "\n".join(sections)
+
+
+def bench_render(lines: int = 2000, runs: int = 3) -> Dict[str, float]:
+    """Measure rendering time of a large Markdown response
+
+    Args:
+        lines: Size of the response in lines
+        runs: Runs per mode (the median is reported)
+
+    Returns:
+        Dict[str, float]: Median milliseconds per mode
+    """
+    text = large_markdown(lines)
+
+    def console() -> Console:
+        return Console(file=io.StringIO(), force_terminal=True, width=100, color_system="truecolor")
+
+    def full() -> None:
+        console().print(Markdown(text))
+
+    def streamed() -> None:
+        with MarkdownStream(console()) as stream:
+            for start in range(0, len(text), 64):
+                stream.feed(text[start:start + 64])
+
+    return {
+        "lines": len(text.splitlines()),
+        "markdown_ms": round(statistics.median(_timed(full, runs)) * 1000, 1),
+        "stream_ms": round(statistics.median(_timed(streamed, runs)) * 1000, 1),
+    }
+
+
+async def _async_requests(profile: ProfileConfig, requests: int, concurrency: int) -> int:
+    """Send requests from one event loop, returning the number that failed"""
+    semaphore = asyncio.Semaphore(concurrency)
+    async with AsyncOpenAIClient(profile) as client:
+
+        async def one() -> None:
+            async with semaphore:
+                await client.chat_completion(BENCH_MESSAGES)
+
+        results = await asyncio.gather(*(one() for _ in range(requests)), return_exceptions=True)
+    return sum(isinstance(result, Exception) for result in results)
+
+
+def bench_throughput(base_url: str, requests: int = 200, concurrency: int = 16) -> Dict[str, float]:
+    """Measure requests per second of single, batch and async modes
+
+    Args:
+        base_url: Mock server base URL, ideally with some latency
+        requests: Requests per mode
+        concurrency: Requests in flight for the batch and async modes
+
+    Returns:
+        Dict[str, float]: Requests per second per mode, and failures
+    """
+    profile = bench_profile(base_url)
+    client = OpenAIClient(profile)
+    retries = metrics.counters().get("api.retries", 0)
+    errors = 0
+    results: Dict[str, float] = {}
+
+    started = time.perf_counter()
+    for _ in range(requests):
+        try:
+            client.chat_completion(BENCH_MESSAGES)
+        except Exception:
+            errors += 1
+    results["single_rps"] = round(requests / (time.perf_counter() - started), 1)
+
+    def count_error(record: Dict[str, Any]) -> None:
+        nonlocal errors
+        errors += record["error"] is not None
+
+    items = ({"id": i, "prompt": BENCH_MESSAGES[0]["content"]} for i in range(requests))
+    started = time.perf_counter()
+    run_batch(client, items, count_error, concurrency=concurrency)
+    results["batch_rps"] = round(requests / (time.perf_counter() - started), 1)
+
+    started = time.perf_counter()
+    errors += asyncio.run(_async_requests(profile, requests, concurrency))
+    results["async_rps"] = round(requests / (time.perf_counter() - started), 1)
+
+    results["errors"] = errors
+    results["retries"] = metrics.counters().get("api.retries", 0) - retries
+    return results
+
+
+def run_suites(
+    suites: List[str],
+    requests: int = 200,
+    concurrency: int = 16,
+    latency: float = 0.05,
+    chunk_size: int = 16,
+    error_rate: float = 0.0,
+    markdown_lines: int = 2000,
+    on_suite: Optional[Callable[[str], None]] = None,
+) -> Dict[str, Any]:
+    """Run benchmark suites against local mock servers
+
+    Args:
+        suites: Suite names, from SUITES
+        requests: Requests per mode in the overhead and throughput suites
+        concurrency: Requests in flight for concurrent modes
+        latency: Mock server latency for the throughput suite, in seconds
+        chunk_size: Characters per streamed chunk
+        error_rate: Share of mock requests that fail (and are retried)
+        markdown_lines: Size of the rendered document
+        on_suite: Called with each suite name before it runs
+
+    Returns:
+        Dict[str, Any]: {"meta": {...}, "results": {suite: {metric: value}}}
+    """
+    # Synthetic requests must not end up in `termgpt stats` or `termgpt usage`
+    metrics.set_recording(False)
+    scratch = tempfile.TemporaryDirectory(prefix="termgpt-bench-")
+    budget.set_ledger(budget.Ledger(Path(scratch.name) / "usage.sqlite3"))
+    options = {
+        "requests": requests,
+        "concurrency": concurrency,
+        "latency": latency,
+        "chunk_size": chunk_size,
+        "error_rate": error_rate,
+        "markdown_lines": markdown_lines,
+    }
+    results: Dict[str, Dict[str, float]] = {}
+    try:
+        for suite in suites:
+            if on_suite:
+                on_suite(suite)
+            if suite == "startup":
+                results[suite] = bench_startup()
+            elif suite == "overhead":
+                # No latency, so the mock server's time is just its own overhead
+                with mock_server_process(chunk_size=chunk_size, error_rate=error_rate) as url:
+                    results[suite] = bench_overhead(url, requests)
+            elif suite == "render":
+                results[suite] = bench_render(markdown_lines)
+            elif suite == "throughput":
+                with mock_server_process(latency=latency, chunk_size=chunk_size, error_rate=error_rate) as url:
+                    results[suite] = bench_throughput(url, requests, concurrency)
+            else:
+                raise ValueError(f"Unknown suite '{suite}'. Use one of: {', '.join(SUITES)}")
+    finally:
+        budget.set_ledger(None)
+        scratch.cleanup()
+
+    return {"meta": _meta(options), "results": results}
+
+
+def _meta(options: Dict[str, Any]) -> Dict[str, Any]:
+    """Describe the run, so results from different versions can be told apart"""
+    try:
+        from importlib.metadata import version
+
+        termgpt_version = version("termgpt")
+    except Exception:
+        termgpt_version = "unknown"
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=SRC_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "version": termgpt_version,
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": time.time(),
+        "options": options,
+    }
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Compare two benchmark results metric by metric
+
+    Args:
+        current: Result of run_suites
+        baseline: Earlier result of run_suites, e.g. loaded from JSON
+
+    Returns:
+        List[Dict[str, Any]]: Rows with suite, metric, baseline, current and change in percent
+    """
+    rows = []
+    for suite, values in current["results"].items():
+        before = baseline.get("results", {}).get(suite, {})
+        for metric, value in values.items():
+            old = before.get(metric)
+            change = (value - old) / old * 100 if isinstance(old, (int, float)) and old else None
+            rows.append({"suite": suite, "metric": metric, "baseline": old, "current": value, "change": change})
+    return rows
@@ -0,0 +1,305 @@
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from core import metrics
+from default import BUDGET_RESERVATION_TTL, USAGE_LEDGER_FILE
+from settings import ProfileConfig
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS ledger (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    profile TEXT NOT NULL,
+    model TEXT NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cost REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS totals (
+    profile TEXT NOT NULL,
+    period TEXT NOT NULL,
+    model TEXT NOT NULL,
+    requests INTEGER NOT NULL,
+    prompt_tokens INTEGER NOT NULL,
+    completion_tokens INTEGER NOT NULL,
+    cost REAL NOT NULL,
+    PRIMARY KEY (profile, period, model)
+);
+CREATE TABLE IF NOT EXISTS reservations (
+    id INTEGER PRIMARY KEY,
+    ts REAL NOT NULL,
+    profile TEXT NOT NULL,
+    model TEXT NOT NULL,
+    tokens INTEGER NOT NULL,
+    cost REAL NOT NULL
+);
+"""
+
+# (budget field, period kind, label) of every limit
+LIMITS = (
+    ("daily_tokens", "day", "Daily token"),
+    ("monthly_tokens", "month", "Monthly token"),
+    ("daily_cost", "day", "Daily cost"),
+    ("monthly_cost", "month", "Monthly cost"),
+)
+
+
+class BudgetExceededError(RuntimeError):
+    """Raised before a request that would go over a profile's budget"""
+
+
+def periods(ts: Optional[float] = None) -> Dict[str, str]:
+    """Get the local calendar day and month of a time
+
+    Args:
+        ts: Unix time, or None for now
+
+    Returns:
+        Dict[str, str]: {"day": "YYYY-MM-DD", "month": "YYYY-MM"}
+    """
+    local = time.localtime(ts)
+    return {"day": time.strftime("%Y-%m-%d", local), "month": time.strftime("%Y-%m", local)}
+
+
+def has_limits(profile: ProfileConfig) -> bool:
+    """Whether a profile sets any budget limit"""
+    return any(getattr(profile.budget, field) is not None for field, _, _ in LIMITS)
+
+
+class Ledger:
+    """Append-only usage log with running totals per profile, period and model
+
+    Every request is appended to the ledger table and added to the totals
+    of its day and month in the same transaction, so checking a budget
+    reads a couple of rows instead of summing the history. A request of a
+    profile with limits first reserves its estimated use, in the same
+    transaction as the check, so concurrent requests (other threads,
+    processes or the daemon) can't each pass on the same remaining budget;
+    recording the usage settles the reservation.
+    """
+
+    def __init__(self, path: Path = USAGE_LEDGER_FILE):
+        """Initialize ledger
+
+        Args:
+            path: SQLite database file
+        """
+        self.path = path
+        self._local = threading.local()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Connection for the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def record(
+        self,
+        profile: str,
+        model: str,
+        prompt_tokens: int,
+        completion_tokens: int,
+        reserved: Optional[int] = None,
+    ) -> None:
+        """Record the usage of a request
+
+        Args:
+            profile: Profile name
+            model: Model name
+            prompt_tokens: Input tokens
+            completion_tokens: Output tokens
+            reserved: Tokens the request reserved, to settle its reservation
+        """
+        now = time.time()
+        # Models without a known price count as free
+        cost = metrics.cost(model, prompt_tokens, completion_tokens) or 0.0
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute(
+                "INSERT INTO ledger (ts, profile, model, prompt_tokens, completion_tokens, cost) VALUES (?, ?, ?, ?, ?, ?)",
+                (now, profile, model, prompt_tokens, completion_tokens, cost),
+            )
+            db.executemany(
+                "INSERT INTO totals (profile, period, model, requests, prompt_tokens, completion_tokens, cost) "
+                "VALUES (?, ?, ?, 1, ?, ?, ?) ON CONFLICT(profile, period, model) DO UPDATE SET "
+                "requests = requests + 1, prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                "completion_tokens = completion_tokens + excluded.completion_tokens, cost = cost + excluded.cost",
+                [(profile, period, model, prompt_tokens, completion_tokens, cost) for period in periods(now).values()],
+            )
+            if reserved is not None:
+                self._settle(db, profile, model, reserved)
+            db.execute("COMMIT")
+        except BaseException:
+            # Also on Ctrl+C, so the connection is not left inside a transaction
+            db.execute("ROLLBACK")
+            raise
+
+    def totals(self, profile: str, period: str) -> Dict[str, float]:
+        """Get a profile's usage in a period, over all models
+
+        Args:
+            profile: Profile name
+            period: Day ("YYYY-MM-DD") or month ("YYYY-MM")
+
+        Returns:
+            Dict[str, float]: requests, tokens and cost
+        """
+        requests, prompt_tokens, completion_tokens, cost = self.db.execute(
+            "SELECT COALESCE(SUM(requests), 0), COALESCE(SUM(prompt_tokens), 0), "
+            "COALESCE(SUM(completion_tokens), 0), COALESCE(SUM(cost), 0) "
+            "FROM totals WHERE profile = ? AND period = ?",
+            (profile, period),
+        ).fetchone()
+        return {"requests": requests, "tokens": prompt_tokens + completion_tokens, "cost": cost}
+
+    def report(self, period: str, profile: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get usage in a period per profile and model
+
+        Args:
+            period: Day ("YYYY-MM-DD") or month ("YYYY-MM")
+            profile: Profile name, or None for all profiles
+
+        Returns:
+            List[Dict[str, Any]]: Rows with profile, model, requests, token counts and cost
+        """
+        query = "SELECT profile, model, requests, prompt_tokens, completion_tokens, cost FROM totals WHERE period = ?"
+        args: Tuple[Any, ...] = (period,)
+        if profile:
+            query += " AND profile = ?"
+            args += (profile,)
+        columns = ("profile", "model", "requests", "prompt_tokens", "completion_tokens", "cost")
+        return [dict(zip(columns, row)) for row in self.db.execute(query + " ORDER BY profile, model", args)]
+
+    def reserve(self, profile: ProfileConfig, model: str, prompt_tokens: int, completion_tokens: int) -> None:
+        """Hold the estimated use of a request against the profile's budget
+
+        Checks the limits against the recorded usage plus the reservations of
+        requests still running, and reserves this request's estimate in the
+        same transaction. Settle the reservation with ``record(...,
+        reserved=...)``, or give it back with ``release`` if nothing was used.
+
+        Args:
+            profile: Profile with the budget
+            model: Model name
+            prompt_tokens: Estimated input tokens
+            completion_tokens: Estimated (maximum) output tokens
+
+        Raises:
+            BudgetExceededError: If the request could go over a limit
+        """
+        if not has_limits(profile):
+            return
+        estimate = {
+            "tokens": prompt_tokens + completion_tokens,
+            "cost": metrics.cost(model, prompt_tokens, completion_tokens) or 0.0,
+        }
+        now = time.time()
+        current = periods(now)
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            db.execute("DELETE FROM reservations WHERE ts < ?", (now - BUDGET_RESERVATION_TTL,))
+            held_tokens, held_cost = db.execute(
+                "SELECT COALESCE(SUM(tokens), 0), COALESCE(SUM(cost), 0) FROM reservations WHERE profile = ?",
+                (profile.name,),
+            ).fetchone()
+            used: Dict[str, Dict[str, float]] = {}
+            for field, kind, label in LIMITS:
+                limit = getattr(profile.budget, field)
+                if limit is None:
+                    continue
+                if kind not in used:
+                    used[kind] = self.totals(profile.name, current[kind])
+                    used[kind]["tokens"] += held_tokens
+                    used[kind]["cost"] += held_cost
+                unit = field.split("_")[1]
+                if used[kind][unit] + estimate[unit] > limit:
+                    spent = _format(unit, used[kind][unit])
+                    raise BudgetExceededError(
+                        f"{label} budget of profile '{profile.name}' would be exceeded: "
+                        f"{spent} used or reserved of {_format(unit, limit)}, this request may need up to "
+                        f"{_format(unit, estimate[unit])}. See 'termgpt usage'."
+                    )
+            db.execute(
+                "INSERT INTO reservations (ts, profile, model, tokens, cost) VALUES (?, ?, ?, ?, ?)",
+                (now, profile.name, model, estimate["tokens"], estimate["cost"]),
+            )
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    def release(self, profile: ProfileConfig, model: str, tokens: int) -> None:
+        """Give back the reservation of a request that used nothing
+
+        Args:
+            profile: Profile the request reserved budget of
+            model: Model name
+            tokens: Tokens the request reserved
+        """
+        if not has_limits(profile):
+            return
+        db = self.db
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            self._settle(db, profile.name, model, tokens)
+            db.execute("COMMIT")
+        except BaseException:
+            db.execute("ROLLBACK")
+            raise
+
+    @staticmethod
+    def _settle(db: sqlite3.Connection, profile: str, model: str, tokens: int) -> None:
+        """Delete one reservation of a request, if it has one"""
+        # Requests of the same size are interchangeable, so any one of them will do
+        db.execute(
+            "DELETE FROM reservations WHERE id = (SELECT id FROM reservations "
+            "WHERE profile = ? AND model = ? AND tokens = ? ORDER BY id LIMIT 1)",
+            (profile, model, tokens),
+        )
+
+
+def _format(unit: str, value: float) -> str:
+    return f"${value:.4f}" if unit == "cost" else f"{int(value):,} tokens"
+
+
+_ledger: Optional[Ledger] = None
+_ledger_lock = threading.Lock()
+
+
+def get_ledger() -> Ledger:
+    """Get the process-wide usage ledger
+
+    Returns:
+        Ledger: Ledger shared by every client
+    """
+    global _ledger
+    with _ledger_lock:
+        if _ledger is None:
+            _ledger = Ledger()
+        return _ledger
+
+
+def set_ledger(ledger: Optional[Ledger]) -> None:
+    """Replace the process-wide usage ledger
+
+    Benchmarks point it at a scratch file, so synthetic requests don't
+    count against real budgets.
+
+    Args:
+        ledger: Ledger to use, or None for the default one
+    """
+    global _ledger
+    with _ledger_lock:
+        _ledger = ledger
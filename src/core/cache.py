@@ -0,0 +1,252 @@
+import hashlib
+import json
+import random
+import sqlite3
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+from core.messages import digest
+from default import CACHE_FILE
+from settings import CacheConfig
+
+# Request parameters that change the transport but not the answer
+TRANSPORT_PARAMS = ("stream", "stream_options")
+
+# Fraction of writes that trigger eviction, so writes stay cheap
+PRUNE_PROBABILITY = 0.01
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    key TEXT PRIMARY KEY,
+    model TEXT NOT NULL,
+    response TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    created REAL NOT NULL,
+    accessed REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+
+def make_key(params: Dict[str, Any], scope: str = "") -> str:
+    """Build a cache key from chat completion request parameters
+
+    The key is a hash of the scope, the canonical JSON of the model name
+    and sampling parameters, and the digest of each message, so equal
+    requests map to the same entry regardless of dict ordering or
+    streaming. Earlier turns keep their digests, so only new messages are
+    serialized.
+
+    Args:
+        params: Request parameters as built by OpenAIClient.build_params
+        scope: Endpoint the request goes to (see BaseClient.cache_scope), so
+            profiles of different servers don't share answers
+
+    Returns:
+        str: Hex digest
+    """
+    canonical = {k: v for k, v in params.items() if k not in TRANSPORT_PARAMS and k != "messages"}
+    payload = json.dumps(canonical, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    key = hashlib.sha256(scope.encode("utf-8") + b"\0")
+    key.update(payload.encode("utf-8"))
+    for message in params.get("messages", ()):
+        key.update(digest(message))
+    return key.hexdigest()
+
+
+class ResponseCache:
+    """On-disk LRU/TTL cache of chat completion responses backed by SQLite"""
+
+    def __init__(
+        self,
+        path: Path = CACHE_FILE,
+        ttl_seconds: int = 0,
+        max_entries: int = 0,
+        max_size_bytes: int = 0,
+    ):
+        """Initialize cache
+
+        Args:
+            path: SQLite database file
+            ttl_seconds: Entry lifetime, or 0 for no expiry
+            max_entries: Maximum number of entries, or 0 for no limit
+            max_size_bytes: Maximum total response size, or 0 for no limit
+        """
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.max_size_bytes = max_size_bytes
+        self._local = threading.local()
+
+    @classmethod
+    def from_config(cls, cache_config: CacheConfig) -> "ResponseCache":
+        """Create cache from settings
+
+        Args:
+            cache_config: Cache settings
+
+        Returns:
+            ResponseCache: Cache instance
+        """
+        return cls(
+            ttl_seconds=cache_config.ttl_seconds,
+            max_entries=cache_config.max_entries,
+            max_size_bytes=cache_config.max_size_mb * 1024 * 1024,
+        )
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Connection for the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str) -> None:
+        self.db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    def get(self, key: str) -> Optional[str]:
+        """Look up a cached response
+
+        Args:
+            key: Cache key
+
+        Returns:
+            Optional[str]: Response JSON, or None on miss or expiry
+        """
+        now = time.time()
+        row = self.db.execute("SELECT response, created FROM entries WHERE key = ?", (key,)).fetchone()
+        if row and self.ttl_seconds and now - row[1] > self.ttl_seconds:
+            self.db.execute("DELETE FROM entries WHERE key = ?", (key,))
+            row = None
+
+        if row is None:
+            self._count("misses")
+            return None
+
+        self.db.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, key))
+        self._count("hits")
+        return row[0]
+
+    def set(self, key: str, model: str, response: str) -> None:
+        """Store a response
+
+        Args:
+            key: Cache key
+            model: Model name, kept for stats
+            response: Response JSON
+        """
+        now = time.time()
+        self.db.execute(
+            "INSERT OR REPLACE INTO entries (key, model, response, size, created, accessed) "
+            "VALUES (?, ?, ?, ?, ?, ?)",
+            (key, model, response, len(response.encode("utf-8")), now, now),
+        )
+        if random.random() < PRUNE_PROBABILITY:
+            self.prune()
+
+    def prune(self) -> int:
+        """Evict expired entries, then least recently used ones over the limits
+
+        Returns:
+            int: Number of entries removed
+        """
+        db = self.db
+        removed = 0
+        db.execute("BEGIN IMMEDIATE")
+        try:
+            if self.ttl_seconds:
+                cursor = db.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl_seconds,))
+                removed += cursor.rowcount
+
+            if self.max_entries:
+                cursor = db.execute(
+                    "DELETE FROM entries WHERE key IN ("
+                    "SELECT key FROM entries ORDER BY accessed DESC LIMIT -1 OFFSET ?)",
+                    (self.max_entries,),
+                )
+                removed += cursor.rowcount
+
+            if self.max_size_bytes:
+                total = db.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+                if total > self.max_size_bytes:
+                    excess = total - self.max_size_bytes
+                    evict = []
+                    for key, size in db.execute("SELECT key, size FROM entries ORDER BY accessed"):
+                        evict.append((key,))
+                        excess -= size
+                        if excess <= 0:
+                            break
+                    db.executemany("DELETE FROM entries WHERE key = ?", evict)
+                    removed += len(evict)
+            db.execute("COMMIT")
+        except Exception:
+            db.execute("ROLLBACK")
+            raise
+        return removed
+
+    def clear(self) -> int:
+        """Remove all entries and reset counters
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = self.db.execute("DELETE FROM entries").rowcount
+        self.db.execute("DELETE FROM counters")
+        self.db.execute("VACUUM")
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize cache contents and hit rate
+
+        Returns:
+            Dict[str, Any]: Entry count, sizes, hits and misses
+        """
+        entries, size, oldest, newest = self.db.execute(
+            "SELECT COUNT(*), COALESCE(SUM(size), 0), MIN(created), MAX(created) FROM entries"
+        ).fetchone()
+        counters = dict(self.db.execute("SELECT name, value FROM counters").fetchall())
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "size_bytes": size,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "oldest": oldest,
+            "newest": newest,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+def open_cache(cache_config: CacheConfig, use_cache: Optional[bool] = None) -> Optional[ResponseCache]:
+    """Open the response cache if enabled for this command or in settings
+
+    Args:
+        cache_config: Cache settings
+        use_cache: Whether the command asks for caching (--cache/--no-cache),
+            or None to go by cache.enabled
+
+    Returns:
+        Optional[ResponseCache]: Cache, or None if disabled
+    """
+    if not (cache_config.enabled if use_cache is None else use_cache):
+        return None
+    return ResponseCache.from_config(cache_config)
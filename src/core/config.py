@@ -1,32 +1,153 @@
+import copy
+import hashlib
 import json
-from typing import Optional
+import os
+import pickle
+import tempfile
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterator, Optional
 
+try:
+    import fcntl
+except ImportError:  # Windows: writes are still atomic, just not serialized
+    fcntl = None
+
+import pydantic
 from rich import print as rprint
+from core import metrics
+import default as default_module
+import settings as settings_module
 from settings import AppSettings
-from default import CONFIG_FILE, CONFIG_DIR
+from default import CONFIG_FILE, CONFIG_DIR, CONFIG_LOCK_FILE, CONFIG_SNAPSHOT_FILE
+
+# Last loaded snapshot: {"mtime_ns", "size", "sha256", "schema", "settings"}
+_snapshot: Optional[Dict[str, Any]] = None
+
+def _schema_version() -> str:
+    """Identify the settings models and their defaults, so snapshots of older ones are ignored"""
+    sources = (settings_module.__file__, default_module.__file__)
+    return ":".join([pydantic.VERSION] + [str(Path(source).stat().st_mtime_ns) for source in sources])
+
+def _read_snapshot() -> Optional[Dict[str, Any]]:
+    """Read the on-disk snapshot, or None if missing or unreadable"""
+    try:
+        with open(CONFIG_SNAPSHOT_FILE, "rb") as f:
+            snapshot = pickle.load(f)
+        return snapshot if snapshot.get("schema") == _schema_version() else None
+    except Exception:
+        return None
+
+def _write_snapshot(snapshot: Dict[str, Any]) -> None:
+    """Atomically write the on-disk snapshot, readable only by the user
+    
+    API keys are left out, so the config file stays their only copy on
+    disk; loading the snapshot takes them from the config file again.
+    """
+    # One deepcopy, so the name indexes point at the copied profiles
+    settings = copy.deepcopy(snapshot["settings"])
+    for profile in settings.profiles:
+        profile.api_key = None
+    tmp = CONFIG_SNAPSHOT_FILE.with_name(f"{CONFIG_SNAPSHOT_FILE.name}.{os.getpid()}.tmp")
+    try:
+        fd = os.open(tmp, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, "wb") as f:
+            pickle.dump({**snapshot, "settings": settings}, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp, CONFIG_SNAPSHOT_FILE)
+    except OSError:
+        # Only a speed-up; the next load will parse the config again
+        tmp.unlink(missing_ok=True)
+
+def _restore_keys(settings: AppSettings, data: bytes) -> None:
+    """Put the API keys of the config file into settings read from the on-disk snapshot"""
+    keys = {profile.get("name"): profile.get("api_key") for profile in json.loads(data).get("profiles", [])}
+    for profile in settings.profiles:
+        profile.api_key = keys.get(profile.name)
+
+def _same_file(snapshot: Dict[str, Any], stat: os.stat_result) -> bool:
+    """Whether a snapshot was taken of the file as it is now"""
+    return snapshot["mtime_ns"] == stat.st_mtime_ns and snapshot["size"] == stat.st_size
+
+def _load_snapshot(stat: os.stat_result) -> AppSettings:
+    """Load settings for the config file, reusing a snapshot if it's unchanged
+    
+    A snapshot whose mtime and size still match is used without
+    validating the file (the on-disk one only reads its API keys).
+    Otherwise the file is hashed, and only validated if its content
+    changed.
+    
+    Args:
+        stat: Current stat of the config file
+        
+    Returns:
+        AppSettings: Validated and indexed settings
+    """
+    global _snapshot
+    candidates = [_snapshot] if _snapshot else []
+    if not (candidates and _same_file(candidates[0], stat)):
+        on_disk = _read_snapshot()
+        if on_disk:
+            candidates.append(on_disk)
+    for snapshot in candidates:
+        if _same_file(snapshot, stat):
+            metrics.increment("config.snapshot_hits")
+            if snapshot is not _snapshot:
+                _restore_keys(snapshot["settings"], CONFIG_FILE.read_bytes())
+                _snapshot = snapshot
+            return snapshot["settings"]
+
+    data = CONFIG_FILE.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()
+    snapshot = next((s for s in candidates if s["sha256"] == digest), None)
+    if snapshot:
+        # Touched but not changed
+        metrics.increment("config.snapshot_hits")
+        settings = snapshot["settings"]
+        if snapshot is not _snapshot:
+            _restore_keys(settings, data)
+    else:
+        settings = AppSettings.model_validate(json.loads(data))
+        settings.build_index()
+
+    _snapshot = {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "sha256": digest,
+        "schema": _schema_version(),
+        "settings": settings,
+    }
+    _write_snapshot(_snapshot)
+    return settings
 
 def get_settings() -> AppSettings:
     """Get application settings, creating default if not exists
     
+    Settings are cached per config file content, so repeated calls return
+    the same object, shared by every caller in the process. Callers must
+    not mutate it; change the config with update_settings, which works on
+    a fresh copy.
+    
     Returns:
         AppSettings: Application settings
     """
-    if not CONFIG_FILE.exists():
-        return AppSettings()
-    
-    try:
-        with open(CONFIG_FILE, "r") as f:
-            config_data = json.load(f)
-        return AppSettings.model_validate(config_data)
-    except Exception as e:
-        rprint(f"[red]Error reading configuration: {e}[/red]")
-        return AppSettings()
+    with metrics.span("config.load"):
+        try:
+            stat = CONFIG_FILE.stat()
+        except FileNotFoundError:
+            return AppSettings()
+        
+        try:
+            return _load_snapshot(stat)
+        except Exception as e:
+            rprint(f"[red]Error reading configuration: {e}[/red]")
+            return AppSettings()
 
 def ensure_config_exists() -> Optional[AppSettings]:
     """Ensure config file exists and return settings, or None if missing
     
     Returns:
-        Optional[AppSettings]: Settings object or None if config doesn't exist
+        Optional[AppSettings]: Shared, read-only settings (see get_settings),
+            or None if config doesn't exist
     """
     if not CONFIG_FILE.exists():
         rprint("[yellow]Configuration file not found. Run 'termgpt config init' first.[/yellow]")
@@ -34,9 +155,51 @@ def ensure_config_exists() -> Optional[AppSettings]:
     
     return get_settings()
 
+@contextmanager
+def _write_lock() -> Iterator[None]:
+    """Hold the advisory config write lock
+    
+    Only writers take it. Readers never block, since every write replaces
+    the file atomically.
+    """
+    CONFIG_DIR.mkdir(exist_ok=True)
+    with open(CONFIG_LOCK_FILE, "a") as lock_file:
+        if fcntl:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+def _write_atomic(settings: AppSettings) -> None:
+    """Write settings to a temp file and rename it over the config file
+    
+    Args:
+        settings: Application settings to write
+    """
+    try:
+        mode = CONFIG_FILE.stat().st_mode & 0o777
+    except FileNotFoundError:
+        mode = 0o600
+    fd, tmp = tempfile.mkstemp(dir=CONFIG_DIR, prefix=f"{CONFIG_FILE.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w") as f:
+            f.write(settings.model_dump_json(indent=2))
+            f.flush()
+            os.fsync(f.fileno())
+        os.chmod(tmp, mode)
+        os.replace(tmp, CONFIG_FILE)
+    except BaseException:
+        Path(tmp).unlink(missing_ok=True)
+        raise
+
 def save_settings(settings: AppSettings) -> bool:
     """Save settings to config file
     
+    The whole document is replaced, so prefer update_settings when other
+    processes may be changing the config too.
+    
     Args:
         settings: Application settings to save
         
@@ -44,8 +207,36 @@ def save_settings(settings: AppSettings) -> bool:
         bool: Success
     """
     try:
-        CONFIG_DIR.mkdir(exist_ok=True)
-        CONFIG_FILE.write_text(settings.model_dump_json(indent=2))
+        with _write_lock():
+            _write_atomic(settings)
+        return True
+    except Exception as e:
+        rprint(f"[red]Error saving configuration: {e}[/red]")
+        return False
+
+def update_settings(mutate: Callable[[AppSettings], Optional[bool]]) -> bool:
+    """Apply a change to the config as a read-modify-write transaction
+    
+    The config is re-read from disk under the write lock, so concurrent
+    updates from other processes are kept rather than overwritten.
+    
+    Args:
+        mutate: Called with fresh settings to change in place; returning
+            False aborts without writing
+        
+    Returns:
+        bool: Whether the change was saved
+    """
+    try:
+        with _write_lock():
+            if CONFIG_FILE.exists():
+                # Fresh copy, the cached snapshot is shared and read-only
+                settings = AppSettings.model_validate_json(CONFIG_FILE.read_bytes())
+            else:
+                settings = AppSettings()
+            if mutate(settings) is False:
+                return False
+            _write_atomic(settings)
         return True
     except Exception as e:
         rprint(f"[red]Error saving configuration: {e}[/red]")
@@ -1,24 +1,280 @@
-from typing import Dict, List, Optional
+import asyncio
+import time
+from typing import TYPE_CHECKING, Any, AsyncIterator, Callable, Dict, Iterator, List, Optional, Tuple
 from rich import print as rprint
 from rich.markdown import Markdown
 
-from core.openai_client import OpenAIClient
-from settings import ProfileConfig
+from core import tokens
+from core.history import SessionLog
+from core.messages import Message, SpillFile
+from core.openai_client import AsyncOpenAIClient, BaseClient, OpenAIClient
+from default import SPILL_MIN_CHARS, TOOL_MAX_ROUNDS
+from settings import ModelConfig, ProfileConfig, PromptConfig
 
+if TYPE_CHECKING:
+    # NumPy is only loaded when the semantic cache is used
+    from core.semantic_cache import SemanticCache
+    from core.tools import ToolRegistry
 
-class Conversation:
-    """Manages a conversation with an AI model"""
+SUMMARY_PROMPT = (
+    "Summarize the following earlier part of a conversation in a few short "
+    "paragraphs. Keep names, decisions, code identifiers and open questions."
+)
+
+
+class ContextWindow:
+    """Fits conversation messages into a model's token budget
+    
+    Token counts are cached per message (on the message itself for
+    ``Message``), so each turn only tokenizes the messages added since the
+    last one.
+    """
+    
+    def __init__(self, summarize: Optional[Callable[[List[Dict[str, str]], str], str]] = None):
+        """Initialize context window
+        
+        Args:
+            summarize: Called with evicted messages and the model name to
+                produce a summary, for the "summarize" strategy
+        """
+        self.summarize = summarize
+        self.summary: Optional[Dict[str, str]] = None
+        self.summarized = 0
+        self.last_evicted = 0
+        self._counts: Dict[Tuple[str, str], int] = {}
+    
+    def count(self, message: Dict[str, str], model: str) -> int:
+        """Count tokens of a message, using the cache
+        
+        Args:
+            message: Message with role and content
+            model: Model name
+            
+        Returns:
+            int: Token count
+        """
+        if isinstance(message, Message):
+            return message.tokens(model)
+        key = (model, message["content"])
+        count = self._counts.get(key)
+        if count is None:
+            count = self._counts[key] = tokens.count_message_tokens(message, model)
+        return count
     
-    def __init__(self, profile: ProfileConfig):
+    def budget(self, model_config: ModelConfig) -> int:
+        """Get the prompt token budget, leaving room for the completion
+        
+        Args:
+            model_config: Model configuration
+            
+        Returns:
+            int: Maximum prompt tokens
+        """
+        window = model_config.context_window or tokens.context_window(model_config.name)
+        return max(window - model_config.max_tokens, 0)
+    
+    def fit(self, messages: List[Dict[str, str]], model_config: ModelConfig) -> List[Dict[str, str]]:
+        """Select the messages to send so they fit the budget
+        
+        Pinned system messages stay first and unchanged, ahead of the
+        summary and the kept turns, so consecutive requests share a
+        byte-identical prefix the provider can serve from its prompt cache.
+        Spilled messages that are sent are read back into copies; the
+        conversation keeps them on disk.
+        
+        Args:
+            messages: Full conversation
+            model_config: Model configuration with budget and strategy
+            
+        Returns:
+            List[Dict[str, str]]: Messages to send
+        """
+        model = model_config.name
+        budget = self.budget(model_config)
+        strategy = model_config.context_strategy
+        self.last_evicted = 0
+        
+        if self.summarize:
+            evicted, upto = self.pending_summary(messages, model_config)
+            if evicted:
+                self.add_summary(self.summarize(evicted, model), upto)
+        
+        if sum(self.count(m, model) for m in messages) <= budget:
+            return self._loaded(messages)
+        
+        pinned, turns = self._split(messages, strategy)
+        start = self._first_kept(pinned, turns, budget, model)
+        if strategy == "summarize" and self.summary:
+            pinned = pinned + [self.summary]
+            start = max(start, self._first_kept(pinned, turns, budget, model))
+        
+        self.last_evicted = start
+        return self._loaded(pinned + turns[start:])
+    
+    def pending_summary(
+        self,
+        messages: List[Dict[str, str]],
+        model_config: ModelConfig,
+    ) -> Tuple[List[Dict[str, str]], int]:
+        """Get turns that no longer fit and aren't in the summary yet
+        
+        Args:
+            messages: Full conversation
+            model_config: Model configuration with budget and strategy
+            
+        Returns:
+            Tuple[List[Dict[str, str]], int]: Messages to summarize (the
+                current summary first, if any) and the index of the first
+                turn left out of them, or ([], 0) if there's nothing to do
+        """
+        model = model_config.name
+        budget = self.budget(model_config)
+        if model_config.context_strategy != "summarize":
+            return [], 0
+        if sum(self.count(m, model) for m in messages) <= budget:
+            return [], 0
+        
+        pinned, turns = self._split(messages, "summarize")
+        start = self._first_kept(pinned, turns, budget, model)
+        if start <= self.summarized:
+            return [], 0
+        # Fold newly evicted turns into the running summary
+        evicted = turns[self.summarized:start]
+        if self.summary:
+            evicted = [self.summary] + evicted
+        return evicted, start
+    
+    def add_summary(self, text: str, upto: int) -> None:
+        """Replace the running summary
+        
+        Args:
+            text: Summary of the turns before upto
+            upto: Index of the first turn not covered by the summary
+        """
+        self.summary = {"role": "system", "content": f"Summary of the earlier conversation:\n{text}"}
+        self.summarized = upto
+    
+    def _loaded(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Get messages with spilled bodies read back, the same list if none are"""
+        if not any(isinstance(m, Message) and m.spilled for m in messages):
+            return messages
+        return [m.loaded() if isinstance(m, Message) else m for m in messages]
+    
+    def _split(self, messages: List[Dict[str, str]], strategy: str) -> Tuple[List[Dict[str, str]], List[Dict[str, str]]]:
+        """Split messages into pinned ones and evictable turns"""
+        if strategy == "sliding":
+            return [], messages
+        pinned = [m for m in messages if m["role"] == "system"]
+        turns = [m for m in messages if m["role"] != "system"]
+        return pinned, turns
+    
+    def _first_kept(self, pinned: List[Dict[str, str]], turns: List[Dict[str, str]], budget: int, model: str) -> int:
+        """Find the first turn to keep so pinned messages plus the rest fit
+        
+        The latest message is always kept, and a kept history never starts
+        with an assistant reply or a tool result, which would be cut off
+        from the tool calls they answer.
+        """
+        used = sum(self.count(m, model) for m in pinned)
+        start = len(turns)
+        while start > 0 and used + self.count(turns[start - 1], model) <= budget:
+            start -= 1
+            used += self.count(turns[start], model)
+        start = min(start, len(turns) - 1)
+        while start < len(turns) - 1 and turns[start]["role"] in ("assistant", "tool"):
+            start += 1
+        return start
+    
+    def reset(self) -> None:
+        """Forget the summary of evicted turns"""
+        self.summary = None
+        self.summarized = 0
+        self.last_evicted = 0
+
+
+class BaseConversation:
+    """Message handling shared by the sync and async conversations"""
+    
+    def __init__(self, profile: ProfileConfig, client: BaseClient):
         """Initialize conversation with profile settings
         
         Args:
             profile: User profile with API key and model settings
+            client: Client to send requests with
         """
         self.profile = profile
-        self.client = OpenAIClient(profile)
+        self.client = client
         self.messages: List[Dict[str, str]] = []
         self.model = profile.default_model
+        self.last_metrics: Dict[str, float] = {}
+        self.session: Optional[SessionLog] = None
+        self.context = ContextWindow()
+        # Deltas of the response being streamed, for cancel_turn
+        self.partial: List[str] = []
+        # Bodies of old messages, created once the first one is spilled
+        self.spill_file: Optional[SpillFile] = None
+    
+    def record_to(self, session: Optional[SessionLog]) -> None:
+        """Append every new message to a session transcript
+        
+        Args:
+            session: Transcript to append to, or None to stop recording
+        """
+        if self.session and self.session is not session:
+            self.session.close()
+        self.session = session
+    
+    def load_messages(self, messages: List[Dict[str, str]]) -> None:
+        """Restore earlier messages without recording them again
+        
+        Args:
+            messages: Messages with role and content
+        """
+        self.messages.extend(Message(**m) for m in messages)
+    
+    def _append(self, role: str, content: Optional[str], counts: Optional[Dict[str, int]] = None, **fields: Any) -> None:
+        """Add message to conversation and its transcript
+        
+        Args:
+            role: Message role
+            content: Message content
+            counts: Known token counts of the message by model
+            **fields: Other message fields, e.g. tool_calls
+        """
+        message = Message(role, content, counts, **fields)
+        self.messages.append(message)
+        if self.session:
+            self.session.append(message)
+    
+    def _fit(self, model_config: ModelConfig) -> List[Dict[str, str]]:
+        """Fit the conversation into the model's window, spilling what it evicts
+        
+        Only evicted messages go to disk, so the ones sent with every
+        request are never read back.
+        """
+        messages = self.context.fit(self.messages, model_config)
+        if self.context.last_evicted:
+            sent = {id(m) for m in messages}
+            for message in self.messages:
+                if id(message) not in sent:
+                    self._spill(message)
+        return messages
+    
+    def _spill(self, message: Dict[str, str]) -> None:
+        """Move the body of an evicted message to disk if it is worth it
+        
+        System messages go out with every request, so they stay in memory.
+        
+        Args:
+            message: Message that is no longer sent
+        """
+        if not isinstance(message, Message) or message.spilled or message["role"] == "system":
+            return
+        if len(message["content"] or "") < SPILL_MIN_CHARS:
+            return
+        if self.spill_file is None:
+            self.spill_file = SpillFile()
+        message.spill(self.spill_file)
     
     def add_system_message(self, content: str) -> None:
         """Add system message to conversation
@@ -26,7 +282,15 @@ class Conversation:
         Args:
             content: Message content
         """
-        self.messages.append({"role": "system", "content": content})
+        self._append("system", content)
+    
+    def add_prompt(self, prompt: PromptConfig) -> None:
+        """Add a stored prompt as system message, reusing its token counts
+        
+        Args:
+            prompt: Stored prompt
+        """
+        self._append("system", prompt.content, prompt.tokens)
     
     def add_user_message(self, content: str) -> None:
         """Add user message to conversation
@@ -34,7 +298,7 @@ class Conversation:
         Args:
             content: Message content
         """
-        self.messages.append({"role": "user", "content": content})
+        self._append("user", content)
     
     def add_assistant_message(self, content: str) -> None:
         """Add assistant message to conversation
@@ -42,28 +306,67 @@ class Conversation:
         Args:
             content: Message content
         """
-        self.messages.append({"role": "assistant", "content": content})
+        self._append("assistant", content)
     
-    def get_response(self, model: Optional[str] = None) -> str:
-        """Get response from AI for current conversation
+    def cancel_turn(self, keep_partial: bool = False) -> bool:
+        """Leave the conversation consistent after a cancelled response
+        
+        The text streamed so far becomes the answer if asked for; otherwise
+        the unanswered user message is taken back, with any tool calls made
+        for it, so the conversation (and its transcript) is as it was before
+        the turn. Tool calls without all their results would make the next
+        request fail.
         
         Args:
-            model: Model name to use, or None for default
+            keep_partial: Keep the partial response instead of dropping the turn
             
         Returns:
-            str: AI response text
+            bool: Whether the turn was kept
         """
-        # Use specified model or default
-        model_name = model or self.model
-        
-        # Get response from OpenAI
-        response = self.client.chat_completion(self.messages, model=model_name)
+        last = self.messages[-1] if self.messages else None
+        if not last or (last["role"] not in ("user", "tool") and not last.get("tool_calls")):
+            # The response completed before the cancel got through
+            return True
+        partial = "".join(self.partial)
+        self.partial = []
+        if keep_partial and partial:
+            self.add_assistant_message(partial)
+            return True
+        # Take back the user message and any tool calls made for it
+        while self.messages:
+            message = self.messages.pop()
+            if self.session:
+                self.session.retract()
+            if message["role"] == "user":
+                break
+        return False
+    
+    def _model_config(self, model: Optional[str] = None) -> ModelConfig:
+        """Get the config to budget the context of a model with
         
-        # Extract and add response to conversation
-        content = response.choices[0].message.content
-        self.add_assistant_message(content)
+        Args:
+            model: Model name to use, or None for default
+            
+        Returns:
+            ModelConfig: Model configuration
+        """
+        model_config = self.client.get_model_config(model or self.model)
+        if model_config.name != (model or self.model):
+            # Fallback config of another model: budget for the one requested
+            model_config = model_config.model_copy(update={"name": model or self.model, "context_window": None})
+        return model_config
+    
+    def _summary_request(self, messages: List[Dict[str, str]]) -> List[Dict[str, str]]:
+        """Build the request that summarizes evicted messages
         
-        return content
+        Args:
+            messages: Messages to summarize
+            
+        Returns:
+            List[Dict[str, str]]: Messages to send
+        """
+        transcript = "\n\n".join(f"{m['role']}: {m['content']}" for m in messages if m["content"])
+        return [{"role": "system", "content": SUMMARY_PROMPT}, {"role": "user", "content": transcript}]
     
     def display_messages(self, include_system: bool = False) -> None:
         """Display conversation messages
@@ -75,8 +378,8 @@ class Conversation:
             role = message["role"]
             content = message["content"]
             
-            # Skip system messages if not requested
-            if role == "system" and not include_system:
+            # Skip system messages if not requested, and tool calls
+            if (role == "system" and not include_system) or not content:
                 continue
                 
             # Format based on role
@@ -85,7 +388,8 @@ class Conversation:
                 rprint(content)
             elif role == "assistant":
                 rprint("\n[bold green]AI:[/bold green]")
-                rprint(Markdown(content))
+                # Parsed once per message, not on every redisplay
+                rprint(message.rendered() if isinstance(message, Message) else Markdown(content))
             elif role == "system" and include_system:
                 rprint("\n[bold yellow]System:[/bold yellow]")
                 rprint(content)
@@ -94,4 +398,302 @@ class Conversation:
     
     def clear(self) -> None:
         """Clear conversation history"""
-        self.messages = []
\ No newline at end of file
+        self.messages = []
+        self.context.reset()
+        self.spill_file = None
+
+
+class Conversation(BaseConversation):
+    """Manages a conversation with an AI model"""
+    
+    def __init__(
+        self,
+        profile: ProfileConfig,
+        client: Optional[OpenAIClient] = None,
+        semantic_cache: Optional["SemanticCache"] = None,
+        tools: Optional["ToolRegistry"] = None,
+    ):
+        """Initialize conversation with profile settings
+        
+        Args:
+            profile: User profile with API key and model settings
+            client: Client to send requests with, or None to create one
+            semantic_cache: Cache answering prompts worded like earlier ones, or None
+            tools: Tools the model may call, or None
+        """
+        super().__init__(profile, client or OpenAIClient(profile))
+        self.context.summarize = self._summarize
+        self.semantic_cache = semantic_cache
+        self.tools = tools
+    
+    def request_messages(self, model: Optional[str] = None) -> List[Dict[str, str]]:
+        """Get the messages to send, trimmed to the model's context window
+        
+        Args:
+            model: Model name to use, or None for default
+            
+        Returns:
+            List[Dict[str, str]]: Messages that fit the token budget
+        """
+        return self._fit(self._model_config(model))
+    
+    def prepare(self, model: Optional[str] = None) -> None:
+        """Do the work of the next request that does not need its message
+        
+        Summarizes turns due for eviction and counts the tokens of the
+        conversation so far, for the context window and the rate limiter,
+        so only the new message is left once it is added. Interactive chat
+        runs this while the user types.
+        
+        Args:
+            model: Model name to use, or None for default
+        """
+        model_name = model or self.model
+        messages = self.request_messages(model_name)
+        self.client.estimate_tokens(self.client.build_params(messages, model_name))
+    
+    def _summarize(self, messages: List[Dict[str, str]], model: str) -> str:
+        """Summarize evicted messages with the conversation's model
+        
+        Args:
+            messages: Messages to summarize
+            model: Model name
+            
+        Returns:
+            str: Summary text
+        """
+        response = self.client.chat_completion(self._summary_request(messages), model=model)
+        return response.choices[0].message.content
+    
+    def _semantic_lookup(self, messages: List[Dict[str, str]], model: str) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        """Look up an answer to a similar prompt in the semantic cache
+        
+        Args:
+            messages: Messages to send
+            model: Model name
+            
+        Returns:
+            Tuple[Optional[Dict[str, Any]], Optional[str]]: Request parameters
+                to store the answer under (None if the cache is off) and the
+                cached answer (None on miss)
+        """
+        if not self.semantic_cache:
+            return None, None
+        # A copy, the answer is stored after the conversation has moved on
+        params = self.client.build_params(list(messages), model)
+        if self.client.refresh_cache:
+            return params, None
+        return params, self.semantic_cache.get(params, self.client.cache_scope)
+    
+    def get_response(self, model: Optional[str] = None) -> str:
+        """Get response from AI for current conversation
+        
+        With tools, the tool calls the model makes are run and their
+        results sent back until it answers, for up to TOOL_MAX_ROUNDS
+        rounds. Token usage of all requests is recorded in ``last_metrics``.
+        
+        Args:
+            model: Model name to use, or None for default
+            
+        Returns:
+            str: AI response text
+        """
+        # Use specified model or default
+        model_name = model or self.model
+        self.partial = []
+        
+        # Answer near-duplicate prompts from the semantic cache
+        messages = self.request_messages(model_name)
+        params, content = self._semantic_lookup(messages, model_name)
+        if content is not None:
+            self.last_metrics = {"semantic_cache_hit": 1}
+            self.add_assistant_message(content)
+            return content
+        
+        # Get response from OpenAI
+        self.last_metrics = {}
+        rounds = 0
+        while True:
+            kwargs = {}
+            if self.tools:
+                # Out of rounds: make the model answer with what it has
+                kwargs = {"tools": self.tools.definitions(), "tool_choice": "auto" if rounds < TOOL_MAX_ROUNDS else "none"}
+            response = self.client.chat_completion(messages, model=model_name, **kwargs)
+            for key, value in (self.client.last_usage or {}).items():
+                self.last_metrics[key] = self.last_metrics.get(key, 0) + value
+            reply = response.choices[0].message
+            if not self.tools or not reply.tool_calls:
+                break
+            self._run_tools(reply)
+            rounds += 1
+            messages = self.request_messages(model_name)
+        if rounds:
+            self.last_metrics["tool_rounds"] = rounds
+        
+        # Extract and add response to conversation
+        content = reply.content or ""
+        self.add_assistant_message(content)
+        if params:
+            self.semantic_cache.set(params, content, self.client.cache_scope)
+        
+        return content
+    
+    def _run_tools(self, reply: Any) -> None:
+        """Add a reply's tool calls and their results to the conversation
+        
+        Args:
+            reply: Assistant message with tool calls
+        """
+        calls = [call.model_dump(exclude_none=True) for call in reply.tool_calls]
+        # Added only once every result is in, so an interrupted run adds nothing
+        results = self.tools.run(calls)
+        self._append("assistant", reply.content, tool_calls=calls)
+        for result in results:
+            self._append("tool", result["content"], tool_call_id=result["tool_call_id"])
+    
+    def stream_response(self, model: Optional[str] = None) -> Iterator[str]:
+        """Stream response from AI for current conversation
+        
+        The full response is added to the conversation once the stream ends,
+        and timing and token usage are recorded in ``last_metrics``. Closing
+        the iterator early closes the HTTP stream; see ``cancel_turn``.
+        With tools, the answer comes in one piece once the tools have run.
+        
+        Args:
+            model: Model name to use, or None for default
+            
+        Returns:
+            Iterator[str]: Response text deltas as they arrive
+        """
+        # Time to first token includes preparing the request
+        started = time.perf_counter()
+        if self.tools:
+            content = self.get_response(model)
+            self.last_metrics["total_time"] = time.perf_counter() - started
+            yield content
+            return
+        model_name = model or self.model
+        self.last_metrics = {}
+        self.partial = parts = []
+        
+        messages = self.request_messages(model_name)
+        params, content = self._semantic_lookup(messages, model_name)
+        if content is not None:
+            self.last_metrics["semantic_cache_hit"] = 1
+            parts.append(content)
+            yield content
+            self.add_assistant_message(content)
+            return
+        
+        for delta in self.client.stream_completion(messages, model=model_name):
+            if not parts:
+                self.last_metrics["time_to_first_token"] = time.perf_counter() - started
+            parts.append(delta)
+            yield delta
+        self.last_metrics["total_time"] = time.perf_counter() - started
+        self.last_metrics.update(self.client.last_usage or {})
+        
+        self.partial = []
+        self.add_assistant_message("".join(parts))
+        if params:
+            self.semantic_cache.set(params, "".join(parts), self.client.cache_scope)
+
+
+class AsyncConversation(BaseConversation):
+    """Manages a conversation with an AI model from asyncio code
+    
+    Responses are only added to the conversation once they complete, so a
+    cancelled or timed out request leaves it as it was.
+    """
+    
+    def __init__(self, profile: ProfileConfig, client: Optional[AsyncOpenAIClient] = None):
+        """Initialize conversation with profile settings
+        
+        Args:
+            profile: User profile with API key and model settings
+            client: Client to send requests with, or None to create one
+        """
+        super().__init__(profile, client or AsyncOpenAIClient(profile))
+    
+    async def request_messages(self, model: Optional[str] = None) -> List[Dict[str, str]]:
+        """Get the messages to send, trimmed to the model's context window
+        
+        Args:
+            model: Model name to use, or None for default
+            
+        Returns:
+            List[Dict[str, str]]: Messages that fit the token budget
+        """
+        model_config = self._model_config(model)
+        evicted, upto = self.context.pending_summary(self.messages, model_config)
+        if evicted:
+            response = await self.client.chat_completion(self._summary_request(evicted), model=model_config.name)
+            self.context.add_summary(response.choices[0].message.content, upto)
+        return self._fit(model_config)
+    
+    async def get_response(self, model: Optional[str] = None, timeout: Optional[float] = None) -> str:
+        """Get response from AI for current conversation
+        
+        Token usage is recorded in ``last_metrics``.
+        
+        Args:
+            model: Model name to use, or None for default
+            timeout: Seconds before the request is cancelled, or None to wait
+            
+        Returns:
+            str: AI response text
+            
+        Raises:
+            asyncio.TimeoutError: If the timeout expires
+        """
+        model_name = model or self.model
+        
+        response = await asyncio.wait_for(self._complete(model_name), timeout)
+        self.last_metrics = dict(self.client.last_usage or {})
+        
+        content = response.choices[0].message.content
+        self.add_assistant_message(content)
+        
+        return content
+    
+    async def _complete(self, model: str) -> Any:
+        """Trim the context and send it"""
+        return await self.client.chat_completion(await self.request_messages(model), model=model)
+    
+    async def stream_response(self, model: Optional[str] = None, timeout: Optional[float] = None) -> AsyncIterator[str]:
+        """Stream response from AI for current conversation
+        
+        The full response is added to the conversation once the stream ends,
+        and timing and token usage are recorded in ``last_metrics``.
+        
+        Args:
+            model: Model name to use, or None for default
+            timeout: Seconds before the whole stream is cancelled, or None to wait
+            
+        Returns:
+            AsyncIterator[str]: Response text deltas as they arrive
+            
+        Raises:
+            asyncio.TimeoutError: If the timeout expires
+        """
+        model_name = model or self.model
+        self.last_metrics = {}
+        
+        started = time.perf_counter()
+        parts: List[str] = []
+        messages = await asyncio.wait_for(self.request_messages(model_name), timeout)
+        if timeout is not None:
+            timeout = max(timeout - (time.perf_counter() - started), 0)
+        stream = self.client.stream_completion(messages, model=model_name, timeout=timeout)
+        try:
+            async for delta in stream:
+                if not parts:
+                    self.last_metrics["time_to_first_token"] = time.perf_counter() - started
+                parts.append(delta)
+                yield delta
+        finally:
+            await stream.aclose()
+        self.last_metrics["total_time"] = time.perf_counter() - started
+        self.last_metrics.update(self.client.last_usage or {})
+        
+        self.add_assistant_message("".join(parts))
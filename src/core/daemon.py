@@ -0,0 +1,320 @@
+import itertools
+import json
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterator, Optional
+
+import httpx
+import openai
+from openai.types.chat import ChatCompletion, ChatCompletionChunk
+
+from core.openai_client import OpenAIClient
+from default import DAEMON_LOG_FILE, DAEMON_PID_FILE, DAEMON_SOCKET, DAEMON_START_TIMEOUT
+from settings import ProfileConfig
+
+# How long the CLI waits for the daemon to answer a ping before going in-process
+PING_TIMEOUT = 0.5
+
+
+# SDK errors by status code, to raise the daemon's API errors as in-process ones
+STATUS_ERRORS = {
+    400: openai.BadRequestError,
+    401: openai.AuthenticationError,
+    403: openai.PermissionDeniedError,
+    404: openai.NotFoundError,
+    409: openai.ConflictError,
+    422: openai.UnprocessableEntityError,
+    429: openai.RateLimitError,
+}
+
+# Response headers the retry policy reads
+RETRY_HEADERS = ("retry-after", "retry-after-ms")
+
+
+class DaemonError(RuntimeError):
+    """Error reported by the daemon"""
+
+
+def encode_error(error: Exception) -> Dict[str, Any]:
+    """Build the daemon's reply for a failed request
+
+    API errors keep their kind, status code, body and retry headers, so
+    the CLI can retry or fail over on them as if it had made the call.
+
+    Args:
+        error: Error raised while handling the request
+
+    Returns:
+        Dict[str, Any]: Error reply
+    """
+    reply: Dict[str, Any] = {"error": str(error)}
+    if isinstance(error, openai.APIStatusError):
+        headers = {name: error.response.headers[name] for name in RETRY_HEADERS if name in error.response.headers}
+        reply["api_error"] = {"status": error.status_code, "headers": headers, "body": error.body}
+    elif isinstance(error, openai.APITimeoutError):
+        reply["api_error"] = {"timeout": True}
+    elif isinstance(error, openai.APIConnectionError):
+        reply["api_error"] = {}
+    return reply
+
+
+def decode_error(reply: Dict[str, Any]) -> Exception:
+    """Rebuild the error of a failed daemon request
+
+    Args:
+        reply: Error reply from the daemon
+
+    Returns:
+        Exception: The matching openai.APIError, or DaemonError for errors
+            of the daemon itself
+    """
+    info = reply.get("api_error")
+    if info is None:
+        return DaemonError(reply["error"])
+    request = httpx.Request("POST", "http://termgpt-daemon/chat/completions")
+    if info.get("timeout"):
+        return openai.APITimeoutError(request=request)
+    if "status" not in info:
+        return openai.APIConnectionError(message=reply["error"], request=request)
+    status = info["status"]
+    response = httpx.Response(status, headers=info.get("headers") or {}, request=request)
+    error_class = STATUS_ERRORS.get(status, openai.InternalServerError if status >= 500 else openai.APIStatusError)
+    return error_class(reply["error"], response=response, body=info.get("body"))
+
+
+def is_supported() -> bool:
+    """Check if the platform supports Unix sockets"""
+    return hasattr(socket, "AF_UNIX")
+
+
+def _open(payload: Dict[str, Any], socket_path: Path = DAEMON_SOCKET, timeout: Optional[float] = None) -> socket.socket:
+    """Connect to the daemon and send one request
+
+    Args:
+        payload: Request
+        socket_path: Daemon socket
+        timeout: Socket timeout in seconds, or None to block
+
+    Returns:
+        socket.socket: Connected socket to read the reply from
+    """
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(str(socket_path))
+        sock.sendall(json.dumps(payload).encode("utf-8") + b"\n")
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _call(payload: Dict[str, Any], socket_path: Path = DAEMON_SOCKET, timeout: Optional[float] = None) -> Dict[str, Any]:
+    """Send one request to the daemon and read its single-line reply
+
+    Args:
+        payload: Request
+        socket_path: Daemon socket
+        timeout: Socket timeout in seconds, or None to block
+
+    Returns:
+        Dict[str, Any]: Reply
+    """
+    with _open(payload, socket_path, timeout) as sock, sock.makefile("r", encoding="utf-8") as f:
+        reply = json.loads(f.readline() or "{}")
+    if "error" in reply:
+        raise decode_error(reply)
+    return reply
+
+
+def ping(socket_path: Path = DAEMON_SOCKET) -> Optional[Dict[str, Any]]:
+    """Check if the daemon is running
+
+    Args:
+        socket_path: Daemon socket
+
+    Returns:
+        Optional[Dict[str, Any]]: Daemon status, or None if it isn't running
+    """
+    if not is_supported() or not socket_path.exists():
+        return None
+    try:
+        return _call({"op": "ping"}, socket_path, timeout=PING_TIMEOUT)
+    except (OSError, ValueError, DaemonError):
+        return None
+
+
+class DaemonStream:
+    """Stream of completion chunks relayed by the daemon"""
+
+    def __init__(self, sock: socket.socket):
+        """Wrap a socket the daemon streams chunks on
+
+        Waits for the daemon to confirm the upstream request started, so
+        errors of the request itself are raised here, where they can be
+        retried, rather than while iterating.
+
+        Args:
+            sock: Connected socket
+        """
+        self._sock = sock
+        self._file = sock.makefile("r", encoding="utf-8")
+        self._first: Optional[str] = None
+        try:
+            line = self._file.readline()
+            message = json.loads(line or '{"error": "The daemon closed the connection"}')
+            if "error" in message:
+                raise decode_error(message)
+        except BaseException:
+            self.close()
+            raise
+        if not message.get("started"):
+            # A daemon that doesn't confirm starts sends chunks right away
+            self._first = line
+
+    def __iter__(self) -> Iterator[ChatCompletionChunk]:
+        lines = self._file if self._first is None else itertools.chain([self._first], self._file)
+        self._first = None
+        for line in lines:
+            message = json.loads(line)
+            if "error" in message:
+                raise decode_error(message)
+            if message.get("done"):
+                return
+            yield ChatCompletionChunk.model_validate(message["chunk"])
+
+    def __enter__(self) -> "DaemonStream":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def close(self) -> None:
+        """Close the connection, which also stops the upstream request"""
+        self._file.close()
+        self._sock.close()
+
+
+class DaemonClient(OpenAIClient):
+    """OpenAI client that sends requests through the background daemon
+
+    Request parameters, caching, model configuration, budget, rate limits
+    and retries are handled here as usual; only the HTTP call is made by
+    the daemon, over its warm connection pool. Its API errors are raised
+    as the SDK's, so retries and route failover work the same.
+    """
+
+    def __init__(self, profile: ProfileConfig, socket_path: Path = DAEMON_SOCKET, **kwargs):
+        """Initialize daemon client
+
+        Args:
+            profile: User profile with API key and model settings
+            socket_path: Daemon socket
+            **kwargs: Passed to OpenAIClient
+        """
+        self.socket_path = socket_path
+        super().__init__(profile, **kwargs)
+
+    def _connect(self, http_client: Optional[Any] = None) -> Any:
+        # The daemon owns the SDK client
+        return None
+
+    def warm_up(self) -> None:
+        # The daemon keeps its own connections warm
+        pass
+
+    def send(self, params: Dict[str, Any]) -> Any:
+        """Send a prepared chat completion request through the daemon
+
+        Args:
+            params: Request parameters as built by build_params
+
+        Returns:
+            ChatCompletion, or a DaemonStream if params ask to stream
+        """
+        payload = {"op": "chat", "profile": self.profile.name, "params": params}
+        try:
+            if params.get("stream"):
+                return DaemonStream(_open(payload, self.socket_path))
+            return ChatCompletion.model_validate(_call(payload, self.socket_path)["response"])
+        except OSError as e:
+            # The daemon went away: as retryable as a dropped connection
+            raise openai.APIConnectionError(message=f"Daemon unavailable: {e}", request=httpx.Request("POST", "http://termgpt-daemon/chat/completions"))
+
+
+def make_client(profile: ProfileConfig, **kwargs) -> OpenAIClient:
+    """Create a client that uses the daemon if it is running
+
+    Args:
+        profile: User profile with API key and model settings
+        **kwargs: Passed to the client
+
+    Returns:
+        OpenAIClient: Daemon-backed client, or an in-process one
+    """
+    if ping():
+        return DaemonClient(profile, **kwargs)
+    return OpenAIClient(profile, **kwargs)
+
+
+def start(socket_path: Path = DAEMON_SOCKET) -> Optional[Dict[str, Any]]:
+    """Start the daemon in the background
+
+    Args:
+        socket_path: Socket the daemon listens on
+
+    Returns:
+        Optional[Dict[str, Any]]: Daemon status, or None if it didn't come up
+    """
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    main_py = Path(__file__).resolve().parent.parent / "main.py"
+    with open(DAEMON_LOG_FILE, "a") as log:
+        subprocess.Popen(
+            [sys.executable, str(main_py), "daemon", "run"],
+            cwd=main_py.parent,
+            stdin=subprocess.DEVNULL,
+            stdout=log,
+            stderr=log,
+            start_new_session=True,
+        )
+
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while time.monotonic() < deadline:
+        status = ping(socket_path)
+        if status:
+            return status
+        time.sleep(0.1)
+    return None
+
+
+def stop(socket_path: Path = DAEMON_SOCKET, pid_file: Path = DAEMON_PID_FILE) -> bool:
+    """Stop the daemon
+
+    Args:
+        socket_path: Socket the daemon listens on
+        pid_file: File with the daemon process id
+
+    Returns:
+        bool: Whether a running daemon was stopped
+    """
+    try:
+        _call({"op": "shutdown"}, socket_path, timeout=PING_TIMEOUT)
+    except (OSError, ValueError, DaemonError):
+        # Not answering: fall back to the pid file
+        if not pid_file.exists():
+            return False
+        try:
+            os.kill(int(pid_file.read_text()), signal.SIGTERM)
+        except (OSError, ValueError):
+            pid_file.unlink(missing_ok=True)
+            return False
+
+    deadline = time.monotonic() + DAEMON_START_TIMEOUT
+    while socket_path.exists() and time.monotonic() < deadline:
+        time.sleep(0.1)
+    return True
@@ -0,0 +1,152 @@
+import json
+import os
+import signal
+import socketserver
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Dict
+
+import httpx
+import openai
+
+from core import config, metrics
+from core.daemon import DaemonError, encode_error
+from core.openai_client import OpenAIClient
+from default import DAEMON_KEEPALIVE_SECONDS, DAEMON_PID_FILE, DAEMON_SOCKET
+
+
+class DaemonServer(socketserver.ThreadingUnixStreamServer):
+    """Unix socket server holding one warm, pooled client per profile"""
+
+    daemon_threads = True
+
+    def __init__(self, socket_path: Path = DAEMON_SOCKET):
+        """Bind the daemon socket
+
+        Args:
+            socket_path: Socket path, readable by the current user only
+        """
+        self.started = time.time()
+        self.requests = 0
+        self.clients: Dict[str, OpenAIClient] = {}
+        self._lock = threading.Lock()
+        self._requests_lock = threading.Lock()
+
+        old_umask = os.umask(0o177)
+        try:
+            super().__init__(str(socket_path), DaemonHandler)
+        finally:
+            os.umask(old_umask)
+
+    def count_request(self) -> None:
+        """Count a chat request; handlers run on their own threads"""
+        with self._requests_lock:
+            self.requests += 1
+
+    def client_for(self, profile_name: str) -> OpenAIClient:
+        """Get the pooled client of a profile, creating it on first use
+
+        Args:
+            profile_name: Profile name
+
+        Returns:
+            OpenAIClient: Client for the profile
+        """
+        settings = config.get_settings()
+        profile = settings.get_profile(profile_name)
+        if not profile:
+            raise DaemonError(f"Profile '{profile_name}' does not exist")
+
+        with self._lock:
+            client = self.clients.get(profile_name)
+            # Settings are cached per config content, so a new object means an edit
+            if client is None or client.profile is not profile:
+                # Keep idle connections open well past the httpx default of 5s
+                http_client = openai.DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=100,
+                        max_keepalive_connections=20,
+                        keepalive_expiry=DAEMON_KEEPALIVE_SECONDS,
+                    )
+                )
+                client = self.clients[profile_name] = OpenAIClient(profile, http_client=http_client)
+            return client
+
+
+class DaemonHandler(socketserver.StreamRequestHandler):
+    """Handles one JSON-line request per connection"""
+
+    def reply(self, message: Dict[str, Any]) -> None:
+        self.wfile.write(json.dumps(message).encode("utf-8") + b"\n")
+        self.wfile.flush()
+
+    def handle(self) -> None:
+        try:
+            request = json.loads(self.rfile.readline())
+            op = request.get("op")
+            if op == "ping":
+                self.reply({
+                    "pid": os.getpid(),
+                    "uptime": time.time() - self.server.started,
+                    "requests": self.server.requests,
+                    "profiles": sorted(self.server.clients),
+                    "counters": metrics.counters(),
+                })
+            elif op == "shutdown":
+                self.reply({"ok": True})
+                threading.Thread(target=self.server.shutdown).start()
+            elif op == "chat":
+                self.server.count_request()
+                self.chat(request)
+            else:
+                raise DaemonError(f"Unknown operation '{op}'")
+        except (BrokenPipeError, ConnectionResetError):
+            # The CLI went away, e.g. the user cancelled a stream
+            pass
+        except Exception as e:
+            try:
+                self.reply(encode_error(e))
+            except OSError:
+                pass
+
+    def chat(self, request: Dict[str, Any]) -> None:
+        client = self.server.client_for(request["profile"])
+        params = request["params"]
+        # The CLI has checked the budget, taken rate limit tokens and retries
+        # errors; doing it here again would count every request twice
+        result = client.send(params)
+        if not params.get("stream"):
+            self.reply({"response": result.model_dump(mode="json")})
+            return
+
+        # Errors after this line belong to the stream, not the request
+        self.reply({"started": True})
+        with result:
+            for chunk in result:
+                self.reply({"chunk": chunk.model_dump(mode="json")})
+        self.reply({"done": True})
+
+
+def run(socket_path: Path = DAEMON_SOCKET, pid_file: Path = DAEMON_PID_FILE) -> None:
+    """Run the daemon in the foreground until stopped
+
+    Args:
+        socket_path: Socket to listen on
+        pid_file: File to write the process id to
+    """
+    socket_path.parent.mkdir(parents=True, exist_ok=True)
+    if socket_path.exists():
+        # Left behind by a daemon that didn't shut down cleanly
+        socket_path.unlink()
+
+    server = DaemonServer(socket_path)
+    pid_file.write_text(str(os.getpid()))
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+        socket_path.unlink(missing_ok=True)
+        pid_file.unlink(missing_ok=True)
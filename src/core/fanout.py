@@ -0,0 +1,60 @@
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core.openai_client import OpenAIClient
+
+
+def run_target(client: OpenAIClient, model: Optional[str], messages: List[Dict[str, str]]) -> Dict[str, Any]:
+    """Send messages to one profile/model and time the call
+
+    Args:
+        client: Client of the target's profile
+        model: Model name, or None for the profile's default
+        messages: Messages to send
+
+    Returns:
+        Dict[str, Any]: Result record with response, latency and usage
+    """
+    model_name = model or client.profile.default_model
+    record: Dict[str, Any] = {"profile": client.profile.name, "model": model_name}
+    started = time.perf_counter()
+    try:
+        response = client.chat_completion(messages, model=model_name)
+        record["response"] = response.choices[0].message.content
+        record["usage"] = response.usage.model_dump() if response.usage else None
+        record["error"] = None
+    except Exception as e:
+        record["response"] = None
+        record["usage"] = None
+        record["error"] = str(e)
+    record["latency"] = time.perf_counter() - started
+    return record
+
+
+def run_fanout(
+    targets: List[Tuple[OpenAIClient, Optional[str]]],
+    messages: List[Dict[str, str]],
+    on_result: Callable[[Dict[str, Any]], None],
+) -> List[Dict[str, Any]]:
+    """Send the same messages to several profiles/models concurrently
+
+    Args:
+        targets: (client, model) pairs; model None means the profile's default
+        messages: Messages to send
+        on_result: Called with each result record in completion order
+
+    Returns:
+        List[Dict[str, Any]]: Result records in target order
+    """
+    with ThreadPoolExecutor(max_workers=len(targets)) as executor:
+        futures = {
+            executor.submit(run_target, client, model, messages): index
+            for index, (client, model) in enumerate(targets)
+        }
+        results: List[Optional[Dict[str, Any]]] = [None] * len(targets)
+        for future in as_completed(futures):
+            record = future.result()
+            results[futures[future]] = record
+            on_result(record)
+    return results
@@ -0,0 +1,244 @@
+import json
+import os
+import secrets
+import sqlite3
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from default import HISTORY_DIR, HISTORY_FSYNC_EVERY
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    model TEXT NOT NULL,
+    title TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    message_count INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS sessions_updated ON sessions (updated);
+CREATE INDEX IF NOT EXISTS sessions_profile_updated ON sessions (profile, updated);
+"""
+
+# Transcript line that cancels the message before it
+RETRACT = {"retract": True}
+
+# Length of the session title taken from the first user message
+TITLE_LENGTH = 60
+
+
+class SessionLog:
+    """Append-only transcript of one conversation session
+
+    Each message is one JSON line. Lines are flushed on every append and
+    fsynced in batches, so the file is never rewritten.
+    """
+
+    def __init__(self, store: "HistoryStore", session_id: str, fsync_every: int = HISTORY_FSYNC_EVERY):
+        """Open session transcript for appending
+
+        Args:
+            store: Store holding the session index
+            session_id: Session id
+            fsync_every: Number of appends between fsyncs
+        """
+        self.store = store
+        self.id = session_id
+        self.fsync_every = fsync_every
+        path = store.transcript_path(session_id)
+        self._file = open(path, "a", encoding="utf-8")
+        self._unsynced = 0
+        
+        if self._file.tell() and not path.read_bytes().endswith(b"\n"):
+            # Terminate a partial line left by a crash
+            self._file.write("\n")
+
+    def append(self, message: Dict[str, Any]) -> None:
+        """Append a message to the transcript
+
+        Args:
+            message: Message with role and content
+        """
+        self._write(message)
+        title = message["content"][:TITLE_LENGTH] if message["role"] == "user" else None
+        self.store.touch(self.id, title)
+
+    def retract(self) -> None:
+        """Take back the last appended message, e.g. of a cancelled turn
+
+        The file stays append-only: a marker line tells load_messages to
+        drop the message before it.
+        """
+        self._write(RETRACT)
+        self.store.touch(self.id, None, -1)
+
+    def _write(self, record: Dict[str, Any]) -> None:
+        self._file.write(json.dumps(record, ensure_ascii=False) + "\n")
+        self._file.flush()
+        self._unsynced += 1
+        if self._unsynced >= self.fsync_every:
+            self.sync()
+
+    def sync(self) -> None:
+        """Force appended messages to disk"""
+        if self._unsynced:
+            os.fsync(self._file.fileno())
+            self._unsynced = 0
+
+    def close(self) -> None:
+        """Sync and close the transcript"""
+        if not self._file.closed:
+            self.sync()
+            self._file.close()
+
+
+class HistoryStore:
+    """Conversation sessions on disk, with a SQLite index for fast listing"""
+
+    def __init__(self, path: Path = HISTORY_DIR):
+        """Initialize store
+
+        Args:
+            path: Directory holding transcripts and the index
+        """
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Index connection, created on first use"""
+        if self._db is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path / "index.sqlite3", timeout=30, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def transcript_path(self, session_id: str) -> Path:
+        """Get the transcript file of a session
+
+        Args:
+            session_id: Session id
+
+        Returns:
+            Path: JSONL transcript path
+        """
+        return self.path / f"{session_id}.jsonl"
+
+    def create_session(self, profile: str, model: str) -> SessionLog:
+        """Start a new session
+
+        Args:
+            profile: Profile name
+            model: Model name
+
+        Returns:
+            SessionLog: Transcript to append messages to
+        """
+        # Ids sort by creation time and are unique across processes
+        session_id = f"{time.strftime('%Y%m%d-%H%M%S')}-{secrets.token_hex(3)}"
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO sessions (id, profile, model, created, updated) VALUES (?, ?, ?, ?, ?)",
+            (session_id, profile, model, now, now),
+        )
+        return SessionLog(self, session_id)
+
+    def open_session(self, session_id: str) -> SessionLog:
+        """Reopen an existing session for appending
+
+        Args:
+            session_id: Session id
+
+        Returns:
+            SessionLog: Transcript to append messages to
+        """
+        return SessionLog(self, session_id)
+
+    def touch(self, session_id: str, title: Optional[str] = None, added: int = 1) -> None:
+        """Record that a message was appended to a session
+
+        Args:
+            session_id: Session id
+            title: Title to set if the session has none yet
+            added: Change in message count, -1 for a retracted message
+        """
+        self.db.execute(
+            "UPDATE sessions SET updated = ?, message_count = message_count + ?, "
+            "title = COALESCE(title, ?) WHERE id = ?",
+            (time.time(), added, title, session_id),
+        )
+
+    def get_session(self, session_id: str) -> Optional[sqlite3.Row]:
+        """Find a session by id or unique id prefix
+
+        Args:
+            session_id: Full id or prefix
+
+        Returns:
+            Optional[sqlite3.Row]: Session index row, or None if not found or ambiguous
+        """
+        rows = self.db.execute(
+            "SELECT * FROM sessions WHERE id >= ? AND id < ? ORDER BY id LIMIT 2",
+            (session_id, session_id + "\uffff"),
+        ).fetchall()
+        if len(rows) == 1:
+            return rows[0]
+        return next((row for row in rows if row["id"] == session_id), None)
+
+    def latest_session(self, profile: Optional[str] = None) -> Optional[sqlite3.Row]:
+        """Find the most recently updated session
+
+        Args:
+            profile: Only consider sessions of this profile
+
+        Returns:
+            Optional[sqlite3.Row]: Session index row, or None if there are none
+        """
+        if profile:
+            return self.db.execute(
+                "SELECT * FROM sessions WHERE profile = ? ORDER BY updated DESC LIMIT 1", (profile,)
+            ).fetchone()
+        return self.db.execute("SELECT * FROM sessions ORDER BY updated DESC LIMIT 1").fetchone()
+
+    def list_sessions(self, limit: int = 20) -> List[sqlite3.Row]:
+        """List sessions, most recently updated first
+
+        Args:
+            limit: Maximum number of sessions
+
+        Returns:
+            List[sqlite3.Row]: Session index rows
+        """
+        return self.db.execute("SELECT * FROM sessions ORDER BY updated DESC LIMIT ?", (limit,)).fetchall()
+
+    def load_messages(self, session_id: str) -> List[Dict[str, Any]]:
+        """Read all messages of a session
+
+        Args:
+            session_id: Session id
+
+        Returns:
+            List[Dict[str, Any]]: Messages in order
+        """
+        path = self.transcript_path(session_id)
+        if not path.exists():
+            return []
+
+        messages = []
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A crash mid-write can leave a partial last line
+                    continue
+                if record == RETRACT:
+                    if messages:
+                        messages.pop()
+                    continue
+                messages.append(record)
+        return messages
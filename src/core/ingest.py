@@ -0,0 +1,252 @@
+import itertools
+import sys
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional
+
+from core import tokens
+from core.batch import run_batch
+from core.openai_client import OpenAIClient
+
+# Tokens kept free for the instructions wrapped around each chunk
+CHUNK_PROMPT_RESERVE = 256
+
+# Everything before the part is the same for all parts, so providers can
+# serve it from their prompt cache
+MAP_PROMPT = (
+    "The input is too long to process at once, so it is split into parts. "
+    "Answer the request for the part below only; another step will combine "
+    "the answers.\n\nRequest: {message}\n\nPart {part}:\n{chunk}"
+)
+REDUCE_PROMPT = (
+    "The input was too long to process at once, so it was split into parts and "
+    "each part was answered separately. Combine the partial answers below into "
+    "a single answer to the request.\n\nRequest: {message}\n\n{partials}"
+)
+
+
+def read_lines(paths: List[str]) -> Iterator[str]:
+    """Read input files line by line, each under a header with its name
+
+    Args:
+        paths: File paths, "-" for stdin
+
+    Returns:
+        Iterator[str]: Lines, with line endings
+    """
+    for path in paths:
+        name = "stdin" if path == "-" else path
+        yield f"--- {name} ---\n"
+        if path == "-":
+            yield from sys.stdin
+            continue
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            yield from f
+
+
+def iter_chunks(lines: Iterable[str], max_tokens: int, model: str) -> Iterator[str]:
+    """Group lines into chunks of at most max_tokens tokens
+
+    Only the chunk being built is held in memory. Lines longer than a
+    whole chunk are split.
+
+    Args:
+        lines: Input lines
+        max_tokens: Token limit per chunk
+        model: Model name, for tokenizing
+
+    Returns:
+        Iterator[str]: Chunks, in input order
+    """
+    parts: List[str] = []
+    used = 0
+    for line in lines:
+        count = tokens.count_tokens(line, model)
+        if count > max_tokens:
+            # Split an overlong line into roughly chunk-sized slices
+            step = max(len(line) * max_tokens // count, 1)
+            pieces = [line[start:start + step] for start in range(0, len(line), step)]
+        else:
+            pieces = [line]
+        for piece in pieces:
+            count = tokens.count_tokens(piece, model) if len(pieces) > 1 else count
+            if parts and used + count > max_tokens:
+                yield "".join(parts)
+                parts, used = [], 0
+            parts.append(piece)
+            used += count
+    if parts:
+        yield "".join(parts)
+
+
+def chunk_budget(client: OpenAIClient, model: Optional[str], message: str, system: Optional[str] = None) -> int:
+    """Get the tokens a chunk may use so one request still fits the model
+
+    Args:
+        client: Client whose profile configures the model
+        model: Model name, or None for the profile's default
+        message: User request sent along with every chunk
+        system: Optional system message
+
+    Returns:
+        int: Token limit per chunk
+    """
+    from core.conversation import ContextWindow
+
+    model_name = model or client.profile.default_model
+    model_config = client.get_model_config(model_name)
+    if model_config.name != model_name:
+        model_config = model_config.model_copy(update={"name": model_name, "context_window": None})
+    budget = ContextWindow().budget(model_config)
+    used = tokens.count_tokens(message, model_name) + CHUNK_PROMPT_RESERVE
+    if system:
+        used += tokens.count_message_tokens({"role": "system", "content": system}, model_name)
+    return max(budget - used, CHUNK_PROMPT_RESERVE)
+
+
+def attach(message: str, content: str) -> str:
+    """Build a single prompt from a request and its input"""
+    return f"{message}\n\n{content}" if message else content
+
+
+def map_chunks(
+    client: OpenAIClient,
+    message: str,
+    chunks: Iterable[str],
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+    concurrency: int = 4,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[str]:
+    """Answer the request for every chunk concurrently
+
+    Chunks are pulled from the iterable only as slots free up, so a large
+    input is never held in memory all at once.
+
+    Args:
+        client: Client to send requests with
+        message: User request
+        chunks: Input chunks
+        model: Model name, or None for the profile's default
+        system: Optional system message
+        concurrency: Maximum number of requests in flight
+        on_result: Called with each result record, in input order
+
+    Returns:
+        List[str]: Partial answers, in input order
+
+    Raises:
+        RuntimeError: If a part could not be answered
+    """
+    items = (
+        {"id": index + 1, "prompt": MAP_PROMPT.format(part=index + 1, message=message or "(none)", chunk=chunk)}
+        for index, chunk in enumerate(chunks)
+    )
+    return _run_items(client, items, model, system, concurrency, on_result)
+
+
+def reduce_partials(
+    client: OpenAIClient,
+    message: str,
+    partials: List[str],
+    max_tokens: int,
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+    concurrency: int = 4,
+) -> str:
+    """Build the final combining prompt, merging partials first if needed
+
+    While the partial answers together exceed max_tokens, they are grouped
+    into token-bounded runs and each run is combined into one answer.
+
+    Args:
+        client: Client to send intermediate requests with
+        message: User request
+        partials: Partial answers, in input order
+        max_tokens: Token limit for the partial answers in one prompt
+        model: Model name, or None for the profile's default
+        system: Optional system message
+        concurrency: Maximum number of requests in flight
+
+    Returns:
+        str: Prompt that combines all partial answers
+    """
+    model_name = model or client.profile.default_model
+    request = message or "(none)"
+    while True:
+        sections = [f"## Part {index + 1}\n\n{partial}\n\n" for index, partial in enumerate(partials)]
+        groups = list(iter_chunks(sections, max_tokens, model_name))
+        if len(groups) == 1 or len(groups) == len(partials):
+            # Fits, or every answer is too long on its own and merging can't help
+            return REDUCE_PROMPT.format(message=request, partials="".join(sections))
+        items = (
+            {"id": index, "prompt": REDUCE_PROMPT.format(message=request, partials=group)}
+            for index, group in enumerate(groups)
+        )
+        partials = _run_items(client, items, model, system, concurrency)
+
+
+def _run_items(
+    client: OpenAIClient,
+    items: Iterable[Dict[str, Any]],
+    model: Optional[str],
+    system: Optional[str],
+    concurrency: int,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> List[str]:
+    """Run prompt items through run_batch and collect the answers in order
+
+    Raises:
+        RuntimeError: If an item could not be answered
+    """
+    responses: List[str] = []
+
+    def collect(record: Dict[str, Any]) -> None:
+        if record["error"]:
+            raise RuntimeError(f"Part {record['id']} failed: {record['error']}")
+        responses.append(record["response"] or "")
+        if on_result:
+            on_result(record)
+
+    run_batch(client, items, collect, model=model, system=system, concurrency=concurrency)
+    return responses
+
+
+def build_prompt(
+    client: OpenAIClient,
+    message: str,
+    paths: List[str],
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+    concurrency: int = 4,
+    max_tokens: Optional[int] = None,
+    on_result: Optional[Callable[[Dict[str, Any]], None]] = None,
+) -> str:
+    """Build the prompt for a request about files or stdin
+
+    Input that fits one request is attached to the message as is. Longer
+    input is split into token-bounded chunks that are answered concurrently
+    (map), and the returned prompt asks to combine those answers (reduce).
+
+    Args:
+        client: Client to send map requests with
+        message: User request, may be empty
+        paths: File paths, "-" for stdin
+        model: Model name, or None for the profile's default
+        system: Optional system message
+        concurrency: Maximum number of map requests in flight
+        max_tokens: Token limit per chunk, or None to fit the model's context
+        on_result: Called with each map result record, in input order
+
+    Returns:
+        str: Prompt to send as the user message
+    """
+    model_name = model or client.profile.default_model
+    max_tokens = max_tokens or chunk_budget(client, model, message, system)
+    chunks = iter_chunks(read_lines(paths), max_tokens, model_name)
+
+    # Look ahead one chunk: a single one needs no map-reduce
+    head = list(itertools.islice(chunks, 2))
+    if len(head) < 2:
+        return attach(message, head[0] if head else "")
+
+    partials = map_chunks(client, message, itertools.chain(head, chunks), model, system, concurrency, on_result)
+    return reduce_partials(client, message, partials, max_tokens, model, system, concurrency)
@@ -0,0 +1,310 @@
+import json
+import os
+import sqlite3
+import tempfile
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, TextIO
+
+from default import JOBS_DIR
+
+if TYPE_CHECKING:
+    # The index is read by every 'jobs' command; openai is only loaded to talk to the provider
+    from openai.types import Batch
+
+    from core.openai_client import OpenAIClient
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    profile TEXT NOT NULL,
+    model TEXT NOT NULL,
+    input TEXT NOT NULL,
+    input_file_id TEXT NOT NULL,
+    status TEXT NOT NULL,
+    total INTEGER NOT NULL,
+    completed INTEGER NOT NULL DEFAULT 0,
+    failed INTEGER NOT NULL DEFAULT 0,
+    output_file_id TEXT,
+    error_file_id TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_created ON jobs (created);
+"""
+
+ENDPOINT = "/v1/chat/completions"
+
+# Statuses after which a job no longer changes
+FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+
+class JobIndex:
+    """Local index of Batch API jobs submitted from this machine
+
+    The provider keeps the jobs and their files; the index remembers which
+    ones were submitted, with which profile, and their last known state.
+    """
+
+    def __init__(self, path: Path = JOBS_DIR):
+        """Initialize index
+
+        Args:
+            path: Directory holding the index
+        """
+        self.path = path
+        self._db: Optional[sqlite3.Connection] = None
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Index connection, created on first use"""
+        if self._db is None:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._db = sqlite3.connect(self.path / "index.sqlite3", timeout=30, isolation_level=None)
+            self._db.row_factory = sqlite3.Row
+            self._db.execute("PRAGMA journal_mode=WAL")
+            self._db.executescript(SCHEMA)
+        return self._db
+
+    def add(self, batch: "Batch", profile: str, model: str, input_name: str, total: int) -> None:
+        """Record a submitted job
+
+        Args:
+            batch: Batch as created by the provider
+            profile: Profile name
+            model: Default model of the job
+            input_name: Prompts file the job was built from
+            total: Number of requests
+        """
+        now = time.time()
+        self.db.execute(
+            "INSERT INTO jobs (id, profile, model, input, input_file_id, status, total, created, updated) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (batch.id, profile, model, input_name, batch.input_file_id, batch.status, total, now, now),
+        )
+        self.update(batch)
+
+    def update(self, batch: "Batch") -> None:
+        """Store the latest state of a job
+
+        Args:
+            batch: Batch as returned by the provider
+        """
+        counts = batch.request_counts
+        self.db.execute(
+            "UPDATE jobs SET status = ?, completed = COALESCE(?, completed), failed = COALESCE(?, failed), "
+            "output_file_id = ?, error_file_id = ?, updated = ? WHERE id = ?",
+            (
+                batch.status,
+                counts.completed if counts else None,
+                counts.failed if counts else None,
+                batch.output_file_id,
+                batch.error_file_id,
+                time.time(),
+                batch.id,
+            ),
+        )
+
+    def get(self, job_id: str) -> Optional[sqlite3.Row]:
+        """Find a job by id or unique id prefix
+
+        Args:
+            job_id: Full id or prefix
+
+        Returns:
+            Optional[sqlite3.Row]: Job row, or None if not found or ambiguous
+        """
+        rows = self.db.execute(
+            "SELECT * FROM jobs WHERE id >= ? AND id < ? ORDER BY id LIMIT 2",
+            (job_id, job_id + "\uffff"),
+        ).fetchall()
+        return rows[0] if len(rows) == 1 else None
+
+    def list_jobs(self, limit: int = 20) -> List[sqlite3.Row]:
+        """List jobs, most recent first
+
+        Args:
+            limit: Maximum number of jobs
+
+        Returns:
+            List[sqlite3.Row]: Job rows
+        """
+        return self.db.execute("SELECT * FROM jobs ORDER BY created DESC LIMIT ?", (limit,)).fetchall()
+
+
+def write_requests(
+    client: "OpenAIClient",
+    items: Iterable[Dict[str, Any]],
+    sink: TextIO,
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+) -> int:
+    """Write prompts as Batch API request lines
+
+    Each request gets the parameters ``chat_completion`` would send, from
+    the same model configuration, and the prompt id as ``custom_id``.
+
+    Args:
+        client: Client whose profile and model settings to use
+        items: Prompt items, as read by ``batch.read_prompts``
+        sink: Text stream to write JSONL to
+        model: Model name to use, or None for default
+        system: System message used when an item has none
+
+    Returns:
+        int: Number of requests written
+
+    Raises:
+        ValueError: If an item is invalid or two prompts share an id
+    """
+    seen = set()
+    for item in items:
+        if "invalid" in item:
+            raise ValueError(item["invalid"])
+        custom_id = str(item["id"])
+        if custom_id in seen:
+            raise ValueError(f"Prompt id '{custom_id}' is used more than once")
+        seen.add(custom_id)
+
+        messages = []
+        system_message = item.get("system") or system
+        if system_message:
+            messages.append({"role": "system", "content": system_message})
+        messages.append({"role": "user", "content": item["prompt"]})
+        params = client.build_params(messages, item.get("model") or model)
+        body = {key: value for key, value in params.items() if value is not None}
+        sink.write(json.dumps({"custom_id": custom_id, "method": "POST", "url": ENDPOINT, "body": body}) + "\n")
+    return len(seen)
+
+
+def submit(
+    client: "OpenAIClient",
+    items: Iterable[Dict[str, Any]],
+    input_name: str,
+    model: Optional[str] = None,
+    system: Optional[str] = None,
+    completion_window: str = "24h",
+    index: Optional[JobIndex] = None,
+) -> "Batch":
+    """Upload prompts and create a Batch API job
+
+    The request file is written to a temporary file next to the index and
+    uploaded from there, so prompts are never all held in memory.
+
+    Args:
+        client: Client of the profile to submit with
+        items: Prompt items
+        input_name: Name of the prompts file, for the index
+        model: Model name to use, or None for default
+        system: System message used when an item has none
+        completion_window: Time the provider has to finish the job
+        index: Index to record the job in, or None for the default
+
+    Returns:
+        Batch: Created job
+
+    Raises:
+        ValueError: If there are no prompts, or an item is invalid
+    """
+    index = index or JobIndex()
+    index.path.mkdir(parents=True, exist_ok=True)
+    fd, path = tempfile.mkstemp(prefix="requests-", suffix=".jsonl", dir=index.path)
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as sink:
+            total = write_requests(client, items, sink, model, system)
+        if not total:
+            raise ValueError("No prompts to submit")
+        with open(path, "rb") as f:
+            uploaded = client.client.files.create(file=(Path(input_name).name + ".batch.jsonl", f), purpose="batch")
+    finally:
+        os.unlink(path)
+
+    batch = client.client.batches.create(
+        input_file_id=uploaded.id,
+        endpoint=ENDPOINT,
+        completion_window=completion_window,
+        metadata={"source": "termgpt", "input": Path(input_name).name},
+    )
+    index.add(batch, client.profile.name, model or client.profile.default_model, input_name, total)
+    return batch
+
+
+def refresh(client: "OpenAIClient", job_id: str, index: Optional[JobIndex] = None) -> "Batch":
+    """Get the current state of a job and store it in the index
+
+    Args:
+        client: Client of the profile the job was submitted with
+        job_id: Job id
+        index: Index to update, or None for the default
+
+    Returns:
+        Batch: Job as reported by the provider
+    """
+    batch = client.client.batches.retrieve(job_id)
+    (index or JobIndex()).update(batch)
+    return batch
+
+
+def cancel(client: "OpenAIClient", job_id: str, index: Optional[JobIndex] = None) -> "Batch":
+    """Ask the provider to cancel a job
+
+    Args:
+        client: Client of the profile the job was submitted with
+        job_id: Job id
+        index: Index to update, or None for the default
+
+    Returns:
+        Batch: Job, usually "cancelling" until running requests end
+    """
+    batch = client.client.batches.cancel(job_id)
+    (index or JobIndex()).update(batch)
+    return batch
+
+
+def result_record(line: Dict[str, Any]) -> Dict[str, Any]:
+    """Convert a Batch API output or error line to a result record
+
+    Records have the same shape as those of ``termgpt chat batch``.
+
+    Args:
+        line: Parsed output line
+
+    Returns:
+        Dict[str, Any]: Result record
+    """
+    record: Dict[str, Any] = {"id": line.get("custom_id"), "model": None, "response": None, "usage": None, "error": None}
+    response = line.get("response") or {}
+    body = response.get("body") or {}
+    if line.get("error"):
+        record["error"] = line["error"].get("message") or str(line["error"])
+    elif response.get("status_code") != 200:
+        error = body.get("error") or {}
+        record["error"] = error.get("message") or f"HTTP {response.get('status_code')}"
+    else:
+        record["model"] = body.get("model")
+        record["response"] = body["choices"][0]["message"]["content"]
+        record["usage"] = body.get("usage")
+    return record
+
+
+def download_results(client: "OpenAIClient", file_id: str, sink: TextIO) -> Dict[str, int]:
+    """Stream a results file to JSONL records, one line at a time
+
+    Args:
+        client: Client of the profile the job was submitted with
+        file_id: Output or error file id
+        sink: Text stream to write result records to
+
+    Returns:
+        Dict[str, int]: Number of "ok" and "failed" records
+    """
+    counts = {"ok": 0, "failed": 0}
+    with client.client.files.with_streaming_response.content(file_id) as response:
+        for line in response.iter_lines():
+            if not line.strip():
+                continue
+            record = result_record(json.loads(line))
+            counts["ok" if record["error"] is None else "failed"] += 1
+            sink.write(json.dumps(record) + "\n")
+    sink.flush()
+    return counts
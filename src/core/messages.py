@@ -0,0 +1,197 @@
+import hashlib
+import json
+import os
+import sys
+import tempfile
+import threading
+from typing import Any, Dict, Iterator, Optional, Tuple
+
+from core import tokens
+
+
+class SpillFile:
+    """Temporary file holding message bodies moved out of memory
+
+    Bodies are appended and read back by offset. The file is unlinked on
+    creation, so it goes away with the process.
+    """
+
+    def __init__(self, directory: Optional[str] = None):
+        """Create spill file
+
+        Args:
+            directory: Directory for the file, or None for the system default
+        """
+        self._file = tempfile.TemporaryFile(prefix="termgpt-spill-", dir=directory)
+        self._size = 0
+        self._lock = threading.Lock()
+
+    def write(self, content: str) -> Tuple[int, int]:
+        """Append a message body
+
+        Args:
+            content: Message content
+
+        Returns:
+            Tuple[int, int]: Offset and length in bytes
+        """
+        data = content.encode("utf-8")
+        with self._lock:
+            offset = self._size
+            self._file.seek(offset)
+            self._file.write(data)
+            self._file.flush()
+            self._size += len(data)
+        return offset, len(data)
+
+    def read(self, offset: int, length: int) -> str:
+        """Read a message body back
+
+        Args:
+            offset: Offset returned by write
+            length: Length returned by write
+
+        Returns:
+            str: Message content
+        """
+        return os.pread(self._file.fileno(), length, offset).decode("utf-8")
+
+    @property
+    def size(self) -> int:
+        """Bytes spilled so far"""
+        return self._size
+
+
+class Message(dict):
+    """A conversation message with cached token counts and digest
+
+    Messages are dicts with role and content (plus ``tool_calls`` or
+    ``tool_call_id`` for tool calling), so they go to the SDK, the
+    caches and transcripts as they are. They never change once created,
+    which lets each one keep its token count per model, the digest of its
+    canonical JSON (for cache keys) and its rendered Markdown. The body of
+    an old message can be spilled to disk; reading ``message["content"]``
+    then loads it back.
+    """
+
+    __slots__ = ("_tokens", "_digest", "_rendered", "_spill")
+
+    def __init__(self, role: str, content: Optional[str], counts: Optional[Dict[str, int]] = None, **fields: Any):
+        """Create message
+
+        Args:
+            role: Message role
+            content: Message content, None for an assistant's tool calls
+            counts: Known token counts by model, e.g. of a stored prompt
+            **fields: Other message fields, e.g. tool_calls or tool_call_id
+        """
+        # A few distinct roles across thousands of messages
+        super().__init__(role=sys.intern(role), content=content, **fields)
+        self._tokens = dict(counts) if counts else None
+        self._digest: Optional[bytes] = None
+        self._rendered: Any = None
+        self._spill: Optional[Tuple[SpillFile, int, int]] = None
+
+    def __getitem__(self, key: str) -> Any:
+        if key == "content" and self._spill is not None:
+            store, offset, length = self._spill
+            return store.read(offset, length)
+        return dict.__getitem__(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        # Defined so dict(message) and {**message} copy through __getitem__
+        # instead of the raw storage, which holds None once spilled
+        return dict.__iter__(self)
+
+    def get(self, key: str, default: Any = None) -> Any:
+        return self[key] if key in self else default
+
+    def items(self) -> Iterator[Tuple[str, Any]]:  # type: ignore[override]
+        return iter([(key, self[key]) for key in self])
+
+    def values(self) -> Iterator[Any]:  # type: ignore[override]
+        return iter([self[key] for key in self])
+
+    @property
+    def spilled(self) -> bool:
+        """Whether the body is on disk"""
+        return self._spill is not None
+
+    def tokens(self, model: str) -> int:
+        """Count tokens of the message, once per model
+
+        Args:
+            model: Model name
+
+        Returns:
+            int: Token count including per-message overhead
+        """
+        if self._tokens is None:
+            self._tokens = {}
+        count = self._tokens.get(model)
+        if count is None:
+            count = self._tokens[model] = tokens.count_message_tokens(self, model)
+        return count
+
+    @property
+    def digest(self) -> bytes:
+        """SHA-256 of the message's canonical JSON, computed once"""
+        if self._digest is None:
+            self._digest = digest(dict(self))
+        return self._digest
+
+    def rendered(self) -> Any:
+        """Get the content as Markdown, parsed once
+
+        Returns:
+            rich.markdown.Markdown: Renderable
+        """
+        if self._rendered is not None:
+            return self._rendered
+        from rich.markdown import Markdown
+
+        rendered = Markdown(self["content"])
+        # Keeping the parse would pin a spilled body in memory again
+        if self._spill is None:
+            self._rendered = rendered
+        return rendered
+
+    def spill(self, store: SpillFile) -> None:
+        """Move the body to disk, keeping role, token counts and digest
+
+        Args:
+            store: File to write the body to
+        """
+        if self._spill is not None:
+            return
+        self.digest
+        self._spill = (store,) + store.write(dict.__getitem__(self, "content"))
+        dict.__setitem__(self, "content", None)
+        self._rendered = None
+
+    def loaded(self) -> "Message":
+        """Get the message with its body in memory
+
+        Returns:
+            Message: This message, or a copy with the body read back if spilled
+        """
+        if self._spill is None:
+            return self
+        message = Message(**dict(self), counts=self._tokens)
+        message._digest = self._digest
+        return message
+
+
+def digest(message: Dict[str, Any]) -> bytes:
+    """Get the digest of a message's canonical JSON
+
+    Args:
+        message: Message, or a plain dict with role and content
+
+    Returns:
+        bytes: SHA-256 digest
+    """
+    if isinstance(message, Message):
+        return message.digest
+    payload = json.dumps(message, sort_keys=True, separators=(",", ":"), ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).digest()
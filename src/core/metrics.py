@@ -0,0 +1,186 @@
+import atexit
+import json
+import math
+import os
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Any, Dict, Iterator, List, Optional
+
+from default import METRICS_FILE, METRICS_FLUSH_EVERY, METRICS_MAX_BYTES, MODEL_PRICING
+
+_counters: Dict[str, float] = defaultdict(float)
+_spans: List[Dict[str, Any]] = []
+_lock = threading.Lock()
+_recording = True
+
+
+def increment(name: str, amount: float = 1) -> None:
+    """Add to a process-wide counter
+
+    Args:
+        name: Counter name, e.g. "api.retries"
+        amount: Amount to add
+    """
+    with _lock:
+        _counters[name] += amount
+
+
+def counters() -> Dict[str, float]:
+    """Get a snapshot of all counters
+
+    Returns:
+        Dict[str, float]: Counter values by name
+    """
+    with _lock:
+        return dict(_counters)
+
+
+@contextmanager
+def span(name: str, **attrs: Any) -> Iterator[Dict[str, Any]]:
+    """Time a block and record it in the metrics log
+
+    The yielded dict can be filled with more attributes (token usage,
+    cache hits, ...) before the block ends.
+
+    Args:
+        name: Span name, e.g. "chat.completion"
+        **attrs: Attributes to record with the span
+
+    Returns:
+        Iterator[Dict[str, Any]]: Mutable span attributes
+    """
+    started = time.perf_counter()
+    record: Dict[str, Any] = dict(attrs)
+    try:
+        yield record
+    except BaseException as e:
+        record["error"] = type(e).__name__
+        raise
+    finally:
+        record.update(span=name, ts=time.time(), duration=time.perf_counter() - started)
+        add_span(record)
+
+
+def set_recording(enabled: bool) -> None:
+    """Turn writing spans to the metrics log on or off for this process
+
+    Benchmarks turn it off, so synthetic requests don't show up in stats.
+    Usage is recorded in the budget ledger either way (see
+    budget.set_ledger).
+
+    Args:
+        enabled: Whether to record spans
+    """
+    global _recording
+    _recording = enabled
+
+
+def is_recording() -> bool:
+    """Whether requests of this process are recorded"""
+    return _recording
+
+
+def add_span(record: Dict[str, Any]) -> None:
+    """Buffer a span record, flushing to the log in batches
+
+    Args:
+        record: Span with at least "span", "ts" and "duration"
+    """
+    if not _recording:
+        return
+    with _lock:
+        _spans.append(record)
+        full = len(_spans) >= METRICS_FLUSH_EVERY
+    if full:
+        flush()
+
+
+def flush(path: Path = METRICS_FILE) -> None:
+    """Append buffered spans to the metrics log
+
+    Args:
+        path: Metrics log file
+    """
+    with _lock:
+        records = _spans[:]
+        _spans.clear()
+    if not records:
+        return
+
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        if path.exists() and path.stat().st_size > METRICS_MAX_BYTES:
+            # Keep one previous generation, so the log can't grow without bound
+            os.replace(path, path.with_suffix(".jsonl.1"))
+        pid = os.getpid()
+        lines = "".join(json.dumps({**record, "pid": pid}, default=str) + "\n" for record in records)
+        # A single append keeps lines from concurrent processes intact
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(lines)
+    except OSError:
+        # Metrics must never break a command
+        pass
+
+
+atexit.register(flush)
+
+
+def read_spans(path: Path = METRICS_FILE, since: Optional[float] = None) -> Iterator[Dict[str, Any]]:
+    """Read span records from the metrics log
+
+    Args:
+        path: Metrics log file
+        since: Only spans recorded at or after this timestamp
+
+    Returns:
+        Iterator[Dict[str, Any]]: Span records, oldest first
+    """
+    for log in (path.with_suffix(".jsonl.1"), path):
+        if not log.exists():
+            continue
+        with open(log, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    continue
+                if since is None or record.get("ts", 0) >= since:
+                    yield record
+
+
+def percentile(values: List[float], pct: float) -> float:
+    """Get a percentile by nearest rank
+
+    Args:
+        values: Sorted values
+        pct: Percentile between 0 and 100
+
+    Returns:
+        float: Value at the percentile, or 0.0 if there are no values
+    """
+    if not values:
+        return 0.0
+    rank = max(0, min(len(values) - 1, math.ceil(pct / 100 * len(values)) - 1))
+    return values[rank]
+
+
+def cost(model: str, prompt_tokens: int, completion_tokens: int) -> Optional[float]:
+    """Estimate the cost of a request from the pricing table
+
+    Args:
+        model: Model name
+        prompt_tokens: Input tokens
+        completion_tokens: Output tokens
+
+    Returns:
+        Optional[float]: Cost in USD, or None if the model has no known price
+    """
+    # Longest matching prefix wins, so "gpt-4o-mini" beats "gpt-4o"
+    for prefix in sorted(MODEL_PRICING, key=len, reverse=True):
+        if model.startswith(prefix):
+            input_price, output_price = MODEL_PRICING[prefix]
+            return (prompt_tokens * input_price + completion_tokens * output_price) / 1_000_000
+    return None
@@ -0,0 +1,329 @@
+import json
+import multiprocessing
+import random
+import secrets
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Iterator, Optional
+
+DEFAULT_RESPONSE = "Hello from the termgpt mock server."
+
+
+class MockHandler(BaseHTTPRequestHandler):
+    """OpenAI-compatible chat completions endpoint with canned answers"""
+
+    protocol_version = "HTTP/1.1"
+    # Headers and body go out in separate writes; don't let Nagle hold the body
+    disable_nagle_algorithm = True
+    server: "MockServer"
+
+    def log_message(self, format: str, *args: Any) -> None:
+        pass
+
+    def do_POST(self) -> None:
+        length = int(self.headers.get("Content-Length", 0))
+        body = self.rfile.read(length)
+        path = self.path.rstrip("/")
+        if path.endswith("/files"):
+            self._send_json(200, self.server.upload(self.headers["Content-Type"], body))
+            return
+        if path.endswith("/batches"):
+            self._send_json(200, self.server.create_batch(json.loads(body)))
+            return
+        if path.endswith("/cancel") and "/batches/" in path:
+            self._send_batch(path.split("/")[-2], cancel=True)
+            return
+        if not path.endswith("/chat/completions"):
+            self._not_found()
+            return
+        params = json.loads(body or b"{}")
+
+        self.server.count_request()
+        time.sleep(self.server.latency)
+        if self.server.error_rate and random.random() < self.server.error_rate:
+            self._send_json(self.server.error_status, {"error": {"message": "Mock server error", "type": "server_error"}})
+            return
+        if params.get("stream"):
+            self._stream(params)
+        else:
+            self._send_json(200, self.server.completion(params["model"], params))
+
+    def do_GET(self) -> None:
+        path = self.path.rstrip("/")
+        if path.endswith("/models"):
+            # Model list, as used to warm up connections
+            self._send_json(200, {"object": "list", "data": [{"id": "mock", "object": "model", "created": 0, "owned_by": "termgpt"}]})
+        elif "/batches/" in path:
+            self._send_batch(path.split("/")[-1])
+        elif path.endswith("/content") and "/files/" in path:
+            content = self.server.files.get(path.split("/")[-2])
+            if content is None:
+                self._not_found()
+                return
+            self.send_response(200)
+            self.send_header("Content-Type", "application/octet-stream")
+            self.send_header("Content-Length", str(len(content)))
+            self.end_headers()
+            self.wfile.write(content)
+        else:
+            self._not_found()
+
+    def _send_batch(self, batch_id: str, cancel: bool = False) -> None:
+        batch = self.server.advance_batch(batch_id, cancel)
+        if batch is None:
+            self._not_found()
+        else:
+            self._send_json(200, batch)
+
+    def _not_found(self) -> None:
+        self._send_json(404, {"error": {"message": f"Unknown path {self.path}", "type": "invalid_request_error"}})
+
+    def _send_json(self, status: int, body: Dict[str, Any]) -> None:
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, params: Dict[str, Any]) -> None:
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        for chunk in self.server.chunks(params["model"], params.get("stream_options")):
+            self._write_chunk(f"data: {json.dumps(chunk)}\n\n".encode())
+            if self.server.chunk_delay:
+                time.sleep(self.server.chunk_delay)
+        self._write_chunk(b"data: [DONE]\n\n")
+        self.wfile.write(b"0\r\n\r\n")
+
+    def _write_chunk(self, data: bytes) -> None:
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class MockServer(ThreadingHTTPServer):
+    """Local OpenAI-compatible server for benchmarks and offline testing
+
+    Point a profile's ``base_url`` at ``server.url``. Every request gets
+    the same response after a fixed latency, so timings measure termgpt
+    rather than the network. A share of requests can be failed to
+    exercise retries. Uploaded files and Batch API jobs are kept in
+    memory; a job moves one status further on every retrieve and answers
+    each request with the same response.
+    """
+
+    daemon_threads = True
+    # Room for many concurrent clients connecting at once
+    request_queue_size = 1024
+
+    def __init__(
+        self,
+        port: int = 0,
+        latency: float = 0.0,
+        response: str = DEFAULT_RESPONSE,
+        chunk_size: int = 16,
+        chunk_delay: float = 0.0,
+        error_rate: float = 0.0,
+        error_status: int = 500,
+    ):
+        """Initialize mock server on localhost
+
+        Args:
+            port: Port to listen on, or 0 for any free port
+            latency: Seconds to wait before answering each request
+            response: Assistant message content to answer with
+            chunk_size: Characters per streamed chunk
+            chunk_delay: Seconds between streamed chunks
+            error_rate: Share of requests (0-1) answered with an error
+            error_status: HTTP status of failed requests
+        """
+        super().__init__(("127.0.0.1", port), MockHandler)
+        self.latency = latency
+        self.response = response
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.requests = 0
+        self.files: Dict[str, bytes] = {}
+        self.batches: Dict[str, Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        """Base URL to configure clients with"""
+        return f"http://127.0.0.1:{self.server_address[1]}/v1"
+
+    def __enter__(self) -> "MockServer":
+        self._thread = threading.Thread(target=self.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.shutdown()
+        self.server_close()
+
+    def handle_error(self, request: Any, client_address: Any) -> None:
+        # Clients that time out or cancel just hang up
+        if not isinstance(sys.exc_info()[1], ConnectionError):
+            super().handle_error(request, client_address)
+
+    def count_request(self) -> None:
+        with self._lock:
+            self.requests += 1
+
+    def upload(self, content_type: str, body: bytes) -> Dict[str, Any]:
+        """Store an uploaded file and build its file object"""
+        message = BytesParser(policy=policy.HTTP).parsebytes(f"Content-Type: {content_type}\r\n\r\n".encode() + body)
+        parts = {part.get_param("name", header="content-disposition"): part for part in message.iter_parts()}
+        with self._lock:
+            file_id = f"file-{secrets.token_hex(8)}"
+            self.files[file_id] = parts["file"].get_payload(decode=True)
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(self.files[file_id]),
+            "created_at": int(time.time()),
+            "filename": parts["file"].get_filename(),
+            "purpose": parts["purpose"].get_payload(),
+            "status": "processed",
+        }
+
+    def create_batch(self, params: Dict[str, Any]) -> Dict[str, Any]:
+        """Create a Batch API job over an uploaded file"""
+        lines = [line for line in self.files[params["input_file_id"]].splitlines() if line.strip()]
+        with self._lock:
+            batch_id = f"batch_{secrets.token_hex(8)}"
+            self.batches[batch_id] = {
+                "id": batch_id,
+                "object": "batch",
+                "endpoint": params["endpoint"],
+                "input_file_id": params["input_file_id"],
+                "completion_window": params["completion_window"],
+                "created_at": int(time.time()),
+                "status": "validating",
+                "metadata": params.get("metadata"),
+                "request_counts": {"total": len(lines), "completed": 0, "failed": 0},
+            }
+            return dict(self.batches[batch_id])
+
+    def advance_batch(self, batch_id: str, cancel: bool = False) -> Optional[Dict[str, Any]]:
+        """Move a job to its next status, running it on completion"""
+        with self._lock:
+            batch = self.batches.get(batch_id)
+            if batch is None:
+                return None
+            if cancel and batch["status"] in ("validating", "in_progress"):
+                batch["status"] = "cancelled"
+            elif batch["status"] == "validating":
+                batch["status"] = "in_progress"
+            elif batch["status"] == "in_progress":
+                self._run_batch(batch)
+            return dict(batch)
+
+    def _run_batch(self, batch: Dict[str, Any]) -> None:
+        outputs, errors = [], []
+        for line in self.files[batch["input_file_id"]].splitlines():
+            if not line.strip():
+                continue
+            request = json.loads(line)
+            if self.error_rate and random.random() < self.error_rate:
+                body = {"error": {"message": "Mock server error", "type": "server_error"}}
+                errors.append({"custom_id": request["custom_id"], "response": {"status_code": self.error_status, "body": body}})
+            else:
+                body = self.completion(request["body"]["model"])
+                outputs.append({"custom_id": request["custom_id"], "response": {"status_code": 200, "body": body}})
+        for key, records in (("output_file_id", outputs), ("error_file_id", errors)):
+            if records:
+                file_id = f"file-{secrets.token_hex(8)}"
+                self.files[file_id] = "".join(json.dumps(r) + "\n" for r in records).encode()
+                batch[key] = file_id
+        batch["status"] = "completed"
+        batch["completed_at"] = int(time.time())
+        batch["request_counts"].update(completed=len(outputs), failed=len(errors))
+
+    def usage(self) -> Dict[str, int]:
+        completion = max(len(self.response) // 4, 1)
+        return {"prompt_tokens": 10, "completion_tokens": completion, "total_tokens": 10 + completion}
+
+    def completion(self, model: str, params: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """Build a chat.completion response body
+
+        With tools, the first response calls every tool once, with no
+        arguments, and the next one quotes their results.
+        """
+        message: Dict[str, Any] = {"role": "assistant", "content": self.response}
+        finish_reason = "stop"
+        params = params or {}
+        if params.get("tools") and params.get("tool_choice") != "none":
+            last = params["messages"][-1]
+            if last["role"] == "tool":
+                results = [m["content"] for m in params["messages"] if m["role"] == "tool"]
+                message["content"] = f"{self.response} Tool results: {' | '.join(results)}"
+            else:
+                message = {"role": "assistant", "content": None, "tool_calls": [
+                    {"id": f"call_{secrets.token_hex(6)}", "type": "function", "function": {"name": tool["function"]["name"], "arguments": "{}"}}
+                    for tool in params["tools"]
+                ]}
+                finish_reason = "tool_calls"
+        return {
+            "id": "chatcmpl-mock",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": message,
+                "finish_reason": finish_reason,
+            }],
+            "usage": self.usage(),
+        }
+
+    def chunks(self, model: str, stream_options: Optional[Dict[str, Any]] = None):
+        """Build the chat.completion.chunk bodies of a streamed response"""
+        base = {"id": "chatcmpl-mock", "object": "chat.completion.chunk", "created": int(time.time()), "model": model}
+        for start in range(0, len(self.response), self.chunk_size):
+            delta = {"content": self.response[start:start + self.chunk_size]}
+            yield {**base, "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+        yield {**base, "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}]}
+        if stream_options and stream_options.get("include_usage"):
+            yield {**base, "choices": [], "usage": self.usage()}
+
+
+def _serve(conn: Any, options: Dict[str, Any]) -> None:
+    server = MockServer(**options)
+    conn.send(server.url)
+    server.serve_forever()
+
+
+@contextmanager
+def mock_server_process(**options: Any) -> Iterator[str]:
+    """Run a MockServer in a child process
+    
+    Keeps the server's threads from competing with the client being
+    measured for the GIL.
+    
+    Args:
+        **options: Passed to MockServer
+        
+    Yields:
+        str: Base URL of the server
+    """
+    parent, child = multiprocessing.Pipe()
+    process = multiprocessing.Process(target=_serve, args=(child, options), daemon=True)
+    process.start()
+    try:
+        if not parent.poll(10):
+            raise RuntimeError("Mock server did not start")
+        yield parent.recv()
+    finally:
+        process.terminate()
+        process.join()
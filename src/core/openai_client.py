@@ -1,26 +1,86 @@
+import asyncio
+import sys
+import time
+
 import openai
+from openai.types.chat import ChatCompletion
 from rich import print as rprint
-from typing import Dict, List, Optional, Any
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Any
 
+from core import budget, metrics, ratelimit, retry, tokens
+from core.cache import ResponseCache, make_key
+from core.messages import Message
+from default import WARMUP_TIMEOUT
 from settings import ProfileConfig, ModelConfig
 
 
-class OpenAIClient:
-    """Client for interacting with OpenAI API"""
+class BaseClient:
+    """Profile, model and cache handling shared by the sync and async clients
+    
+    Subclasses create the SDK client in ``_connect`` and send requests.
+    """
     
-    def __init__(self, profile: ProfileConfig):
+    def __init__(
+        self,
+        profile: ProfileConfig,
+        cache: Optional[ResponseCache] = None,
+        refresh_cache: bool = False,
+        http_client: Optional[Any] = None,
+    ):
         """Initialize OpenAI client with profile settings
         
         Args:
             profile: User profile with API key and model settings
+            cache: Response cache to read and fill, or None to disable
+            refresh_cache: Skip cache lookups but still store responses
+            http_client: httpx client to send requests with, or None for the SDK default
         """
         self.profile = profile
-        self.client = openai.OpenAI(api_key=profile.api_key)
+        self.cache = cache
+        self.refresh_cache = refresh_cache
+        # Token usage of the latest request, None if it was answered from cache
+        self.last_usage: Optional[Dict[str, int]] = None
+        with metrics.span("client.init", profile=profile.name):
+            self.client = self._connect(http_client)
         
         # Validate API key is set
         if not profile.api_key:
             raise ValueError("API key not set. Run 'termgpt config set-api-key' first.")
     
+    def _connect(self, http_client: Optional[Any] = None) -> Any:
+        """Create the underlying SDK client
+        
+        Args:
+            http_client: httpx client to use, or None for the SDK default
+            
+        Returns:
+            SDK client
+        """
+        raise NotImplementedError
+    
+    def estimate_tokens(self, params: Dict[str, Any]) -> int:
+        """Estimate the tokens a request will use, for rate limiting
+        
+        Args:
+            params: Request parameters
+            
+        Returns:
+            int: Prompt tokens plus the completion limit
+        """
+        model = params["model"]
+        prompt = sum(self._message_tokens(m, model) for m in params["messages"])
+        return prompt + (params.get("max_tokens") or 0)
+    
+    @staticmethod
+    def _message_tokens(message: Dict[str, Any], model: str) -> int:
+        """Count tokens of a request message with the cheapest cache at hand"""
+        if isinstance(message, Message):
+            # Counted once per message, without keeping its content in an LRU
+            return message.tokens(model)
+        if message["role"] == "system":
+            return tokens.count_system_tokens(message["content"] or "", model)
+        return tokens.count_turn_tokens(message["content"] or "", model)
+    
     def get_model_config(self, model_name: Optional[str] = None) -> ModelConfig:
         """Get configuration for specified model or default model
         
@@ -34,10 +94,7 @@ class OpenAIClient:
             model_name = self.profile.default_model
             
         # Find model config
-        model_config = next(
-            (m for m in self.profile.models if m.name == model_name), 
-            None
-        )
+        model_config = self.profile.get_model(model_name)
         
         # If not found, use first model or create default
         if not model_config and self.profile.models:
@@ -47,21 +104,21 @@ class OpenAIClient:
             
         return model_config
     
-    def chat_completion(
-        self, 
-        messages: List[Dict[str, str]], 
+    def build_params(
+        self,
+        messages: List[Dict[str, str]],
         model: Optional[str] = None,
         **kwargs
     ) -> Dict[str, Any]:
-        """Send chat completion request to OpenAI API
-        
+        """Build request parameters for a chat completion
+
         Args:
             messages: List of message objects with role and content
             model: Model name to use, or None for default
             **kwargs: Additional parameters to pass to API
-            
+
         Returns:
-            Dict: API response
+            Dict: Request parameters
         """
         # Get model name and config
         model_name = model or self.profile.default_model
@@ -80,10 +137,483 @@ class OpenAIClient:
         
         # Override with any provided kwargs
         params.update(kwargs)
+        return params
+
+    def _record_usage(self, span: Dict[str, Any], usage: Any, estimated_tokens: int) -> None:
+        """Copy token usage onto a metrics span and correct the rate limiter"""
+        span["prompt_tokens"] = usage.prompt_tokens
+        span["completion_tokens"] = usage.completion_tokens
+        self.last_usage = {"prompt_tokens": usage.prompt_tokens, "completion_tokens": usage.completion_tokens}
+        # Prompt tokens served from the provider's prompt cache, if reported
+        details = getattr(usage, "prompt_tokens_details", None)
+        if details is not None and details.cached_tokens is not None:
+            span["cached_tokens"] = details.cached_tokens
+            self.last_usage["cached_tokens"] = details.cached_tokens
+        ratelimit.get_limiter(self.profile).record_usage(estimated_tokens, usage.total_tokens)
+        self._settle_budget(span["model"], usage.prompt_tokens, usage.completion_tokens, estimated_tokens)
+    
+    def _record_estimate(self, span: Dict[str, Any], params: Dict[str, Any], estimated_tokens: int, text: str = "") -> None:
+        """Record the likely usage of a request whose response reported none
+        
+        A stream closed before its usage chunk (e.g. on Ctrl+C) was still
+        paid for, so its prompt estimate and the tokens of the text received
+        count against the rate limits and budget.
+        """
+        prompt_tokens = estimated_tokens - (params.get("max_tokens") or 0)
+        completion_tokens = tokens.count_tokens(text, span["model"]) if text else 0
+        ratelimit.get_limiter(self.profile).record_usage(estimated_tokens, prompt_tokens + completion_tokens)
+        self._settle_budget(span["model"], prompt_tokens, completion_tokens, estimated_tokens)
+    
+    def _settle_budget(self, model: str, prompt_tokens: int, completion_tokens: int, estimated_tokens: int) -> None:
+        """Record usage in the ledger, settling the request's reservation"""
+        budget.get_ledger().record(self.profile.name, model, prompt_tokens, completion_tokens, reserved=estimated_tokens)
+    
+    def _reserve_budget(self, params: Dict[str, Any], estimated_tokens: int) -> None:
+        """Reserve a request's estimate, refusing it if it could take the profile over its budget
+        
+        Raises:
+            BudgetExceededError: If a daily or monthly limit could be exceeded
+        """
+        completion = params.get("max_tokens") or 0
+        budget.get_ledger().reserve(self.profile, params["model"], estimated_tokens - completion, completion)
+    
+    def _release_budget(self, params: Dict[str, Any], estimated_tokens: int) -> None:
+        """Give back the reservation of a request that got no response"""
+        budget.get_ledger().release(self.profile, params["model"], estimated_tokens)
+    
+    @property
+    def cache_scope(self) -> str:
+        """Profile and endpoint of the client, keeping their cached answers apart"""
+        return f"{self.profile.name}\n{self.profile.base_url or ''}"
+    
+    def _cache_key(self, params: Dict[str, Any]) -> Optional[str]:
+        """Get the cache key for a request, or None if caching is off"""
+        return make_key(params, self.cache_scope) if self.cache else None
+    
+    def _cache_lookup(self, cache_key: Optional[str]) -> Optional[ChatCompletion]:
+        """Get a cached response unless caching is off or being refreshed"""
+        if not cache_key or self.refresh_cache:
+            return None
+        cached = self.cache.get(cache_key)
+        return ChatCompletion.model_validate_json(cached) if cached else None
+    
+    def _cache_stream(self, cache_key: Optional[str], params: Dict[str, Any], parts: List[str], finish_reason: Optional[str]) -> None:
+        """Store an assembled stream in the same shape as a full response"""
+        if not cache_key:
+            return
+        response = ChatCompletion(
+            id="",
+            object="chat.completion",
+            created=int(time.time()),
+            model=params["model"],
+            choices=[{
+                "index": 0,
+                "finish_reason": finish_reason or "stop",
+                "message": {"role": "assistant", "content": "".join(parts)},
+            }],
+        )
+        self.cache.set(cache_key, params["model"], response.model_dump_json())
+    
+    def _stream_params(self, messages: List[Dict[str, str]], model: Optional[str], **kwargs) -> Dict[str, Any]:
+        """Build streaming request parameters"""
+        params = self.build_params(messages, model, stream=True, **kwargs)
+        # Ask for a final usage chunk, for metrics and rate limiting
+        params.setdefault("stream_options", {"include_usage": True})
+        return params
+
+
+class OpenAIClient(BaseClient):
+    """Client for interacting with OpenAI API"""
+    
+    def _connect(self, http_client: Optional[Any] = None) -> Any:
+        """Create the underlying SDK client
+        
+        Args:
+            http_client: httpx client to use, or None for the SDK default
+            
+        Returns:
+            openai.OpenAI: SDK client
+        """
+        # Retries are handled by request() according to the profile's policy
+        return openai.OpenAI(
+            api_key=self.profile.api_key,
+            base_url=self.profile.base_url,
+            http_client=http_client,
+            max_retries=0,
+        )
+    
+    def warm_up(self) -> None:
+        """Open a pooled connection to the API ahead of the first request
+        
+        Lists the models, which resolves DNS, completes the TLS handshake
+        and leaves the connection in the pool, and loads the SDK's lazily
+        imported chat resources. Errors are ignored: the request that
+        follows reports them.
+        """
+        try:
+            with metrics.span("client.warm_up", profile=self.profile.name):
+                self.client.chat.completions
+                self.client.with_options(timeout=WARMUP_TIMEOUT).models.list()
+        except openai.APIError:
+            pass
+    
+    def send(self, params: Dict[str, Any]) -> Any:
+        """Send a prepared chat completion request
+        
+        Args:
+            params: Request parameters as built by build_params
+            
+        Returns:
+            ChatCompletion, or a stream of ChatCompletionChunk if params ask to stream
+        """
+        return self.client.chat.completions.create(**params)
+    
+    def request(self, params: Dict[str, Any], estimated_tokens: Optional[int] = None) -> Any:
+        """Send a request within the profile's rate limits, retrying transient errors
+        
+        Reserves the request's estimate in the profile's budget (given back
+        if no response comes) and waits for its token buckets, then
+        retries connection errors, timeouts, 408/409/429 and 5xx with
+        exponential backoff, honouring Retry-After.
         
+        Args:
+            params: Request parameters as built by build_params
+            estimated_tokens: Token estimate, or None to compute it
+            
+        Returns:
+            ChatCompletion, or a stream of ChatCompletionChunk if params ask to stream
+            
+        Raises:
+            BudgetExceededError: If the request could go over the profile's budget
+        """
+        if estimated_tokens is None:
+            estimated_tokens = self.estimate_tokens(params)
+        self._reserve_budget(params, estimated_tokens)
         try:
-            # Send request to OpenAI
-            return self.client.chat.completions.create(**params)
-        except openai.APIError as e:
-            rprint(f"[red]OpenAI API Error: {str(e)}[/red]")
-            raise
\ No newline at end of file
+            ratelimit.get_limiter(self.profile).acquire(estimated_tokens)
+            
+            policy = self.profile.retry
+            attempt = 0
+            while True:
+                try:
+                    return self.send(params)
+                except openai.APIError as e:
+                    if attempt >= policy.max_retries or not retry.is_retryable(e):
+                        raise
+                    metrics.increment("api.retries")
+                    time.sleep(retry.backoff_delay(attempt, policy, e))
+                    attempt += 1
+        except BaseException:
+            # Also on Ctrl+C, so the reservation doesn't hold budget until it lapses
+            self._release_budget(params, estimated_tokens)
+            raise
+    
+    def chat_completion(
+        self, 
+        messages: List[Dict[str, str]], 
+        model: Optional[str] = None,
+        **kwargs
+    ) -> Dict[str, Any]:
+        """Send chat completion request to OpenAI API
+        
+        Args:
+            messages: List of message objects with role and content
+            model: Model name to use, or None for default
+            **kwargs: Additional parameters to pass to API
+            
+        Returns:
+            Dict: API response
+        """
+        params = self.build_params(messages, model, **kwargs)
+        
+        with metrics.span("chat.completion", profile=self.profile.name, model=params["model"], stream=False) as span:
+            cache_key = self._cache_key(params)
+            cached = self._cache_lookup(cache_key)
+            span["cached"] = cached is not None
+            self.last_usage = None
+            if cached:
+                return cached
+            
+            try:
+                # Send request to OpenAI
+                estimated_tokens = self.estimate_tokens(params)
+                response = self.request(params, estimated_tokens)
+            except openai.APIError as e:
+                # stderr, so it doesn't end up in piped output
+                rprint(f"[red]OpenAI API Error: {str(e)}[/red]", file=sys.stderr)
+                raise
+            
+            if response.usage:
+                self._record_usage(span, response.usage, estimated_tokens)
+            else:
+                text = response.choices[0].message.content if response.choices else None
+                self._record_estimate(span, params, estimated_tokens, text or "")
+            
+            if cache_key:
+                self.cache.set(cache_key, params["model"], response.model_dump_json())
+            return response
+
+    def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        **kwargs
+    ) -> Iterator[str]:
+        """Send streaming chat completion request to OpenAI API
+        
+        Args:
+            messages: List of message objects with role and content
+            model: Model name to use, or None for default
+            **kwargs: Additional parameters to pass to API
+            
+        Returns:
+            Iterator[str]: Content deltas as they arrive
+        """
+        params = self._stream_params(messages, model, **kwargs)
+        
+        with metrics.span("chat.completion", profile=self.profile.name, model=params["model"], stream=True) as span:
+            cache_key = self._cache_key(params)
+            cached = self._cache_lookup(cache_key)
+            span["cached"] = cached is not None
+            self.last_usage = None
+            if cached:
+                yield cached.choices[0].message.content
+                return
+            
+            started = time.perf_counter()
+            parts: List[str] = []
+            finish_reason = None
+            try:
+                estimated_tokens = self.estimate_tokens(params)
+                stream = self.request(params, estimated_tokens)
+                try:
+                    with stream:
+                        for chunk in stream:
+                            if chunk.usage:
+                                self._record_usage(span, chunk.usage, estimated_tokens)
+                            if not chunk.choices:
+                                continue
+                            choice = chunk.choices[0]
+                            finish_reason = choice.finish_reason or finish_reason
+                            if choice.delta.content:
+                                if not parts:
+                                    span["ttft"] = time.perf_counter() - started
+                                parts.append(choice.delta.content)
+                                yield choice.delta.content
+                finally:
+                    # Closed or failed before the usage chunk
+                    if self.last_usage is None:
+                        self._record_estimate(span, params, estimated_tokens, "".join(parts))
+            except openai.APIError as e:
+                rprint(f"[red]OpenAI API Error: {str(e)}[/red]", file=sys.stderr)
+                raise
+            
+            self._cache_stream(cache_key, params, parts, finish_reason)
+
+
+class AsyncOpenAIClient(BaseClient):
+    """Asyncio client for interacting with OpenAI API
+    
+    Same profile, model, cache, rate limit and retry handling as
+    OpenAIClient, without blocking the event loop. Requests can be
+    cancelled like any other task, and ``timeout`` bounds a whole call
+    including rate limiting and retries. Response cache and usage ledger
+    reads and writes run on worker threads, so a busy SQLite file stalls
+    only the call waiting on it.
+    """
+    
+    def _connect(self, http_client: Optional[Any] = None) -> Any:
+        """Create the underlying SDK client
+        
+        Args:
+            http_client: httpx.AsyncClient to use, or None for the SDK default
+            
+        Returns:
+            openai.AsyncOpenAI: SDK client
+        """
+        # Retries are handled by request() according to the profile's policy
+        return openai.AsyncOpenAI(
+            api_key=self.profile.api_key,
+            base_url=self.profile.base_url,
+            http_client=http_client,
+            max_retries=0,
+        )
+    
+    async def __aenter__(self) -> "AsyncOpenAIClient":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the client's connection pool"""
+        await self.client.close()
+    
+    async def _cache_lookup_async(self, cache_key: Optional[str]) -> Optional[ChatCompletion]:
+        """Get a cached response without blocking the event loop on SQLite"""
+        if not cache_key or self.refresh_cache:
+            return None
+        return await asyncio.to_thread(self._cache_lookup, cache_key)
+    
+    async def send(self, params: Dict[str, Any]) -> Any:
+        """Send a prepared chat completion request
+        
+        Args:
+            params: Request parameters as built by build_params
+            
+        Returns:
+            ChatCompletion, or an async stream of ChatCompletionChunk if params ask to stream
+        """
+        return await self.client.chat.completions.create(**params)
+    
+    async def request(self, params: Dict[str, Any], estimated_tokens: Optional[int] = None) -> Any:
+        """Send a request within the profile's rate limits, retrying transient errors
+        
+        Args:
+            params: Request parameters as built by build_params
+            estimated_tokens: Token estimate, or None to compute it
+            
+        Returns:
+            ChatCompletion, or an async stream of ChatCompletionChunk if params ask to stream
+        """
+        if estimated_tokens is None:
+            estimated_tokens = self.estimate_tokens(params)
+        limited = budget.has_limits(self.profile)
+        if limited:
+            await asyncio.to_thread(self._reserve_budget, params, estimated_tokens)
+        try:
+            await ratelimit.get_limiter(self.profile).acquire_async(estimated_tokens)
+            
+            policy = self.profile.retry
+            attempt = 0
+            while True:
+                try:
+                    return await self.send(params)
+                except openai.APIError as e:
+                    if attempt >= policy.max_retries or not retry.is_retryable(e):
+                        raise
+                    metrics.increment("api.retries")
+                    await asyncio.sleep(retry.backoff_delay(attempt, policy, e))
+                    attempt += 1
+        except BaseException:
+            # Also on cancellation, so the reservation doesn't hold budget until it lapses
+            if limited:
+                await asyncio.to_thread(self._release_budget, params, estimated_tokens)
+            raise
+    
+    async def chat_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> ChatCompletion:
+        """Send chat completion request to OpenAI API
+        
+        Args:
+            messages: List of message objects with role and content
+            model: Model name to use, or None for default
+            timeout: Seconds before the call is cancelled, or None to wait
+            **kwargs: Additional parameters to pass to API
+            
+        Returns:
+            ChatCompletion: API response
+            
+        Raises:
+            asyncio.TimeoutError: If the timeout expires
+        """
+        params = self.build_params(messages, model, **kwargs)
+        
+        with metrics.span("chat.completion", profile=self.profile.name, model=params["model"], stream=False) as span:
+            cache_key = self._cache_key(params)
+            cached = await self._cache_lookup_async(cache_key)
+            span["cached"] = cached is not None
+            self.last_usage = None
+            if cached:
+                return cached
+            
+            estimated_tokens = self.estimate_tokens(params)
+            response = await asyncio.wait_for(self.request(params, estimated_tokens), timeout)
+            
+            if response.usage:
+                await asyncio.to_thread(self._record_usage, span, response.usage, estimated_tokens)
+            else:
+                text = response.choices[0].message.content if response.choices else None
+                await asyncio.to_thread(self._record_estimate, span, params, estimated_tokens, text or "")
+            
+            if cache_key:
+                await asyncio.to_thread(self.cache.set, cache_key, params["model"], response.model_dump_json())
+            return response
+    
+    async def stream_completion(
+        self,
+        messages: List[Dict[str, str]],
+        model: Optional[str] = None,
+        timeout: Optional[float] = None,
+        **kwargs
+    ) -> AsyncIterator[str]:
+        """Send streaming chat completion request to OpenAI API
+        
+        Close the iterator (e.g. with ``contextlib.aclosing``) when not
+        reading it to the end, so the connection is released promptly.
+        
+        Args:
+            messages: List of message objects with role and content
+            model: Model name to use, or None for default
+            timeout: Seconds before the whole stream is cancelled, or None to wait
+            **kwargs: Additional parameters to pass to API
+            
+        Returns:
+            AsyncIterator[str]: Content deltas as they arrive
+            
+        Raises:
+            asyncio.TimeoutError: If the timeout expires
+        """
+        params = self._stream_params(messages, model, **kwargs)
+        
+        with metrics.span("chat.completion", profile=self.profile.name, model=params["model"], stream=True) as span:
+            cache_key = self._cache_key(params)
+            cached = await self._cache_lookup_async(cache_key)
+            span["cached"] = cached is not None
+            self.last_usage = None
+            if cached:
+                yield cached.choices[0].message.content
+                return
+            
+            loop = asyncio.get_running_loop()
+            deadline = loop.time() + timeout if timeout is not None else None
+            
+            def remaining() -> Optional[float]:
+                return max(deadline - loop.time(), 0) if deadline is not None else None
+            
+            started = time.perf_counter()
+            parts: List[str] = []
+            finish_reason = None
+            estimated_tokens = self.estimate_tokens(params)
+            stream = await asyncio.wait_for(self.request(params, estimated_tokens), remaining())
+            try:
+                async with stream:
+                    chunks = stream.__aiter__()
+                    while True:
+                        try:
+                            chunk = await asyncio.wait_for(chunks.__anext__(), remaining())
+                        except StopAsyncIteration:
+                            break
+                        if chunk.usage:
+                            await asyncio.to_thread(self._record_usage, span, chunk.usage, estimated_tokens)
+                        if not chunk.choices:
+                            continue
+                        choice = chunk.choices[0]
+                        finish_reason = choice.finish_reason or finish_reason
+                        if choice.delta.content:
+                            if not parts:
+                                span["ttft"] = time.perf_counter() - started
+                            parts.append(choice.delta.content)
+                            yield choice.delta.content
+            finally:
+                # Cancelled, timed out or closed before the usage chunk
+                if self.last_usage is None:
+                    await asyncio.to_thread(self._record_estimate, span, params, estimated_tokens, "".join(parts))
+            
+            if cache_key:
+                await asyncio.to_thread(self._cache_stream, cache_key, params, parts, finish_reason)
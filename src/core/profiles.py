@@ -1,14 +1,19 @@
-from typing import Optional, Tuple
+from typing import Dict, List, Optional, Tuple
 
 from rich import print as rprint
-from settings import AppSettings, ProfileConfig
+from settings import AppSettings, ProfileConfig, PromptConfig
 
-def find_profile(settings: AppSettings, profile_name: Optional[str] = None) -> Tuple[Optional[ProfileConfig], str]:
+def find_profile(
+    settings: AppSettings,
+    profile_name: Optional[str] = None,
+    quiet: bool = False,
+) -> Tuple[Optional[ProfileConfig], str]:
     """Find a profile by name or use default
     
     Args:
         settings: Application settings
         profile_name: Profile name to find, or None to use default
+        quiet: Don't announce the default profile (for piped output)
         
     Returns:
         Tuple[Optional[ProfileConfig], str]: (profile, profile_name)
@@ -16,10 +21,11 @@ def find_profile(settings: AppSettings, profile_name: Optional[str] = None) -> T
     # If profile is not specified, use the default profile
     if profile_name is None:
         profile_name = settings.default_profile
-        rprint(f"Using default profile: '{profile_name}'")
+        if not quiet:
+            rprint(f"Using default profile: '{profile_name}'")
     
     # Find profile
-    profile = next((p for p in settings.profiles if p.name == profile_name), None)
+    profile = settings.get_profile(profile_name)
     
     if not profile:
         rprint(f"[red]Profile '{profile_name}' does not exist. Create it first with 'termgpt config create-profile'.[/red]")
@@ -39,7 +45,7 @@ def create_or_update_profile(settings: AppSettings, name: str, **kwargs) -> Prof
         ProfileConfig: Created or updated profile
     """
     # Find existing profile
-    profile = next((p for p in settings.profiles if p.name == name), None)
+    profile = settings.get_profile(name)
     
     if profile:
         # Update existing profile
@@ -51,4 +57,60 @@ def create_or_update_profile(settings: AppSettings, name: str, **kwargs) -> Prof
         profile = ProfileConfig(name=name, **kwargs)
         settings.profiles.append(profile)
     
-    return profile
\ No newline at end of file
+    return profile
+
+def find_prompt(profile: ProfileConfig, prompt_name: Optional[str] = None) -> Tuple[Optional[PromptConfig], bool]:
+    """Find a stored prompt by name or use the profile's default
+    
+    Args:
+        profile: Profile the prompt is stored in
+        prompt_name: Prompt name to find, or None to use the default
+        
+    Returns:
+        Tuple[Optional[PromptConfig], bool]: (prompt, found), where prompt is
+            None without error if no name is given and there is no default
+    """
+    prompt_name = prompt_name or profile.default_prompt
+    if not prompt_name:
+        return None, True
+    
+    prompt = profile.get_prompt(prompt_name)
+    if not prompt:
+        rprint(f"[red]Prompt '{prompt_name}' does not exist in profile '{profile.name}'. Add it with 'termgpt prompt add'.[/red]")
+        return None, False
+    
+    return prompt, True
+
+def prompt_token_counts(content: str, models: List[str]) -> Dict[str, int]:
+    """Count the tokens of a system prompt for each model
+    
+    Args:
+        content: Prompt text
+        models: Model names
+        
+    Returns:
+        Dict[str, int]: Message token counts by model
+    """
+    from core import tokens
+    
+    message = {"role": "system", "content": content}
+    return {model: tokens.count_message_tokens(message, model) for model in dict.fromkeys(models)}
+
+def parse_target(settings: AppSettings, spec: str) -> Tuple[str, str]:
+    """Split a route target into profile and model
+    
+    Args:
+        settings: Application settings
+        spec: "profile" (its default model) or "profile/model"
+        
+    Returns:
+        Tuple[str, str]: (profile_name, model_name)
+        
+    Raises:
+        ValueError: If the profile does not exist
+    """
+    profile_name, _, model = spec.partition("/")
+    profile = settings.get_profile(profile_name)
+    if not profile:
+        raise ValueError(f"Profile '{profile_name}' of route target '{spec}' does not exist")
+    return profile_name, model or profile.default_model
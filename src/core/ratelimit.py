@@ -0,0 +1,137 @@
+import asyncio
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+from core import metrics
+from settings import ProfileConfig, RateLimitConfig
+
+
+class TokenBucket:
+    """Thread-safe token bucket refilled continuously at a per-minute rate
+
+    Callers reserve capacity up front and then sleep outside the lock, so
+    concurrent callers queue fairly instead of spinning.
+    """
+
+    def __init__(self, per_minute: float):
+        """Initialize a full bucket
+
+        Args:
+            per_minute: Capacity, refilled once per minute
+        """
+        self.capacity = float(per_minute)
+        self.rate = self.capacity / 60.0
+        self.level = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self, amount: float) -> float:
+        """Take capacity from the bucket, going into debt if needed
+
+        Args:
+            amount: Capacity to take (capped at the bucket size)
+
+        Returns:
+            float: Seconds to wait before the reservation is covered
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+            self.updated = now
+            self.level -= min(amount, self.capacity)
+            return max(0.0, -self.level / self.rate)
+
+    def refund(self, amount: float) -> None:
+        """Return capacity that was reserved but not used
+
+        Args:
+            amount: Capacity to return (negative to charge extra)
+        """
+        with self._lock:
+            self.level = min(self.capacity, self.level + amount)
+
+
+class RateLimiter:
+    """Requests/min and tokens/min limits shared by all clients of a profile"""
+
+    def __init__(self, config: RateLimitConfig):
+        """Initialize limiter
+
+        Args:
+            config: Rate limits
+        """
+        self.requests = TokenBucket(config.requests_per_minute) if config.requests_per_minute else None
+        self.tokens = TokenBucket(config.tokens_per_minute) if config.tokens_per_minute else None
+
+    def reserve(self, tokens: int) -> float:
+        """Reserve one request and an estimated number of tokens
+
+        Args:
+            tokens: Estimated tokens for the request
+
+        Returns:
+            float: Seconds to wait before sending
+        """
+        wait = 0.0
+        if self.requests:
+            wait = max(wait, self.requests.reserve(1))
+        if self.tokens:
+            wait = max(wait, self.tokens.reserve(tokens))
+        if wait:
+            metrics.increment("ratelimit.throttled")
+            metrics.increment("ratelimit.wait_seconds", wait)
+        return wait
+
+    def acquire(self, tokens: int) -> None:
+        """Block until a request with the estimated tokens may be sent
+
+        Args:
+            tokens: Estimated tokens for the request
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            time.sleep(wait)
+
+    async def acquire_async(self, tokens: int) -> None:
+        """Wait, without blocking the event loop, until a request may be sent
+
+        Args:
+            tokens: Estimated tokens for the request
+        """
+        wait = self.reserve(tokens)
+        if wait:
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated: int, actual: int) -> None:
+        """Correct the token bucket once the real usage is known
+
+        Args:
+            estimated: Tokens reserved before the request
+            actual: Tokens the API reported
+        """
+        if self.tokens:
+            self.tokens.refund(estimated - actual)
+
+
+_limiters: Dict[Tuple[str, Optional[int], Optional[int]], RateLimiter] = {}
+_limiters_lock = threading.Lock()
+
+
+def get_limiter(profile: ProfileConfig) -> RateLimiter:
+    """Get the process-wide limiter of a profile
+
+    Args:
+        profile: Profile with rate limits
+
+    Returns:
+        RateLimiter: Limiter shared by every client of the profile
+    """
+    # Keyed on the limits too, so a long-lived process picks up config edits
+    limits = profile.rate_limit
+    key = (profile.name, limits.requests_per_minute, limits.tokens_per_minute)
+    with _limiters_lock:
+        limiter = _limiters.get(key)
+        if limiter is None:
+            limiter = _limiters[key] = RateLimiter(limits)
+        return limiter
@@ -0,0 +1,77 @@
+import email.utils
+import random
+import time
+from typing import Optional
+
+import openai
+
+from settings import RetryConfig
+
+# Status codes worth retrying, as in the OpenAI SDK's own policy
+RETRYABLE_STATUS = {408, 409, 429}
+
+
+def is_retryable(error: Exception) -> bool:
+    """Check if an API error is transient
+
+    Args:
+        error: Error raised by the SDK
+
+    Returns:
+        bool: True for connection errors, timeouts, 408/409/429 and 5xx
+    """
+    if isinstance(error, openai.APIConnectionError):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code in RETRYABLE_STATUS or error.status_code >= 500
+    return False
+
+
+def retry_after(error: Exception) -> Optional[float]:
+    """Read the server's requested delay from an error response
+
+    Args:
+        error: Error raised by the SDK
+
+    Returns:
+        Optional[float]: Seconds to wait, or None if the server didn't say
+    """
+    response = getattr(error, "response", None)
+    if response is None:
+        return None
+
+    headers = response.headers
+    try:
+        if "retry-after-ms" in headers:
+            return float(headers["retry-after-ms"]) / 1000
+        if "retry-after" in headers:
+            value = headers["retry-after"]
+            try:
+                return float(value)
+            except ValueError:
+                return max(0.0, email.utils.parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+    return None
+
+
+def backoff_delay(attempt: int, policy: RetryConfig, error: Optional[Exception] = None) -> float:
+    """Get the delay before a retry
+
+    Honours Retry-After when present, otherwise uses exponential backoff
+    with full jitter.
+
+    Args:
+        attempt: Zero-based retry number
+        policy: Retry policy
+        error: Error that triggered the retry
+
+    Returns:
+        float: Seconds to wait
+    """
+    server_delay = retry_after(error) if error is not None else None
+    if server_delay is not None:
+        return min(server_delay, policy.max_delay)
+
+    ceiling = min(policy.max_delay, policy.initial_delay * policy.multiplier ** attempt)
+    return random.uniform(0, ceiling)
@@ -0,0 +1,334 @@
+import queue
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, Iterable, List, Optional, Tuple
+
+import openai
+
+from core import metrics, profiles
+from core.budget import BudgetExceededError
+from core.daemon import DaemonError
+from core.openai_client import OpenAIClient
+from default import ROUTER_HISTORY_SECONDS, ROUTER_MIN_SAMPLES, ROUTER_WINDOW
+from settings import AppSettings, RetryConfig, RouteConfig
+
+# Errors after which the next endpoint is tried (API errors from the daemon arrive as openai.APIError)
+FAILOVER_ERRORS = (openai.APIError, BudgetExceededError, DaemonError)
+
+
+class RequestCancelled(Exception):
+    """A routed request that was not sent because the caller gave up"""
+
+
+class EndpointHealth:
+    """Rolling latency and error rate of one profile and model
+
+    Request threads record outcomes while the caller ranks targets, so
+    readers work on a copy of the samples taken under a lock.
+    """
+
+    def __init__(self, window: int = ROUTER_WINDOW):
+        """Initialize empty history
+
+        Args:
+            window: Number of recent requests to keep
+        """
+        self.samples: Deque[Tuple[float, bool]] = deque(maxlen=window)
+        self._lock = threading.Lock()
+
+    def record(self, latency: float, ok: bool) -> None:
+        """Add the outcome of a request
+
+        Args:
+            latency: Seconds until the response (or its first bytes) arrived
+            ok: Whether the request succeeded
+        """
+        with self._lock:
+            self.samples.append((latency, ok))
+
+    def snapshot(self) -> List[Tuple[float, bool]]:
+        """Get the recent (latency, ok) samples, oldest first"""
+        with self._lock:
+            return list(self.samples)
+
+    def latencies(self, samples: Optional[List[Tuple[float, bool]]] = None) -> List[float]:
+        """Get latencies of successful requests, sorted"""
+        return sorted(latency for latency, ok in (self.snapshot() if samples is None else samples) if ok)
+
+    def error_rate(self, samples: Optional[List[Tuple[float, bool]]] = None) -> float:
+        """Get the share of recent requests that failed"""
+        if samples is None:
+            samples = self.snapshot()
+        if not samples:
+            return 0.0
+        return sum(1 for _, ok in samples if not ok) / len(samples)
+
+    def p95(self) -> Optional[float]:
+        """Get the 95th percentile latency, or None without enough history"""
+        latencies = self.latencies()
+        if len(latencies) < ROUTER_MIN_SAMPLES:
+            return None
+        return metrics.percentile(latencies, 95)
+
+    def score(self) -> float:
+        """Get the expected cost of sending a request here, lower is better
+
+        Median latency, inflated by the error rate. Endpoints without
+        history score 0, so they are tried and measured.
+        """
+        samples = self.snapshot()
+        latencies = self.latencies(samples)
+        if not latencies:
+            return 0.0 if not samples else float("inf")
+        return metrics.percentile(latencies, 50) / max(1.0 - self.error_rate(samples), 0.05)
+
+
+class Target:
+    """One endpoint of a route: a profile's client and a model"""
+
+    def __init__(self, client: OpenAIClient, model: str):
+        """Initialize target
+
+        Args:
+            client: Client of the target's profile
+            model: Model to send requests to
+        """
+        self.client = client
+        self.model = model
+        self.key = (client.profile.name, model)
+        self.health = EndpointHealth()
+
+    def __repr__(self) -> str:
+        return f"{self.key[0]}/{self.key[1]}"
+
+
+def load_health(targets: Iterable[Target], since: Optional[float] = None) -> None:
+    """Seed target health from earlier routed requests in the metrics log
+
+    Each command is a new process, so history from earlier runs is what
+    lets the first request of a run go to the healthiest endpoint.
+
+    Args:
+        targets: Targets to seed
+        since: Oldest request to use, or None for the last ROUTER_HISTORY_SECONDS
+    """
+    by_key = {target.key: target for target in targets}
+    since = time.time() - ROUTER_HISTORY_SECONDS if since is None else since
+    for record in metrics.read_spans(since=since):
+        if record["span"] != "route.request":
+            continue
+        target = by_key.get((record.get("profile"), record.get("model")))
+        if target:
+            target.health.record(record["duration"], "error" not in record)
+
+
+class RoutingClient(OpenAIClient):
+    """Client that spreads requests over several profiles and models
+
+    Every request goes to the healthiest target of the route by rolling
+    latency and error rate, and fails over to the next one on API errors
+    or an exhausted budget. Targets are not retried, so a failing
+    endpoint costs one attempt instead of a full backoff. With hedging, a
+    duplicate goes to the next target once the first has taken longer
+    than its p95, and whichever answers first is kept.
+    """
+
+    def __init__(self, targets: List[Target], hedge: bool = False, **kwargs):
+        """Initialize routing client
+
+        Args:
+            targets: Endpoints in order of preference
+            hedge: Send a duplicate request when one is slower than its p95
+            **kwargs: Passed to OpenAIClient (cache settings)
+        """
+        self.targets = targets
+        self.hedge = hedge
+        self._local = threading.local()
+        super().__init__(targets[0].client.profile, **kwargs)
+
+    def _connect(self, http_client: Optional[Any] = None) -> Any:
+        # Every target has its own client
+        return None
+
+    @property
+    def served(self) -> Optional[Target]:
+        """Target that answered the latest request of this thread"""
+        return getattr(self._local, "served", None)
+
+    def warm_up(self) -> None:
+        for target in self.targets:
+            target.client.warm_up()
+
+    def ranked(self) -> List[Target]:
+        """Get targets from healthiest to least healthy
+
+        Returns:
+            List[Target]: Targets, ties kept in route order
+        """
+        return sorted(self.targets, key=lambda target: target.health.score())
+
+    def request(self, params: Dict[str, Any], estimated_tokens: Optional[int] = None) -> Any:
+        """Send a request to the healthiest target, failing over on errors
+
+        Args:
+            params: Request parameters; the model is replaced by each target's
+            estimated_tokens: Token estimate, or None to compute it
+
+        Returns:
+            ChatCompletion, or a stream of ChatCompletionChunk if params ask to stream
+
+        Raises:
+            openai.APIError or BudgetExceededError: Error of the last target, if all failed
+        """
+        if estimated_tokens is None:
+            estimated_tokens = self.estimate_tokens(params)
+        pending = self.ranked()
+        results: "queue.Queue[Tuple[Target, Any, Optional[BaseException]]]" = queue.Queue()
+        cancelled = threading.Event()
+        in_flight = 0
+        error: Optional[BaseException] = None
+
+        while pending or in_flight:
+            if not in_flight:
+                if error is not None:
+                    metrics.increment("router.failovers")
+                current = pending.pop(0)
+                self._start(current, params, estimated_tokens, results, cancelled)
+                in_flight += 1
+
+            # Hedge once the request has run past the target's usual worst case
+            delay = None
+            if self.hedge and pending and in_flight == 1:
+                delay = current.health.p95()
+            try:
+                target, response, failure = results.get(timeout=delay)
+            except queue.Empty:
+                metrics.increment("router.hedges")
+                current = pending.pop(0)
+                self._start(current, params, estimated_tokens, results, cancelled)
+                in_flight += 1
+                continue
+            except BaseException:
+                # Ctrl+C: hang up on every request still running instead of paying for them
+                cancelled.set()
+                self._discard(results, in_flight, params, estimated_tokens)
+                raise
+
+            in_flight -= 1
+            if failure is None:
+                self._local.served = target
+                if in_flight:
+                    self._discard(results, in_flight, params, estimated_tokens)
+                return response
+            if not isinstance(failure, FAILOVER_ERRORS):
+                raise failure
+            error = failure
+        raise error
+
+    def _start(
+        self,
+        target: Target,
+        params: Dict[str, Any],
+        estimated_tokens: int,
+        results: queue.Queue,
+        cancelled: threading.Event,
+    ) -> None:
+        """Send a request to a target on a background thread, unless cancelled first"""
+        def send() -> None:
+            if cancelled.is_set():
+                results.put((target, None, RequestCancelled()))
+                return
+            started = time.perf_counter()
+            try:
+                # Logged per attempt, so later runs know about failed endpoints too
+                with metrics.span("route.request", profile=target.key[0], model=target.key[1]):
+                    response = target.client.request({**params, "model": target.model}, estimated_tokens)
+            except FAILOVER_ERRORS as e:
+                target.health.record(time.perf_counter() - started, False)
+                results.put((target, None, e))
+            except BaseException as e:
+                results.put((target, None, e))
+            else:
+                target.health.record(time.perf_counter() - started, True)
+                results.put((target, response, None))
+
+        threading.Thread(target=send, name=f"termgpt-route-{target}", daemon=True).start()
+
+    def _discard(self, results: queue.Queue, count: int, params: Dict[str, Any], estimated_tokens: int) -> None:
+        """Drop the answers of losing or cancelled requests
+
+        Answers that already arrived are dropped right away, the rest on a
+        background thread as they come in.
+        """
+
+        def drop(target: Target, response: Any, failure: Optional[BaseException]) -> None:
+            if failure is not None:
+                return
+            # Still paid for: count it against the target's limits and budget
+            span = {"model": target.model}
+            if getattr(response, "usage", None) is not None:
+                target.client._record_usage(span, response.usage, estimated_tokens)
+                return
+            if hasattr(response, "close"):
+                # A stream: hang up before the answer is generated
+                response.close()
+            target.client._record_estimate(span, params, estimated_tokens)
+
+        while count:
+            try:
+                drop(*results.get_nowait())
+            except queue.Empty:
+                break
+            count -= 1
+        if not count:
+            return
+
+        def drain() -> None:
+            for _ in range(count):
+                drop(*results.get())
+
+        threading.Thread(target=drain, name="termgpt-route-drain", daemon=True).start()
+
+    def _record_usage(self, span: Dict[str, Any], usage: Any, estimated_tokens: int) -> None:
+        """Attribute usage to the target that answered"""
+        target = self.served or self.targets[0]
+        span["profile"], span["model"] = target.key
+        target.client._record_usage(span, usage, estimated_tokens)
+        self.last_usage = target.client.last_usage
+
+    def _record_estimate(self, span: Dict[str, Any], params: Dict[str, Any], estimated_tokens: int, text: str = "") -> None:
+        """Attribute estimated usage to the target that answered"""
+        target = self.served or self.targets[0]
+        span["profile"], span["model"] = target.key
+        target.client._record_estimate(span, params, estimated_tokens, text)
+
+
+def make_routing_client(settings: AppSettings, route: RouteConfig, **kwargs) -> RoutingClient:
+    """Create the client of a configured route
+
+    Args:
+        settings: Settings with the route's profiles
+        route: Route to create the client for
+        **kwargs: Passed to the client (cache settings); an http_client is
+            shared by the targets
+
+    Returns:
+        RoutingClient: Client seeded with recent health from the metrics log
+
+    Raises:
+        ValueError: If a target's profile does not exist
+    """
+    http_client = kwargs.pop("http_client", None)
+    targets = []
+    clients: Dict[str, OpenAIClient] = {}
+    for spec in route.targets:
+        profile_name, model = profiles.parse_target(settings, spec)
+        if profile_name not in clients:
+            # Fail over instead of retrying the same endpoint
+            profile = settings.get_profile(profile_name)
+            no_retry = profile.model_copy(update={"retry": RetryConfig(max_retries=0)})
+            clients[profile_name] = OpenAIClient(no_retry, http_client=http_client)
+        targets.append(Target(clients[profile_name], model))
+    load_health(targets)
+    return RoutingClient(targets, hedge=route.hedge, **kwargs)
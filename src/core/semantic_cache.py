@@ -0,0 +1,409 @@
+import hashlib
+import math
+import random
+import re
+import sqlite3
+import threading
+import time
+from array import array
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Protocol, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional dependency: pip install termgpt[semantic]
+    np = None
+
+from core import metrics
+from core.cache import PRUNE_PROBABILITY, make_key
+from default import SEMANTIC_CACHE_FILE
+from settings import CacheConfig, ProfileConfig
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS entries (
+    id INTEGER PRIMARY KEY,
+    embedder TEXT NOT NULL,
+    scope TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    vector BLOB NOT NULL,
+    created REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS entries_scope ON entries (embedder, scope, id);
+CREATE INDEX IF NOT EXISTS entries_created ON entries (created);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+WORD = re.compile(r"\w+")
+
+
+class Embedder(Protocol):
+    """Turns text into a vector; entries are only compared within one embedder"""
+
+    name: str
+
+    def embed(self, text: str) -> Sequence[float]:
+        ...
+
+
+def _normalize(vector: List[float]) -> List[float]:
+    norm = math.sqrt(sum(value * value for value in vector))
+    return [value / norm for value in vector] if norm else vector
+
+
+class HashingEmbedder:
+    """Deterministic local embedder using signed feature hashing
+
+    Words, word pairs and character trigrams are hashed into a fixed
+    number of dimensions. Needs no model or network, and rewordings that
+    share most of their words land close together, but synonyms don't.
+    """
+
+    def __init__(self, dimensions: int = 512):
+        """Initialize embedder
+
+        Args:
+            dimensions: Vector size
+        """
+        self.dimensions = dimensions
+        self.name = f"hashing-{dimensions}"
+
+    def features(self, text: str) -> List[str]:
+        """Split text into the features that get hashed"""
+        words = WORD.findall(text.lower())
+        features = words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+        for word in words:
+            padded = f" {word} "
+            features.extend(padded[i:i + 3] for i in range(len(padded) - 2))
+        return features
+
+    def embed(self, text: str) -> List[float]:
+        """Embed text as a unit vector
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            List[float]: Vector of length dimensions
+        """
+        vector = [0.0] * self.dimensions
+        for feature in self.features(text):
+            # blake2b rather than hash(), which differs between processes
+            value = int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "little")
+            vector[value % self.dimensions] += 1.0 if value >> 63 else -1.0
+        return _normalize(vector)
+
+
+class OpenAIEmbedder:
+    """Embedder using the OpenAI embeddings endpoint of a profile"""
+
+    def __init__(self, profile: ProfileConfig, model: str):
+        """Initialize embedder
+
+        Args:
+            profile: Profile with the API key and endpoint to use
+            model: Embedding model name
+        """
+        self.profile = profile
+        self.model = model
+        self.name = f"openai-{model}"
+        self._client = None
+
+    def embed(self, text: str) -> List[float]:
+        """Embed text
+
+        Args:
+            text: Text to embed
+
+        Returns:
+            List[float]: Embedding
+        """
+        if self._client is None:
+            import openai
+
+            self._client = openai.OpenAI(api_key=self.profile.api_key, base_url=self.profile.base_url)
+        response = self._client.embeddings.create(model=self.model, input=text)
+        return _normalize(response.data[0].embedding)
+
+
+class VectorIndex:
+    """Unit vectors of one scope, searched by cosine similarity
+
+    With NumPy the vectors live in one float32 matrix, grown by doubling,
+    and a search is a single matrix-vector product. Without it they are
+    kept as float32 arrays and compared one by one.
+    """
+
+    def __init__(self):
+        self.ids: List[int] = []
+        self._rows: List[array] = []
+        self._matrix: Optional[Any] = None
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def add(self, entry_id: int, vector: bytes) -> None:
+        """Add a vector
+
+        Args:
+            entry_id: Entry id
+            vector: float32 vector bytes
+        """
+        if np is None:
+            row = array("f")
+            row.frombytes(vector)
+            self._rows.append(row)
+        else:
+            row = np.frombuffer(vector, dtype=np.float32)
+            if self._matrix is None:
+                self._matrix = np.empty((16, len(row)), dtype=np.float32)
+            elif len(self.ids) == len(self._matrix):
+                self._matrix = np.concatenate([self._matrix, np.empty_like(self._matrix)])
+            self._matrix[len(self.ids)] = row
+        self.ids.append(entry_id)
+
+    def search(self, vector: Sequence[float]) -> Tuple[Optional[int], float]:
+        """Find the most similar vector
+
+        Args:
+            vector: Unit query vector
+
+        Returns:
+            Tuple[Optional[int], float]: Entry id and cosine similarity, or (None, 0.0) if empty
+        """
+        if not self.ids:
+            return None, 0.0
+        if np is None:
+            scores = [sum(a * b for a, b in zip(row, vector)) for row in self._rows]
+            best = max(range(len(scores)), key=scores.__getitem__)
+            return self.ids[best], scores[best]
+        scores = self._matrix[:len(self.ids)] @ np.asarray(vector, dtype=np.float32)
+        best = int(scores.argmax())
+        return self.ids[best], float(scores[best])
+
+
+class SemanticCache:
+    """Answers prompts that are worded like earlier ones, backed by SQLite
+
+    Only the last user message is embedded. Everything else about the
+    request (model, sampling parameters, system prompt, earlier turns)
+    forms its scope, and a prompt only matches entries of the same scope.
+    Vectors of a scope are loaded into a VectorIndex on first use and
+    topped up with entries other processes added since.
+    """
+
+    def __init__(
+        self,
+        embedder: Embedder,
+        path: Path = SEMANTIC_CACHE_FILE,
+        threshold: float = 0.9,
+        ttl_seconds: int = 0,
+        max_entries: int = 0,
+    ):
+        """Initialize cache
+
+        Args:
+            embedder: Embedder for prompts
+            path: SQLite database file
+            threshold: Minimum cosine similarity for a hit
+            ttl_seconds: Entry lifetime, or 0 for no expiry
+            max_entries: Maximum number of entries, or 0 for no limit
+        """
+        self.embedder = embedder
+        self.path = path
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._loaded: Dict[str, int] = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @property
+    def db(self) -> sqlite3.Connection:
+        """Connection for the current thread"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.executescript(SCHEMA)
+            self._local.conn = conn
+        return conn
+
+    def _count(self, name: str) -> None:
+        self.db.execute(
+            "INSERT INTO counters (name, value) VALUES (?, 1) "
+            "ON CONFLICT(name) DO UPDATE SET value = value + 1",
+            (name,),
+        )
+
+    @staticmethod
+    def scope(params: Dict[str, Any], endpoint: str = "") -> Optional[str]:
+        """Get the scope of a request, or None if it can't be cached
+
+        Args:
+            params: Request parameters as built by OpenAIClient.build_params
+            endpoint: Cache scope of the client (see BaseClient.cache_scope)
+
+        Returns:
+            Optional[str]: Scope key
+        """
+        messages = params["messages"]
+        if not messages or messages[-1]["role"] != "user":
+            return None
+        return make_key({**params, "messages": messages[:-1]}, endpoint)
+
+    def _index(self, scope: str) -> VectorIndex:
+        """Get the index of a scope, loading entries added since last time"""
+        with self._lock:
+            index = self._indexes.setdefault(scope, VectorIndex())
+            since = time.time() - self.ttl_seconds if self.ttl_seconds else 0
+            rows = self.db.execute(
+                "SELECT id, vector FROM entries WHERE embedder = ? AND scope = ? AND id > ? AND created >= ? ORDER BY id",
+                (self.embedder.name, scope, self._loaded.get(scope, 0), since),
+            )
+            for entry_id, vector in rows:
+                index.add(entry_id, vector)
+                self._loaded[scope] = entry_id
+            return index
+
+    def get(self, params: Dict[str, Any], endpoint: str = "") -> Optional[str]:
+        """Look up the answer to a similar prompt
+
+        Args:
+            params: Request parameters
+            endpoint: Cache scope of the client sending the request
+
+        Returns:
+            Optional[str]: Cached answer, or None on miss
+        """
+        scope = self.scope(params, endpoint)
+        if scope is None:
+            return None
+
+        with metrics.span("semantic_cache.lookup") as span:
+            vector = self.embedder.embed(params["messages"][-1]["content"])
+            entry_id, similarity = self._index(scope).search(vector)
+            span["similarity"] = round(similarity, 4)
+            row = None
+            if entry_id is not None and similarity >= self.threshold:
+                row = self.db.execute("SELECT response, created FROM entries WHERE id = ?", (entry_id,)).fetchone()
+                if row and self.ttl_seconds and time.time() - row[1] > self.ttl_seconds:
+                    row = None
+            span["hit"] = row is not None
+
+        self._count("hits" if row else "misses")
+        return row[0] if row else None
+
+    def set(self, params: Dict[str, Any], response: str, endpoint: str = "") -> None:
+        """Store the answer to a prompt
+
+        Args:
+            params: Request parameters
+            response: Answer text
+            endpoint: Cache scope of the client that got the answer
+        """
+        scope = self.scope(params, endpoint)
+        if scope is None:
+            return
+        prompt = params["messages"][-1]["content"]
+        vector = array("f", self.embedder.embed(prompt)).tobytes()
+        self.db.execute(
+            "INSERT INTO entries (embedder, scope, prompt, response, vector, created) VALUES (?, ?, ?, ?, ?, ?)",
+            (self.embedder.name, scope, prompt, response, vector, time.time()),
+        )
+        if random.random() < PRUNE_PROBABILITY:
+            self.prune()
+
+    def prune(self) -> int:
+        """Evict expired entries, then the oldest ones over the limit
+
+        Loaded indexes keep evicted vectors, but a match on one is a miss.
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = 0
+        if self.ttl_seconds:
+            removed += self.db.execute("DELETE FROM entries WHERE created < ?", (time.time() - self.ttl_seconds,)).rowcount
+        if self.max_entries:
+            removed += self.db.execute(
+                "DELETE FROM entries WHERE id IN (SELECT id FROM entries ORDER BY id DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            ).rowcount
+        return removed
+
+    def clear(self) -> int:
+        """Remove all entries and reset counters
+
+        Returns:
+            int: Number of entries removed
+        """
+        removed = self.db.execute("DELETE FROM entries").rowcount
+        self.db.execute("DELETE FROM counters")
+        self.db.execute("VACUUM")
+        with self._lock:
+            self._indexes.clear()
+            self._loaded.clear()
+        return removed
+
+    def stats(self) -> Dict[str, Any]:
+        """Summarize cache contents and hit rate
+
+        Returns:
+            Dict[str, Any]: Entry count, file size, hits and misses
+        """
+        entries = self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+        counters = dict(self.db.execute("SELECT name, value FROM counters").fetchall())
+        hits = counters.get("hits", 0)
+        misses = counters.get("misses", 0)
+        return {
+            "entries": entries,
+            "file_bytes": self.path.stat().st_size if self.path.exists() else 0,
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        }
+
+
+def make_embedder(cache_config: CacheConfig, profile: Optional[ProfileConfig] = None) -> Embedder:
+    """Create the embedder configured in settings
+
+    Args:
+        cache_config: Cache settings
+        profile: Profile for API-backed embedders
+
+    Returns:
+        Embedder: Embedder instance
+    """
+    semantic = cache_config.semantic
+    if semantic.embedder == "openai":
+        if profile is None:
+            raise ValueError("The 'openai' embedder needs a profile")
+        return OpenAIEmbedder(profile, semantic.embedding_model)
+    return HashingEmbedder(semantic.dimensions)
+
+
+def from_config(cache_config: CacheConfig, profile: Optional[ProfileConfig] = None) -> SemanticCache:
+    """Create the semantic cache from settings
+
+    Args:
+        cache_config: Cache settings
+        profile: Profile for API-backed embedders
+
+    Returns:
+        SemanticCache: Cache instance
+    """
+    semantic = cache_config.semantic
+    return SemanticCache(
+        make_embedder(cache_config, profile),
+        threshold=semantic.threshold,
+        ttl_seconds=cache_config.ttl_seconds,
+        max_entries=semantic.max_entries,
+    )
+
@@ -0,0 +1,118 @@
+from functools import lru_cache
+from typing import Any, Dict, Optional
+
+try:
+    import tiktoken
+except ImportError:  # optional dependency: pip install termgpt[tokens]
+    tiktoken = None
+
+from default import DEFAULT_CONTEXT_WINDOW, MODEL_CONTEXT_WINDOWS
+
+# Tokens the API adds around each message for role and separators
+MESSAGE_OVERHEAD = 4
+
+# Average characters per token, used when tiktoken is not installed
+CHARS_PER_TOKEN = 4
+
+
+@lru_cache(maxsize=None)
+def get_encoding(model: str) -> Optional[Any]:
+    """Get the tokenizer for a model
+
+    Args:
+        model: Model name
+
+    Returns:
+        Optional[Any]: tiktoken encoding, or None if tiktoken is not installed
+    """
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return tiktoken.get_encoding("o200k_base")
+
+
+def count_tokens(text: str, model: str) -> int:
+    """Count tokens in text
+
+    Uses tiktoken when available and a characters-per-token estimate
+    otherwise.
+
+    Args:
+        text: Text to count
+        model: Model name
+
+    Returns:
+        int: Token count
+    """
+    encoding = get_encoding(model)
+    if encoding is None:
+        return len(text) // CHARS_PER_TOKEN + 1
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def count_message_tokens(message: Dict[str, str], model: str) -> int:
+    """Count tokens a message takes up in a request
+
+    Args:
+        message: Message with role and content
+        model: Model name
+
+    Returns:
+        int: Token count including per-message overhead
+    """
+    count = MESSAGE_OVERHEAD + count_tokens(message["content"] or "", model)
+    for call in message.get("tool_calls") or ():
+        count += count_tokens(call["function"]["name"] + call["function"]["arguments"], model)
+    return count
+
+
+@lru_cache(maxsize=64)
+def count_system_tokens(content: str, model: str) -> int:
+    """Count tokens of a system message, cached
+
+    The same system prompt goes out with every request of a conversation,
+    so it is tokenized once per model.
+
+    Args:
+        content: System message content
+        model: Model name
+
+    Returns:
+        int: Token count including per-message overhead
+    """
+    return count_message_tokens({"role": "system", "content": content}, model)
+
+
+@lru_cache(maxsize=1024)
+def count_turn_tokens(content: str, model: str) -> int:
+    """Count tokens of a user or assistant message, cached
+
+    Every request of a conversation resends the earlier turns, so each
+    turn is tokenized once per model instead of once per request.
+
+    Args:
+        content: Message content
+        model: Model name
+
+    Returns:
+        int: Token count including per-message overhead
+    """
+    return MESSAGE_OVERHEAD + count_tokens(content, model)
+
+
+def context_window(model: str) -> int:
+    """Get the context window size of a model from its name
+
+    Args:
+        model: Model name
+
+    Returns:
+        int: Context window in tokens
+    """
+    # Longest matching prefix wins, so "gpt-4o-mini" beats "gpt-4"
+    for prefix in sorted(MODEL_CONTEXT_WINDOWS, key=len, reverse=True):
+        if model.startswith(prefix):
+            return MODEL_CONTEXT_WINDOWS[prefix]
+    return DEFAULT_CONTEXT_WINDOW
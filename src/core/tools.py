@@ -0,0 +1,236 @@
+import importlib
+import json
+import shlex
+import subprocess
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from core import metrics
+from default import TOOL_CONCURRENCY, TOOL_MAX_OUTPUT_CHARS
+from settings import ToolConfig
+
+
+class ToolError(Exception):
+    """A tool call that could not run; its message is sent to the model"""
+
+
+def _load_function(path: str) -> Callable[..., Any]:
+    """Import a "package.module:function" callable
+
+    Raises:
+        ToolError: If it can't be imported
+    """
+    module_name, _, attr = path.partition(":")
+    try:
+        return getattr(importlib.import_module(module_name), attr)
+    except (ImportError, AttributeError, ValueError) as e:
+        raise ToolError(f"can't load '{path}': {e}")
+
+
+def _call_function(tool: ToolConfig, arguments: Dict[str, Any]) -> Any:
+    """Call a Python tool, giving up after its timeout
+
+    The call runs on its own thread, which is abandoned (not stopped) if it
+    times out, so a stuck tool doesn't hold a pool slot.
+    """
+    func = _load_function(tool.function)
+    outcome: Dict[str, Any] = {}
+
+    def call() -> None:
+        try:
+            outcome["value"] = func(**arguments)
+        except BaseException as e:
+            outcome["error"] = e
+
+    thread = threading.Thread(target=call, name=f"termgpt-tool-{tool.name}", daemon=True)
+    thread.start()
+    thread.join(tool.timeout)
+    if thread.is_alive():
+        raise ToolError(f"timed out after {tool.timeout:g}s")
+    if "error" in outcome:
+        raise ToolError(f"{type(outcome['error']).__name__}: {outcome['error']}")
+    return outcome["value"]
+
+
+def _run_command(tool: ToolConfig, arguments: Dict[str, Any]) -> str:
+    """Run a shell tool with its arguments, killing it after its timeout
+
+    Placeholders in the command get shell-quoted argument values; the
+    arguments are also passed as JSON on stdin.
+    """
+    try:
+        command = tool.command.format(**{key: shlex.quote(str(value)) for key, value in arguments.items()})
+    except (KeyError, IndexError) as e:
+        raise ToolError(f"missing argument {e}")
+    try:
+        result = subprocess.run(
+            command,
+            shell=True,
+            input=json.dumps(arguments),
+            capture_output=True,
+            text=True,
+            timeout=tool.timeout,
+        )
+    except subprocess.TimeoutExpired:
+        raise ToolError(f"timed out after {tool.timeout:g}s")
+    if result.returncode != 0:
+        raise ToolError(f"exit status {result.returncode}: {(result.stderr or result.stdout).strip()}")
+    return result.stdout
+
+
+def execute(tool: ToolConfig, arguments: Dict[str, Any]) -> str:
+    """Run a tool once
+
+    Args:
+        tool: Tool to run
+        arguments: Arguments from the model
+
+    Returns:
+        str: Output for the model, cut to TOOL_MAX_OUTPUT_CHARS
+
+    Raises:
+        ToolError: If the tool fails or times out
+    """
+    if tool.command:
+        output = _run_command(tool, arguments)
+    elif tool.function:
+        value = _call_function(tool, arguments)
+        output = value if isinstance(value, str) else json.dumps(value, default=str)
+    else:
+        raise ToolError("neither a command nor a function is configured")
+    if len(output) > TOOL_MAX_OUTPUT_CHARS:
+        output = output[:TOOL_MAX_OUTPUT_CHARS] + f"\n[... {len(output) - TOOL_MAX_OUTPUT_CHARS} more characters cut]"
+    return output
+
+
+def describe_call(name: str, arguments: Dict[str, Any]) -> str:
+    """Format a tool call for display, e.g. ``read_file(path='a.txt')``"""
+    shown = ", ".join(f"{key}={value!r}" for key, value in arguments.items())
+    return f"{name}({shown[:80] + '...' if len(shown) > 80 else shown})"
+
+
+class ToolRegistry:
+    """Tools of a profile, run for the tool calls of model responses
+
+    The calls of one response run in parallel on a bounded thread pool.
+    Results are memoized by tool and arguments for the life of the
+    registry (one chat session), so a call the model repeats is answered
+    without running the tool again. Failed calls are not memoized.
+    """
+
+    def __init__(
+        self,
+        tools: List[ToolConfig],
+        max_workers: int = TOOL_CONCURRENCY,
+        on_call: Optional[Callable[[str, Dict[str, Any], bool], None]] = None,
+    ):
+        """Initialize registry
+
+        Args:
+            tools: Tools the model may call
+            max_workers: Tool calls run at the same time
+            on_call: Called with the tool name, arguments and whether the
+                result was memoized, before each call
+        """
+        self.tools = {tool.name: tool for tool in tools}
+        self.max_workers = max_workers
+        self.on_call = on_call
+        self._definitions = [
+            {
+                "type": "function",
+                "function": {"name": tool.name, "description": tool.description, "parameters": tool.parameters},
+            }
+            for tool in self.tools.values()
+        ]
+        self._results: Dict[Tuple[str, str], Future] = {}
+        self._lock = threading.Lock()
+        self._pool: Optional[ThreadPoolExecutor] = None
+
+    def __bool__(self) -> bool:
+        return bool(self.tools)
+
+    def definitions(self) -> List[Dict[str, Any]]:
+        """Get the ``tools`` request parameter
+
+        Returns:
+            List[Dict[str, Any]]: Function definitions, the same list every time
+        """
+        return self._definitions
+
+    def run(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Run the tool calls of a response
+
+        Args:
+            tool_calls: Tool calls as sent by the model
+
+        Returns:
+            List[Dict[str, Any]]: Tool messages, in the order of the calls
+        """
+        futures = [self._submit(call["function"]["name"], call["function"].get("arguments") or "{}") for call in tool_calls]
+        return [
+            {"role": "tool", "tool_call_id": call["id"], "content": self._result(future)}
+            for call, future in zip(tool_calls, futures)
+        ]
+
+    def _submit(self, name: str, raw_arguments: str) -> Future:
+        """Start a call, or get the future of an earlier one with the same arguments"""
+        tool = self.tools.get(name)
+        if tool is None:
+            return self._failed(f"unknown tool '{name}'")
+        try:
+            arguments = json.loads(raw_arguments)
+        except json.JSONDecodeError:
+            return self._failed("arguments are not valid JSON")
+        if not isinstance(arguments, dict):
+            return self._failed("arguments must be a JSON object")
+
+        key = (name, json.dumps(arguments, sort_keys=True, separators=(",", ":")))
+        with self._lock:
+            future = self._results.get(key) if tool.cache else None
+            memoized = future is not None
+            if memoized:
+                metrics.increment("tools.memo_hits")
+            else:
+                if self._pool is None:
+                    self._pool = ThreadPoolExecutor(self.max_workers, thread_name_prefix="termgpt-tool")
+                future = self._pool.submit(self._execute, tool, arguments)
+                if tool.cache:
+                    self._results[key] = future
+        if tool.cache and not memoized:
+            # Outside the lock: runs right away if the call already finished
+            future.add_done_callback(lambda done: self._forget_failure(key, done))
+        if self.on_call:
+            self.on_call(name, arguments, memoized)
+        return future
+
+    def _execute(self, tool: ToolConfig, arguments: Dict[str, Any]) -> str:
+        with metrics.span("tool.call", tool=tool.name):
+            return execute(tool, arguments)
+
+    def _forget_failure(self, key: Tuple[str, str], future: Future) -> None:
+        """Drop a failed call from the memo, so it runs again next time"""
+        if future.exception() is not None:
+            with self._lock:
+                if self._results.get(key) is future:
+                    del self._results[key]
+
+    @staticmethod
+    def _failed(message: str) -> Future:
+        future: Future = Future()
+        future.set_exception(ToolError(message))
+        return future
+
+    @staticmethod
+    def _result(future: Future) -> str:
+        """Get a call's output, or its error for the model to read"""
+        try:
+            return future.result()
+        except Exception as e:
+            return f"Error: {e}"
+
+    def close(self) -> None:
+        """Stop the pool; calls still running are not waited for"""
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
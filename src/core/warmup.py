@@ -0,0 +1,117 @@
+import threading
+import time
+from typing import Callable, Optional
+
+import httpx
+import openai
+
+from core.openai_client import OpenAIClient
+from default import WARMUP_IDLE_LIMIT, WARMUP_KEEPALIVE_SECONDS, WARMUP_PING_INTERVAL
+
+
+def http_client() -> httpx.Client:
+    """Create an httpx client that keeps idle connections open
+
+    The httpx default closes pooled connections after 5s idle, long before
+    the user has typed the next message.
+
+    Returns:
+        httpx.Client: Client to pass to OpenAIClient
+    """
+    return openai.DefaultHttpxClient(
+        limits=httpx.Limits(
+            max_connections=100,
+            max_keepalive_connections=20,
+            keepalive_expiry=WARMUP_KEEPALIVE_SECONDS,
+        )
+    )
+
+
+class Warmer:
+    """Background thread that gets an interactive session ready to send
+
+    It warms the client's connection as soon as the session starts and
+    pings it again while the user is idle, so the server does not drop
+    it. After every turn it runs ``prepare`` (token counting, summaries),
+    so once the user presses Enter only the new message is left to do.
+    """
+
+    def __init__(
+        self,
+        client: OpenAIClient,
+        prepare: Optional[Callable[[], None]] = None,
+        interval: float = WARMUP_PING_INTERVAL,
+        idle_limit: float = WARMUP_IDLE_LIMIT,
+    ):
+        """Initialize warmer
+
+        Args:
+            client: Client whose connection to keep warm
+            prepare: Work to do ahead of the next request, or None
+            interval: Seconds between pings while idle
+            idle_limit: Stop pinging after this long without a request
+        """
+        self.client = client
+        self.prepare = prepare
+        self.interval = interval
+        self.idle_limit = idle_limit
+        # Set once the first warm-up finished
+        self.warm = threading.Event()
+        self._cond = threading.Condition()
+        # Turns finished and turns prepared for; a new session counts as one
+        self._turns = 1 if prepare else 0
+        self._prepared = 0
+        self._stopped = False
+        self._last_active = time.monotonic()
+        self._thread = threading.Thread(target=self._run, name="termgpt-warmup", daemon=True)
+
+    def start(self) -> "Warmer":
+        """Start warming up in the background
+
+        Returns:
+            Warmer: This warmer
+        """
+        self._thread.start()
+        return self
+
+    def wait_ready(self) -> None:
+        """Wait for pending preparation, before the conversation is touched"""
+        with self._cond:
+            self._cond.wait_for(lambda: self._stopped or self._prepared == self._turns)
+
+    def turn_done(self) -> None:
+        """Note that a turn finished, to prepare the next one"""
+        with self._cond:
+            self._last_active = time.monotonic()
+            if self.prepare:
+                self._turns += 1
+            self._cond.notify_all()
+
+    def stop(self) -> None:
+        """Stop the background thread"""
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+
+    def _run(self) -> None:
+        self.client.warm_up()
+        self.warm.set()
+        while True:
+            with self._cond:
+                self._cond.wait_for(lambda: self._stopped or self._prepared < self._turns, self.interval)
+                if self._stopped:
+                    return
+                target = self._turns
+                idle = time.monotonic() - self._last_active
+
+            if self._prepared < target:
+                try:
+                    self.prepare()
+                except Exception:
+                    # The request itself will do the work again and report the error
+                    pass
+                with self._cond:
+                    self._prepared = target
+                    self._cond.notify_all()
+            elif self.interval <= idle < self.idle_limit:
+                self.client.warm_up()
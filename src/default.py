@@ -3,6 +3,17 @@ from pathlib import Path
 # Configuration paths
 CONFIG_DIR = Path.home() / ".termgpt"
 CONFIG_FILE = CONFIG_DIR / "config.json"
+CONFIG_SNAPSHOT_FILE = CONFIG_DIR / "config.snapshot"
+CONFIG_LOCK_FILE = CONFIG_DIR / "config.lock"
+CACHE_FILE = CONFIG_DIR / "cache.sqlite3"
+SEMANTIC_CACHE_FILE = CONFIG_DIR / "semantic_cache.sqlite3"
+HISTORY_DIR = CONFIG_DIR / "history"
+JOBS_DIR = CONFIG_DIR / "jobs"
+DAEMON_SOCKET = CONFIG_DIR / "daemon.sock"
+DAEMON_PID_FILE = CONFIG_DIR / "daemon.pid"
+DAEMON_LOG_FILE = CONFIG_DIR / "daemon.log"
+METRICS_FILE = CONFIG_DIR / "metrics.jsonl"
+USAGE_LEDGER_FILE = CONFIG_DIR / "usage.sqlite3"
 
 # Default model values
 DEFAULT_MODEL = "gpt-3.5-turbo"
@@ -14,5 +25,107 @@ DEFAULT_MODEL_CONFIG = {
     "presence_penalty": 0.0
 }
 
+# Context windows by model name prefix, in tokens
+MODEL_CONTEXT_WINDOWS = {
+    "gpt-3.5-turbo": 16385,
+    "gpt-4": 8192,
+    "gpt-4-turbo": 128000,
+    "gpt-4o": 128000,
+    "gpt-4.1": 1047576,
+    "o1": 200000,
+    "o3": 200000,
+    "o4-mini": 200000,
+}
+DEFAULT_CONTEXT_WINDOW = 8192
+DEFAULT_CONTEXT_STRATEGY = "pin_system"
+# Bodies of messages evicted from the context window are moved to a temp
+# file if they are at least this long
+SPILL_MIN_CHARS = 2048
+
+# Streaming output
+STREAM_REFRESH_PER_SECOND = 10
+# Responses longer than this many lines are rendered as Markdown a batch of blocks at a time
+RENDER_BLOCK_LINES = 200
+
+# Batch prompt runner
+BATCH_CONCURRENCY = 4
+
+# Response cache (opt-in: at a temperature above 0 it replays one sampled answer)
+DEFAULT_CACHE_CONFIG = {
+    "enabled": False,
+    "ttl_seconds": 7 * 24 * 3600,
+    "max_entries": 500_000,
+    "max_size_mb": 1024,
+}
+# Semantic cache: answers prompts worded like earlier ones (opt-in)
+DEFAULT_SEMANTIC_CACHE_CONFIG = {
+    "enabled": False,
+    "threshold": 0.9,
+    "embedder": "hashing",
+    "dimensions": 512,
+    "embedding_model": "text-embedding-3-small",
+    "max_entries": 50_000,
+}
+
+# Tool calling
+DEFAULT_TOOL_TIMEOUT = 30.0
+# Tool calls of one response run in parallel, up to this many at a time
+TOOL_CONCURRENCY = 4
+# Rounds of tool calls before the model must answer
+TOOL_MAX_ROUNDS = 8
+# Longer tool output is cut before it is sent to the model
+TOOL_MAX_OUTPUT_CHARS = 20_000
+
+# Conversation history
+HISTORY_FSYNC_EVERY = 8
+
+# Background daemon
+DAEMON_KEEPALIVE_SECONDS = 300
+DAEMON_START_TIMEOUT = 10
+
+# Interactive warm-up: ping the API while idle, below common server idle timeouts
+WARMUP_KEEPALIVE_SECONDS = 120
+WARMUP_PING_INTERVAL = 45
+WARMUP_IDLE_LIMIT = 900
+WARMUP_TIMEOUT = 10
+
+# Routing across profiles: requests per endpoint kept for health, and
+# how far back the metrics log seeds it
+ROUTER_WINDOW = 50
+ROUTER_HISTORY_SECONDS = 3600
+# Requests needed before an endpoint's p95 triggers hedging
+ROUTER_MIN_SAMPLES = 5
+
+# Retries and client-side rate limiting
+DEFAULT_RETRY_CONFIG = {
+    "max_retries": 3,
+    "initial_delay": 1.0,
+    "max_delay": 30.0,
+    "multiplier": 2.0,
+}
+
+# Budget held for a request until its usage is recorded; reservations of
+# processes that died mid-request lapse after this many seconds
+BUDGET_RESERVATION_TTL = 600
+
+# Instrumentation
+METRICS_FLUSH_EVERY = 100
+METRICS_MAX_BYTES = 20 * 1024 * 1024
+
+# USD per million (input, output) tokens by model name prefix
+MODEL_PRICING = {
+    "gpt-3.5-turbo": (0.50, 1.50),
+    "gpt-4": (30.00, 60.00),
+    "gpt-4-turbo": (10.00, 30.00),
+    "gpt-4o": (2.50, 10.00),
+    "gpt-4o-mini": (0.15, 0.60),
+    "gpt-4.1": (2.00, 8.00),
+    "gpt-4.1-mini": (0.40, 1.60),
+    "gpt-4.1-nano": (0.10, 0.40),
+    "o1": (15.00, 60.00),
+    "o3": (2.00, 8.00),
+    "o4-mini": (1.10, 4.40),
+}
+
 # Default profile values
 DEFAULT_PROFILE_NAME = "default"
@@ -1,13 +1,34 @@
 
-from typing import List, Optional
-from pydantic import BaseModel, ConfigDict, Field
+from typing import Any, Dict, List, Literal, Optional, Tuple
+from pydantic import BaseModel, ConfigDict, Field, PrivateAttr
 from pydantic_settings import BaseSettings, SettingsConfigDict
 from default import (
+    DEFAULT_CACHE_CONFIG,
+    DEFAULT_CONTEXT_STRATEGY,
     DEFAULT_MODEL,
     DEFAULT_MODEL_CONFIG,
     DEFAULT_PROFILE_NAME,
+    DEFAULT_RETRY_CONFIG,
+    DEFAULT_SEMANTIC_CACHE_CONFIG,
+    DEFAULT_TOOL_TIMEOUT,
 )
 
+# (indexed list, its length, items by name)
+NameIndex = Tuple[list, int, Dict[str, Any]]
+
+def _name_index(items: list, cached: Optional[NameIndex]) -> NameIndex:
+    """Index items by name, keeping the first of any duplicates
+    
+    The cached index is reused while it belongs to the same list at the
+    same length, so appending or reassigning the list rebuilds it.
+    """
+    if cached is not None and cached[0] is items and cached[1] == len(items):
+        return cached
+    index: Dict[str, Any] = {}
+    for item in items:
+        index.setdefault(item.name, item)
+    return items, len(items), index
+
 class ModelConfig(BaseModel):
     """Configuration for an OpenAI model"""
     name: str = DEFAULT_MODEL
@@ -16,25 +37,192 @@ class ModelConfig(BaseModel):
     top_p: float = Field(default_factory=lambda: DEFAULT_MODEL_CONFIG["top_p"])
     frequency_penalty: float = Field(default_factory=lambda: DEFAULT_MODEL_CONFIG["frequency_penalty"])
     presence_penalty: float = Field(default_factory=lambda: DEFAULT_MODEL_CONFIG["presence_penalty"])
+    # Defaults to the known window for the model name
+    context_window: Optional[int] = None
+    context_strategy: Literal["sliding", "pin_system", "summarize"] = DEFAULT_CONTEXT_STRATEGY
+
+class RetryConfig(BaseModel):
+    """Retry policy for transient API errors"""
+    max_retries: int = Field(default_factory=lambda: DEFAULT_RETRY_CONFIG["max_retries"])
+    initial_delay: float = Field(default_factory=lambda: DEFAULT_RETRY_CONFIG["initial_delay"])
+    max_delay: float = Field(default_factory=lambda: DEFAULT_RETRY_CONFIG["max_delay"])
+    multiplier: float = Field(default_factory=lambda: DEFAULT_RETRY_CONFIG["multiplier"])
+
+class RateLimitConfig(BaseModel):
+    """Client-side request and token rate limits (None for no limit)"""
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+class BudgetConfig(BaseModel):
+    """Token and cost (USD) limits per calendar day and month (None for no limit)"""
+    daily_tokens: Optional[int] = None
+    monthly_tokens: Optional[int] = None
+    daily_cost: Optional[float] = None
+    monthly_cost: Optional[float] = None
+
+class PromptConfig(BaseModel):
+    """A stored system prompt"""
+    name: str
+    content: str
+    # Message token counts by model, computed when the prompt is saved
+    tokens: Dict[str, int] = {}
+
+class ToolConfig(BaseModel):
+    """A local tool the model may call: a shell command or a Python callable"""
+    name: str
+    description: str = ""
+    # JSON Schema of the arguments
+    parameters: Dict[str, Any] = {"type": "object", "properties": {}}
+    # Shell command; {argument} placeholders are replaced with quoted values
+    command: Optional[str] = None
+    # "package.module:function", called with the arguments as keywords
+    function: Optional[str] = None
+    timeout: float = DEFAULT_TOOL_TIMEOUT
+    # Reuse the result of an earlier call with the same arguments in a session
+    cache: bool = True
 
 class ProfileConfig(BaseModel):
     """Configuration for a user profile"""
     name: str = DEFAULT_PROFILE_NAME
     api_key: Optional[str] = None
+    # OpenAI-compatible endpoint, or None for the SDK default
+    base_url: Optional[str] = None
     default_model: str = DEFAULT_MODEL
     models: List[ModelConfig] = [ModelConfig()]
+    retry: RetryConfig = RetryConfig()
+    rate_limit: RateLimitConfig = RateLimitConfig()
+    budget: BudgetConfig = BudgetConfig()
+    prompts: List[PromptConfig] = []
+    # Stored prompt sent as the system message by default, if any
+    default_prompt: Optional[str] = None
+    tools: List[ToolConfig] = []
+    _model_index: Optional[NameIndex] = PrivateAttr(default=None)
+    _prompt_index: Optional[NameIndex] = PrivateAttr(default=None)
+    _tool_index: Optional[NameIndex] = PrivateAttr(default=None)
     
     model_config = ConfigDict(
         extra="allow",
         hide_input_in_errors=True
     )
 
+    def get_model(self, name: str) -> Optional[ModelConfig]:
+        """Get a model of this profile by name
+        
+        Args:
+            name: Model name
+            
+        Returns:
+            Optional[ModelConfig]: Model config, or None if not configured
+        """
+        self._model_index = _name_index(self.models, self._model_index)
+        return self._model_index[2].get(name)
+
+    def get_prompt(self, name: str) -> Optional[PromptConfig]:
+        """Get a stored prompt of this profile by name
+        
+        Args:
+            name: Prompt name
+            
+        Returns:
+            Optional[PromptConfig]: Prompt, or None if it doesn't exist
+        """
+        self._prompt_index = _name_index(self.prompts, self._prompt_index)
+        return self._prompt_index[2].get(name)
+
+    def get_tool(self, name: str) -> Optional[ToolConfig]:
+        """Get a tool of this profile by name
+        
+        Args:
+            name: Tool name
+            
+        Returns:
+            Optional[ToolConfig]: Tool, or None if it doesn't exist
+        """
+        self._tool_index = _name_index(self.tools, self._tool_index)
+        return self._tool_index[2].get(name)
+
+class SemanticCacheConfig(BaseModel):
+    """Configuration for the near-duplicate prompt cache"""
+    enabled: bool = Field(default_factory=lambda: DEFAULT_SEMANTIC_CACHE_CONFIG["enabled"])
+    # Minimum cosine similarity between prompts for a hit
+    threshold: float = Field(default_factory=lambda: DEFAULT_SEMANTIC_CACHE_CONFIG["threshold"])
+    embedder: Literal["hashing", "openai"] = DEFAULT_SEMANTIC_CACHE_CONFIG["embedder"]
+    # Vector size of the hashing embedder
+    dimensions: int = Field(default_factory=lambda: DEFAULT_SEMANTIC_CACHE_CONFIG["dimensions"])
+    # Model of the openai embedder
+    embedding_model: str = Field(default_factory=lambda: DEFAULT_SEMANTIC_CACHE_CONFIG["embedding_model"])
+    max_entries: int = Field(default_factory=lambda: DEFAULT_SEMANTIC_CACHE_CONFIG["max_entries"])
+
+class CacheConfig(BaseModel):
+    """Configuration for the local response cache"""
+    enabled: bool = Field(default_factory=lambda: DEFAULT_CACHE_CONFIG["enabled"])
+    ttl_seconds: int = Field(default_factory=lambda: DEFAULT_CACHE_CONFIG["ttl_seconds"])
+    max_entries: int = Field(default_factory=lambda: DEFAULT_CACHE_CONFIG["max_entries"])
+    max_size_mb: int = Field(default_factory=lambda: DEFAULT_CACHE_CONFIG["max_size_mb"])
+    semantic: SemanticCacheConfig = SemanticCacheConfig()
+
+class RouteConfig(BaseModel):
+    """A pool of profiles and models that requests are routed across"""
+    name: str
+    # "profile" (its default model) or "profile/model", in order of preference
+    targets: List[str]
+    # Send a duplicate request when one takes longer than its p95
+    hedge: bool = False
+
 class AppSettings(BaseSettings):
     """Global application configuration"""
     default_profile: str = DEFAULT_PROFILE_NAME
     profiles: List[ProfileConfig] = [ProfileConfig()]
+    cache: CacheConfig = CacheConfig()
+    routes: List[RouteConfig] = []
+    _profile_index: Optional[NameIndex] = PrivateAttr(default=None)
+    _route_index: Optional[NameIndex] = PrivateAttr(default=None)
     
     model_config = SettingsConfigDict(
         env_prefix="TERMGPT_",
     )
 
+    def get_profile(self, name: str) -> Optional[ProfileConfig]:
+        """Get a profile by name
+        
+        Args:
+            name: Profile name
+            
+        Returns:
+            Optional[ProfileConfig]: Profile, or None if it doesn't exist
+        """
+        self._profile_index = _name_index(self.profiles, self._profile_index)
+        return self._profile_index[2].get(name)
+
+    def get_route(self, name: str) -> Optional[RouteConfig]:
+        """Get a route by name
+        
+        Args:
+            name: Route name
+            
+        Returns:
+            Optional[RouteConfig]: Route, or None if it doesn't exist
+        """
+        self._route_index = _name_index(self.routes, self._route_index)
+        return self._route_index[2].get(name)
+
+    def get_model(self, profile_name: str, model_name: str) -> Optional[ModelConfig]:
+        """Get a model by (profile, name)
+        
+        Args:
+            profile_name: Profile name
+            model_name: Model name
+            
+        Returns:
+            Optional[ModelConfig]: Model config, or None if not configured
+        """
+        profile = self.get_profile(profile_name)
+        return profile.get_model(model_name) if profile else None
+
+    def build_index(self) -> None:
+        """Index all profiles and models up front"""
+        self.get_profile(self.default_profile)
+        for profile in self.profiles:
+            profile.get_model(profile.default_model)
+            profile.get_prompt(profile.default_prompt or "")
+
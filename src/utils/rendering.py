@@ -0,0 +1,244 @@
+import json
+import sys
+import time
+from typing import Any, Iterable, Iterator, List, Optional
+
+from rich.console import Console
+
+from core import metrics
+from default import RENDER_BLOCK_LINES, STREAM_REFRESH_PER_SECOND
+
+FORMATS = ("raw", "markdown", "json")
+
+
+def find_stable_boundary(text: str) -> int:
+    """Find the end of the last complete Markdown block in text
+
+    A block is complete once it is followed by a blank line outside of a
+    fenced code block. Everything before the boundary will not change as
+    more text arrives, so it can be rendered once and left alone.
+
+    Args:
+        text: Markdown text received so far
+
+    Returns:
+        int: Offset of the boundary, or 0 if no block is complete yet
+    """
+    boundary = 0
+    in_fence = False
+    offset = 0
+    for line in text.splitlines(keepends=True):
+        offset += len(line)
+        if not line.endswith("\n"):
+            break
+        stripped = line.strip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+        elif not stripped and not in_fence:
+            boundary = offset
+    return boundary
+
+
+def iter_blocks(text: str, min_lines: int = RENDER_BLOCK_LINES) -> Iterator[str]:
+    """Split Markdown into runs of complete blocks
+
+    Runs end at a blank line outside of fenced code blocks once they have
+    at least min_lines lines, so each can be rendered on its own.
+
+    Args:
+        text: Markdown text
+        min_lines: Minimum lines per run
+
+    Returns:
+        Iterator[str]: Consecutive parts of text
+    """
+    lines: List[str] = []
+    in_fence = False
+    for line in text.splitlines(keepends=True):
+        lines.append(line)
+        stripped = line.strip()
+        if stripped.startswith("```") or stripped.startswith("~~~"):
+            in_fence = not in_fence
+        elif not stripped and not in_fence and len(lines) >= min_lines:
+            yield "".join(lines)
+            lines = []
+    if lines:
+        yield "".join(lines)
+
+
+def resolve_format(fmt: Optional[str], console: Optional[Console] = None) -> str:
+    """Pick the output format, defaulting to Markdown only on a terminal
+
+    Args:
+        fmt: "raw", "markdown", "json", or None to detect
+        console: Console that will be written to, or None for stdout
+
+    Returns:
+        str: Output format
+    """
+    if fmt:
+        if fmt not in FORMATS:
+            raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}")
+        return fmt
+    return "markdown" if (console or Console()).is_terminal else "raw"
+
+
+def render_markdown(text: str, console: Optional[Console] = None) -> None:
+    """Render Markdown, a batch of blocks at a time for long texts
+
+    Long responses start appearing after the first batch is parsed and
+    laid out instead of after the whole text.
+
+    Args:
+        text: Markdown text
+        console: Console to render to, or None for a new one
+    """
+    from rich.markdown import Markdown
+
+    console = console or Console()
+    for block in iter_blocks(text):
+        console.print(Markdown(block))
+
+
+def render_response(text: str, fmt: str = "markdown", console: Optional[Console] = None, **fields: Any) -> None:
+    """Write a complete response in an output format
+
+    Args:
+        text: Response text
+        fmt: "raw" for the text as is, "markdown" to render it, or "json"
+            for an object with the text and fields
+        console: Console to render Markdown to, or None for a new one
+        **fields: Extra keys of the JSON object (model, profile, ...)
+    """
+    with metrics.span("render", mode=fmt):
+        if fmt == "markdown":
+            render_markdown(text, console)
+            return
+        if fmt == "json":
+            text = json.dumps({**fields, "response": text}, ensure_ascii=False)
+        sys.stdout.write(text if text.endswith("\n") else text + "\n")
+        sys.stdout.flush()
+
+
+def render_stream(chunks: Iterable[str], fmt: str = "markdown", console: Optional[Console] = None) -> str:
+    """Write a streamed response as it arrives
+
+    Args:
+        chunks: Text deltas
+        fmt: "raw" to write deltas as is, or "markdown" to render them live
+        console: Console to render Markdown to, or None for a new one
+
+    Returns:
+        str: Full text
+    """
+    if fmt == "markdown":
+        return render_markdown_stream(chunks, console)
+
+    parts: List[str] = []
+    for delta in chunks:
+        parts.append(delta)
+        sys.stdout.write(delta)
+        sys.stdout.flush()
+    if parts and not parts[-1].endswith("\n"):
+        sys.stdout.write("\n")
+    return "".join(parts)
+
+
+class MarkdownStream:
+    """Render streamed Markdown live at a bounded frame rate
+
+    Completed blocks are printed once above the live region, so only the
+    trailing, still-growing block is re-parsed on each redraw.
+    """
+
+    def __init__(self, console: Optional[Console] = None, refresh_per_second: float = STREAM_REFRESH_PER_SECOND):
+        """Initialize stream renderer
+
+        Args:
+            console: Console to render to, or None for a new one
+            refresh_per_second: Maximum number of redraws per second
+        """
+        self.console = console or Console()
+        self.interval = 1.0 / refresh_per_second
+        self.parts: List[str] = []
+        self._tail = ""
+        self._dirty = False
+        self._last_draw = 0.0
+        self.frames = 0
+        self.render_time = 0.0
+        from rich.live import Live
+
+        self._live = Live(console=self.console, auto_refresh=False, vertical_overflow="visible")
+
+    def __enter__(self) -> "MarkdownStream":
+        self._live.__enter__()
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self._draw(final=True)
+        self._live.__exit__(*exc_info)
+        # Only time spent drawing, not waiting on the network
+        metrics.add_span({
+            "span": "render",
+            "ts": time.time(),
+            "duration": self.render_time,
+            "mode": "stream",
+            "frames": self.frames,
+        })
+
+    @property
+    def text(self) -> str:
+        """Full text received so far"""
+        return "".join(self.parts)
+
+    def feed(self, delta: str) -> None:
+        """Add a text delta, redrawing if the frame interval has passed
+
+        Args:
+            delta: New text
+        """
+        self.parts.append(delta)
+        self._tail += delta
+        self._dirty = True
+
+        if time.monotonic() - self._last_draw >= self.interval:
+            self._draw()
+
+    def _draw(self, final: bool = False) -> None:
+        """Flush completed blocks and redraw the trailing block
+
+        Args:
+            final: Whether the stream has ended
+        """
+        if not self._dirty:
+            return
+
+        from rich.markdown import Markdown
+
+        started = time.perf_counter()
+        boundary = len(self._tail) if final else find_stable_boundary(self._tail)
+        if boundary:
+            self._live.console.print(Markdown(self._tail[:boundary]))
+            self._tail = self._tail[boundary:]
+
+        self._live.update(Markdown(self._tail), refresh=True)
+        self._last_draw = time.monotonic()
+        self._dirty = False
+        self.frames += 1
+        self.render_time += time.perf_counter() - started
+
+
+def render_markdown_stream(chunks: Iterable[str], console: Optional[Console] = None) -> str:
+    """Render a stream of Markdown deltas live
+
+    Args:
+        chunks: Text deltas
+        console: Console to render to, or None for a new one
+
+    Returns:
+        str: Full rendered text
+    """
+    with MarkdownStream(console) as stream:
+        for delta in chunks:
+            stream.feed(delta)
+    return stream.text
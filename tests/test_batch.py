@@ -0,0 +1,46 @@
+import io
+
+from core import batch
+from core.mock_server import MockServer
+from core.openai_client import OpenAIClient
+from settings import ProfileConfig, RetryConfig
+
+INPUT = """{"id": "a", "prompt": "first"}
+not json
+[1, 2]
+{"id": "b"}
+"second"
+"""
+
+
+def test_bad_lines_become_failed_items():
+    items = list(batch.read_prompts(io.StringIO(INPUT)))
+
+    assert [item["id"] for item in items] == ["a", 1, 2, "b", 4]
+    assert [item.get("prompt") for item in items] == ["first", None, None, None, "second"]
+    assert "not valid JSON" in items[1]["invalid"]
+    assert "not an object" in items[2]["invalid"]
+    assert "no 'prompt'" in items[3]["invalid"]
+
+
+def test_batch_reports_bad_lines_and_keeps_going(capsys):
+    profile = ProfileConfig(name="mock", api_key="sk-test", retry=RetryConfig(max_retries=0))
+    results = []
+    with MockServer() as mock:
+        profile.base_url = mock.url
+        batch.run_batch(OpenAIClient(profile), batch.read_prompts(io.StringIO(INPUT)), results.append)
+
+    assert [record["error"] is None for record in results] == [True, False, False, False, True]
+    assert capsys.readouterr().out == ""
+
+
+def test_api_errors_stay_off_stdout(capsys):
+    profile = ProfileConfig(name="mock", api_key="sk-test", retry=RetryConfig(max_retries=0))
+    with MockServer(error_rate=1.0, error_status=400) as mock:
+        profile.base_url = mock.url
+        record = batch.run_prompt(OpenAIClient(profile), {"id": 0, "prompt": "hi"})
+
+    assert record["error"]
+    captured = capsys.readouterr()
+    assert captured.out == ""
+    assert "OpenAI API Error" in captured.err
@@ -0,0 +1,147 @@
+import asyncio
+import sqlite3
+import threading
+
+import pytest
+
+from core import budget, metrics
+from core.budget import BudgetExceededError, Ledger
+from core.mock_server import MockServer
+from core.openai_client import AsyncOpenAIClient, OpenAIClient
+from settings import BudgetConfig, ProfileConfig
+
+
+def _held(ledger: Ledger) -> int:
+    return ledger.db.execute("SELECT COUNT(*) FROM reservations").fetchone()[0]
+
+
+@pytest.fixture
+def ledger(tmp_path, monkeypatch):
+    ledger = Ledger(tmp_path / "usage.sqlite3")
+    monkeypatch.setattr(budget, "_ledger", ledger)
+    return ledger
+
+
+def _capped(**limits) -> ProfileConfig:
+    return ProfileConfig(name="capped", api_key="sk-test", budget=BudgetConfig(**limits))
+
+
+def test_reservations_count_against_the_budget(ledger):
+    profile = ProfileConfig(name="capped", api_key="sk-test", budget=BudgetConfig(daily_tokens=1000))
+
+    ledger.reserve(profile, "gpt-4o", 100, 500)
+    # The first request is still running, so the second can't have its 600 tokens
+    with pytest.raises(BudgetExceededError):
+        ledger.reserve(profile, "gpt-4o", 100, 500)
+
+    ledger.record("capped", "gpt-4o", 100, 50, reserved=600)
+    assert _held(ledger) == 0
+    ledger.reserve(profile, "gpt-4o", 100, 500)
+    ledger.release(profile, "gpt-4o", 600)
+    assert _held(ledger) == 0
+    assert ledger.totals("capped", budget.periods()["day"])["tokens"] == 150
+
+
+def test_stream_closed_early_is_recorded(ledger):
+    profile = ProfileConfig(name="capped", api_key="sk-test", budget=BudgetConfig(daily_tokens=100000))
+    with MockServer(chunk_size=4, chunk_delay=0.01) as mock:
+        profile.base_url = mock.url
+        client = OpenAIClient(profile)
+        stream = client.stream_completion([{"role": "user", "content": "hi"}], max_tokens=50)
+        next(stream)
+        stream.close()
+
+    assert client.last_usage is None
+    assert _held(ledger) == 0
+    used = ledger.totals("capped", budget.periods()["day"])
+    assert used["requests"] == 1
+    assert 0 < used["tokens"] < 50
+
+
+def test_over_limit_requests_are_refused(ledger):
+    ledger.record("capped", "gpt-4o", 900, 0)
+
+    with pytest.raises(BudgetExceededError, match="Daily token budget"):
+        ledger.reserve(_capped(daily_tokens=1000), "gpt-4o", 50, 100)
+    with pytest.raises(BudgetExceededError, match="Monthly cost budget"):
+        ledger.reserve(_capped(monthly_cost=0.000001), "gpt-4o", 50, 100)
+    assert _held(ledger) == 0
+
+
+def test_profiles_without_limits_reserve_nothing(ledger):
+    ledger.reserve(_capped(), "gpt-4o", 10**9, 10**9)
+
+    assert _held(ledger) == 0
+
+
+def test_concurrent_reservations_stay_within_the_limit(ledger):
+    profile = _capped(daily_tokens=1000)
+    passed = []
+
+    def reserve():
+        try:
+            ledger.reserve(profile, "gpt-4o", 100, 100)
+            passed.append(True)
+        except BudgetExceededError:
+            pass
+
+    threads = [threading.Thread(target=reserve) for _ in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(passed) == 5
+    assert _held(ledger) == 5
+
+
+def test_abandoned_reservations_lapse(ledger, monkeypatch):
+    profile = _capped(daily_tokens=1000)
+    ledger.reserve(profile, "gpt-4o", 400, 400)
+    later = budget.time.time() + budget.BUDGET_RESERVATION_TTL + 1
+    monkeypatch.setattr(budget.time, "time", lambda: later)
+
+    ledger.reserve(profile, "gpt-4o", 400, 400)
+    assert _held(ledger) == 1
+
+
+def test_usage_is_recorded_with_metrics_off(ledger, monkeypatch):
+    monkeypatch.setattr(metrics, "_recording", False)
+    profile = _capped(daily_tokens=100000)
+    with MockServer() as mock:
+        profile.base_url = mock.url
+        OpenAIClient(profile).chat_completion([{"role": "user", "content": "hi"}], max_tokens=50)
+
+    assert _held(ledger) == 0
+    assert ledger.totals("capped", budget.periods()["day"])["requests"] == 1
+
+
+def test_async_client_does_not_block_the_loop_on_a_busy_ledger(ledger):
+    profile = ProfileConfig(name="mock", api_key="sk-test")
+    ledger.db
+    holder = sqlite3.connect(ledger.path, isolation_level=None, check_same_thread=False)
+    holder.execute("BEGIN IMMEDIATE")
+    threading.Timer(0.3, holder.execute, ("COMMIT",)).start()
+
+    async def main():
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                await asyncio.sleep(0.01)
+                ticks += 1
+
+        ticker = asyncio.create_task(tick())
+        async with AsyncOpenAIClient(profile) as client:
+            await client.chat_completion([{"role": "user", "content": "hi"}])
+        ticker.cancel()
+        return ticks
+
+    with MockServer() as mock:
+        profile.base_url = mock.url
+        ticks = asyncio.run(main())
+
+    # The ledger write waited out the lock while the loop kept running
+    assert ticks >= 10
+    assert ledger.totals("mock", budget.periods()["day"])["requests"] == 1
@@ -0,0 +1,64 @@
+import time
+
+from core import cache
+from core.cache import ResponseCache, make_key, open_cache
+from core.openai_client import OpenAIClient
+from settings import CacheConfig, ProfileConfig
+
+PARAMS = {"model": "gpt-4o", "temperature": 0.0, "messages": [{"role": "user", "content": "hi"}]}
+
+
+def test_key_ignores_ordering_and_transport():
+    reordered = {"messages": PARAMS["messages"], "temperature": 0.0, "model": "gpt-4o"}
+    streamed = {**PARAMS, "stream": True, "stream_options": {"include_usage": True}}
+
+    assert make_key(reordered) == make_key(PARAMS) == make_key(streamed)
+    assert make_key({**PARAMS, "temperature": 0.5}) != make_key(PARAMS)
+
+
+def test_key_is_scoped_to_the_endpoint():
+    local = OpenAIClient(ProfileConfig(name="local", api_key="sk-test", base_url="http://127.0.0.1:8799/v1"), cache=object())
+    remote = OpenAIClient(ProfileConfig(name="remote", api_key="sk-test"), cache=object())
+
+    assert local._cache_key(PARAMS) != remote._cache_key(PARAMS)
+    assert local._cache_key(PARAMS) == make_key(PARAMS, local.cache_scope)
+
+
+def test_cache_is_opt_in():
+    assert open_cache(CacheConfig()) is None
+    assert isinstance(open_cache(CacheConfig(), use_cache=True), ResponseCache)
+    assert open_cache(CacheConfig(enabled=True), use_cache=False) is None
+
+
+def test_prune_evicts_least_recently_used(tmp_path):
+    store = ResponseCache(tmp_path / "cache.sqlite3", max_entries=2)
+    for key in ("a", "b", "c"):
+        store.set(key, "gpt-4o", key)
+        time.sleep(0.01)
+    # Reading "a" makes "b" the least recently used
+    assert store.get("a") == "a"
+
+    assert store.prune() == 1
+    assert store.get("b") is None
+    assert store.get("a") == "a" and store.get("c") == "c"
+
+
+def test_prune_evicts_over_size(tmp_path):
+    store = ResponseCache(tmp_path / "cache.sqlite3", max_size_bytes=10)
+    store.set("old", "gpt-4o", "x" * 8)
+    time.sleep(0.01)
+    store.set("new", "gpt-4o", "y" * 8)
+
+    assert store.prune() == 1
+    assert store.get("old") is None
+    assert store.get("new") == "y" * 8
+
+
+def test_expired_entries_miss(tmp_path, monkeypatch):
+    store = ResponseCache(tmp_path / "cache.sqlite3", ttl_seconds=60)
+    store.set("a", "gpt-4o", "answer")
+    later = time.time() + 61
+    monkeypatch.setattr(cache.time, "time", lambda: later)
+
+    assert store.get("a") is None
+    assert store.stats()["entries"] == 0
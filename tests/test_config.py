@@ -0,0 +1,114 @@
+import json
+import multiprocessing
+import os
+import pickle
+import time
+
+import pytest
+
+from core import config
+from settings import AppSettings, ProfileConfig
+
+CONFIG = {
+    "default_profile": "main",
+    "profiles": [
+        {"name": "main", "api_key": "sk-main"},
+        {"name": "other", "api_key": "sk-other"},
+    ],
+}
+
+
+@pytest.fixture
+def config_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "CONFIG_DIR", tmp_path)
+    monkeypatch.setattr(config, "CONFIG_FILE", tmp_path / "config.json")
+    monkeypatch.setattr(config, "CONFIG_LOCK_FILE", tmp_path / "config.lock")
+    monkeypatch.setattr(config, "CONFIG_SNAPSHOT_FILE", tmp_path / "config.snapshot")
+    monkeypatch.setattr(config, "_snapshot", None)
+    (tmp_path / "config.json").write_text(json.dumps(CONFIG))
+    return tmp_path
+
+
+def _not_validated(*args, **kwargs):
+    raise AssertionError("config was validated again")
+
+
+def test_snapshot_keeps_api_keys_out(config_dir, monkeypatch):
+    config.get_settings()
+    assert b"sk-main" not in (config_dir / "config.snapshot").read_bytes()
+
+    # A new process: no snapshot in memory, the one on disk is used as is
+    monkeypatch.setattr(config, "_snapshot", None)
+    monkeypatch.setattr(AppSettings, "model_validate", _not_validated)
+    settings = config.get_settings()
+
+    assert settings.get_profile("main").api_key == "sk-main"
+    assert settings.get_profile("other").api_key == "sk-other"
+
+
+def test_snapshot_follows_changes_to_defaults(config_dir, monkeypatch, tmp_path):
+    defaults = tmp_path / "default.py"
+    defaults.write_text("")
+    monkeypatch.setattr(config.default_module, "__file__", str(defaults))
+    config.get_settings()
+    with open(config_dir / "config.snapshot", "rb") as f:
+        assert pickle.load(f)["schema"] == config._schema_version()
+
+    stat = defaults.stat()
+    os.utime(defaults, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    assert config._read_snapshot() is None
+
+
+def _add_profile(name):
+    def apply(settings):
+        # Widen the gap between reading and writing the config
+        time.sleep(0.05)
+        settings.profiles.append(ProfileConfig(name=name, api_key=f"sk-{name}"))
+
+    return config.update_settings(apply)
+
+
+def _add_profile_in(config_dir, name):
+    # A spawned process starts from the real paths
+    config.CONFIG_DIR = config_dir
+    config.CONFIG_FILE = config_dir / "config.json"
+    config.CONFIG_LOCK_FILE = config_dir / "config.lock"
+    return _add_profile(name)
+
+
+def test_concurrent_updates_are_all_kept(config_dir):
+    names = [f"p{i}" for i in range(8)]
+    with multiprocessing.get_context("spawn").Pool(len(names)) as pool:
+        assert all(pool.starmap(_add_profile_in, [(config_dir, name) for name in names]))
+
+    saved = json.loads((config_dir / "config.json").read_text())
+    assert sorted(p["name"] for p in saved["profiles"]) == sorted(["main", "other", *names])
+
+
+def test_aborted_update_writes_nothing(config_dir):
+    before = (config_dir / "config.json").read_bytes()
+
+    assert config.update_settings(lambda settings: False) is False
+    assert (config_dir / "config.json").read_bytes() == before
+
+
+def test_write_keeps_file_mode_and_leaves_no_temp_files(config_dir):
+    (config_dir / "config.json").chmod(0o640)
+
+    assert _add_profile("new")
+    assert (config_dir / "config.json").stat().st_mode & 0o777 == 0o640
+    assert not list(config_dir.glob("*.tmp"))
+
+
+def test_failed_write_keeps_the_old_config(config_dir, monkeypatch):
+    before = (config_dir / "config.json").read_bytes()
+
+    def fail(src, dst):
+        raise OSError("disk full")
+
+    monkeypatch.setattr(config.os, "replace", fail)
+
+    assert _add_profile("new") is False
+    assert (config_dir / "config.json").read_bytes() == before
+    assert not list(config_dir.glob("*.tmp"))
@@ -0,0 +1,43 @@
+from core.conversation import Conversation
+from core.messages import SpillFile
+from core.openai_client import OpenAIClient
+from default import SPILL_MIN_CHARS
+from settings import ModelConfig, ProfileConfig
+
+BODY = "word " * SPILL_MIN_CHARS
+
+
+def _conversation(window: int) -> Conversation:
+    model = ModelConfig(name="gpt-4o", context_window=window, max_tokens=100, context_strategy="sliding")
+    profile = ProfileConfig(api_key="sk-test", default_model="gpt-4o", models=[model])
+    conversation = Conversation(profile, client=OpenAIClient(profile))
+    for turn in range(6):
+        conversation.add_user_message(f"{turn} {BODY}")
+        conversation.add_assistant_message(f"{turn} {BODY}")
+    return conversation
+
+
+def test_messages_in_the_window_stay_in_memory():
+    conversation = _conversation(window=128000)
+
+    sent = conversation.request_messages()
+
+    assert sent == conversation.messages
+    assert not any(m.spilled for m in conversation.messages)
+
+
+def test_evicted_messages_are_spilled_and_sent_ones_not_read_back(monkeypatch):
+    # Room for about two of the twelve messages
+    conversation = _conversation(window=2 * SPILL_MIN_CHARS + 400)
+    sent = conversation.request_messages()
+    evicted = conversation.messages[: len(conversation.messages) - len(sent)]
+
+    assert evicted and all(m.spilled for m in evicted)
+    assert not any(m.spilled for m in conversation.messages[len(evicted):])
+
+    def no_reads(self, offset, length):
+        raise AssertionError("a message in the window was read from disk")
+
+    monkeypatch.setattr(SpillFile, "read", no_reads)
+    conversation.add_user_message("next")
+    conversation.request_messages()
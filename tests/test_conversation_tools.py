@@ -0,0 +1,63 @@
+from types import SimpleNamespace
+
+import pytest
+
+from core.conversation import Conversation
+from core.openai_client import OpenAIClient
+from settings import ProfileConfig
+
+CALL = {"id": "call_1", "type": "function", "function": {"name": "slow", "arguments": "{}"}}
+
+
+class InterruptedTools:
+    """Tools whose run is cut short by Ctrl+C"""
+
+    def __bool__(self) -> bool:
+        return True
+
+    def run(self, calls):
+        raise KeyboardInterrupt
+
+
+def _conversation() -> Conversation:
+    profile = ProfileConfig(api_key="sk-test")
+    conversation = Conversation(profile, client=OpenAIClient(profile))
+    conversation.add_user_message("first")
+    conversation.add_assistant_message("answer")
+    conversation.add_user_message("second")
+    return conversation
+
+
+def _reply():
+    return SimpleNamespace(content=None, tool_calls=[SimpleNamespace(model_dump=lambda exclude_none: CALL)])
+
+
+def test_interrupted_tool_run_adds_nothing():
+    conversation = _conversation()
+    conversation.tools = InterruptedTools()
+
+    with pytest.raises(KeyboardInterrupt):
+        conversation._run_tools(_reply())
+
+    assert conversation.cancel_turn() is False
+    assert [m["role"] for m in conversation.messages] == ["user", "assistant"]
+
+
+@pytest.mark.parametrize("with_result", [False, True])
+def test_cancel_rolls_back_unanswered_tool_calls(with_result):
+    conversation = _conversation()
+    conversation._append("assistant", None, tool_calls=[CALL])
+    if with_result:
+        conversation._append("tool", "done", tool_call_id="call_1")
+
+    assert conversation.cancel_turn() is False
+    assert [m["role"] for m in conversation.messages] == ["user", "assistant"]
+    assert conversation.messages[-1]["content"] == "answer"
+
+
+def test_cancel_keeps_finished_turn():
+    conversation = _conversation()
+    conversation.add_assistant_message("done")
+
+    assert conversation.cancel_turn() is True
+    assert len(conversation.messages) == 4
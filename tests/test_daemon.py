@@ -0,0 +1,104 @@
+import threading
+from contextlib import contextmanager
+
+import httpx
+import openai
+import pytest
+
+from core import budget, daemon, retry
+from core.budget import Ledger
+from core.daemon_server import DaemonServer
+from core.mock_server import MockServer
+from core.openai_client import OpenAIClient
+from settings import BudgetConfig, ProfileConfig, RetryConfig
+
+
+def _rate_limit_error() -> openai.RateLimitError:
+    request = httpx.Request("POST", "https://api.example.com/v1/chat/completions")
+    response = httpx.Response(429, headers={"retry-after": "2"}, request=request)
+    return openai.RateLimitError("Rate limit reached", response=response, body={"message": "Rate limit reached"})
+
+
+def test_api_errors_survive_the_socket():
+    error = daemon.decode_error(daemon.encode_error(_rate_limit_error()))
+
+    assert isinstance(error, openai.RateLimitError)
+    assert error.status_code == 429
+    assert retry.is_retryable(error)
+    assert retry.retry_after(error) == 2
+
+
+@pytest.mark.parametrize("original, expected", [
+    (openai.APITimeoutError(request=httpx.Request("POST", "http://x")), openai.APITimeoutError),
+    (openai.APIConnectionError(request=httpx.Request("POST", "http://x")), openai.APIConnectionError),
+    (daemon.DaemonError("Profile 'x' does not exist"), daemon.DaemonError),
+])
+def test_error_kinds(original, expected):
+    assert type(daemon.decode_error(daemon.encode_error(original))) is expected
+
+
+@contextmanager
+def _daemon(tmp_path, profile):
+    """Run a daemon on a temporary socket, serving every profile with profile"""
+    socket_path = tmp_path / "daemon.sock"
+    server = DaemonServer(socket_path)
+    server.client_for = lambda name: OpenAIClient(profile)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        yield server, daemon.DaemonClient(profile, socket_path=socket_path)
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_daemon_errors_are_retried_by_the_cli(tmp_path, stream):
+    profile = ProfileConfig(
+        name="mock",
+        api_key="sk-test",
+        retry=RetryConfig(max_retries=2, initial_delay=0.01, max_delay=0.01),
+    )
+    with MockServer(error_rate=1.0, error_status=503) as mock:
+        profile.base_url = mock.url
+        with _daemon(tmp_path, profile) as (_server, client):
+            params = client.build_params([{"role": "user", "content": "hi"}], stream=stream)
+            with pytest.raises(openai.InternalServerError):
+                client.request(params)
+
+    # One attempt per retry, each made once by the daemon
+    assert mock.requests == 3
+
+
+@pytest.mark.parametrize("stream", [False, True])
+def test_daemon_requests_count_against_the_budget_once(tmp_path, monkeypatch, stream):
+    ledger = Ledger(tmp_path / "usage.sqlite3")
+    monkeypatch.setattr(budget, "_ledger", ledger)
+    profile = ProfileConfig(name="capped", api_key="sk-test", budget=BudgetConfig(daily_tokens=100000))
+    messages = [{"role": "user", "content": "hi"}]
+    with MockServer() as mock:
+        profile.base_url = mock.url
+        with _daemon(tmp_path, profile) as (_server, client):
+            if stream:
+                "".join(client.stream_completion(messages))
+            else:
+                client.chat_completion(messages)
+
+    assert ledger.totals("capped", budget.periods()["day"])["requests"] == 1
+    assert ledger.db.execute("SELECT COUNT(*) FROM reservations").fetchone()[0] == 0
+
+
+def test_concurrent_requests_are_all_counted(tmp_path):
+    profile = ProfileConfig(name="mock", api_key="sk-test")
+    with MockServer() as mock:
+        profile.base_url = mock.url
+        with _daemon(tmp_path, profile) as (server, client):
+            threads = [
+                threading.Thread(target=client.chat_completion, args=([{"role": "user", "content": f"hi {i}"}],))
+                for i in range(16)
+            ]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+
+            assert server.requests == 16
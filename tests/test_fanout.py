@@ -0,0 +1,15 @@
+import io
+
+from rich.console import Console
+
+from commands.chat.fanout import _panel
+
+
+def test_panel_of_a_response_without_content():
+    # e.g. a completion stopped by the content filter
+    record = {"profile": "main", "model": "gpt-4o", "error": None, "response": None, "latency": 0.5}
+    console = Console(file=io.StringIO(), width=60)
+
+    console.print(_panel(record))
+
+    assert "main/gpt-4o" in console.file.getvalue()
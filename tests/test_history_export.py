@@ -0,0 +1,44 @@
+from commands.history import sessions
+from core.history import HistoryStore
+
+
+def _record_tool_session(store: HistoryStore) -> str:
+    log = store.create_session("default", "gpt-4o")
+    log.append({"role": "user", "content": "What's in notes.txt?"})
+    log.append({
+        "role": "assistant",
+        "content": None,
+        "tool_calls": [{"id": "call_1", "type": "function", "function": {"name": "read_file", "arguments": '{"path": "notes.txt"}'}}],
+    })
+    log.append({"role": "tool", "tool_call_id": "call_1", "content": '{"text": "buy milk"}'})
+    log.append({"role": "assistant", "content": "It says to buy milk."})
+    log.close()
+    return log.id
+
+
+def test_markdown_export_of_tool_calls(tmp_path, monkeypatch):
+    store = HistoryStore(tmp_path / "history")
+    session_id = _record_tool_session(store)
+    monkeypatch.setattr(sessions, "HistoryStore", lambda: store)
+    output = tmp_path / "session.md"
+
+    sessions.export_command(session_id, format="markdown", output=output)
+
+    text = output.read_text(encoding="utf-8")
+    assert "None" not in text
+    assert "## tool" not in text
+    assert "buy milk\"}" not in text
+    assert "_Called tools: read_file_" in text
+    assert "## AI\n\nIt says to buy milk." in text
+
+
+def test_show_skips_tool_messages(tmp_path, monkeypatch, capsys):
+    store = HistoryStore(tmp_path / "history")
+    session_id = _record_tool_session(store)
+    monkeypatch.setattr(sessions, "HistoryStore", lambda: store)
+
+    sessions.show_command(session_id, include_system=False)
+
+    out = capsys.readouterr().out
+    assert "Called tools: read_file" in out
+    assert "It says to buy milk." in out
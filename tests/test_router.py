@@ -0,0 +1,89 @@
+import queue
+import threading
+import time
+from types import SimpleNamespace
+
+import pytest
+
+from core import router
+from settings import ProfileConfig
+
+
+class FakeStream:
+    def __init__(self):
+        self.closed = threading.Event()
+
+    def close(self):
+        self.closed.set()
+
+
+def _target(name: str, delay: float, stream: FakeStream) -> router.Target:
+    def request(params, estimated_tokens=None):
+        time.sleep(delay)
+        return stream
+
+    def record_estimate(span, params, estimated_tokens, text=""):
+        client.estimated.append(estimated_tokens)
+
+    client = SimpleNamespace(
+        profile=ProfileConfig(name=name, api_key="sk-test"),
+        request=request,
+        _record_estimate=record_estimate,
+        estimated=[],
+    )
+    return router.Target(client, "gpt-4o")
+
+
+def test_interrupt_closes_in_flight_streams(monkeypatch):
+    slow, fast = FakeStream(), FakeStream()
+    primary = _target("slow", 0.2, slow)
+    for _ in range(5):
+        primary.health.record(0.01, True)
+    hedge = _target("fast", 0.0, fast)
+    for _ in range(5):
+        # Ranked after the primary
+        hedge.health.record(1.0, True)
+
+    class InterruptedQueue(queue.Queue):
+        """Raises KeyboardInterrupt on the wait after the hedge, once both answers are in"""
+
+        calls = 0
+
+        def get(self, block=True, timeout=None):
+            InterruptedQueue.calls += 1
+            if InterruptedQueue.calls == 2:
+                while self.qsize() < 2:
+                    time.sleep(0.01)
+                raise KeyboardInterrupt
+            return super().get(block, timeout)
+
+    monkeypatch.setattr(router.queue, "Queue", InterruptedQueue)
+    client = router.RoutingClient([primary, hedge], hedge=True)
+
+    with pytest.raises(KeyboardInterrupt):
+        client.request({"model": "gpt-4o", "messages": [], "stream": True}, estimated_tokens=10)
+
+    assert slow.closed.is_set()
+    assert fast.closed.is_set()
+    # Both prompts were sent, so both count against their budgets
+    assert primary.client.estimated == [10]
+    assert hedge.client.estimated == [10]
+
+
+def test_health_can_be_read_while_requests_record():
+    health = router.EndpointHealth(window=50)
+    stop = threading.Event()
+
+    def write():
+        while not stop.is_set():
+            health.record(0.01, True)
+
+    writer = threading.Thread(target=write)
+    writer.start()
+    try:
+        for _ in range(20000):
+            health.score()
+            health.error_rate()
+    finally:
+        stop.set()
+        writer.join()
@@ -0,0 +1,77 @@
+import time
+
+from core import semantic_cache
+from core.semantic_cache import HashingEmbedder, SemanticCache
+
+
+def _params(prompt, model="gpt-4o", system="Be brief."):
+    return {
+        "model": model,
+        "temperature": 0.0,
+        "messages": [{"role": "system", "content": system}, {"role": "user", "content": prompt}],
+    }
+
+
+def _cache(tmp_path, **kwargs):
+    return SemanticCache(HashingEmbedder(), path=tmp_path / "semantic.sqlite3", threshold=0.8, **kwargs)
+
+
+def test_similar_prompts_hit_and_others_miss(tmp_path):
+    store = _cache(tmp_path)
+    store.set(_params("What is the capital of France?"), "Paris")
+
+    assert store.get(_params("what is the capital of France")) == "Paris"
+    assert store.get(_params("How do I reverse a list in Python?")) is None
+    assert store.stats()["hits"] == 1 and store.stats()["misses"] == 1
+
+
+def test_entries_only_match_their_own_scope(tmp_path):
+    store = _cache(tmp_path)
+    prompt = "What is the capital of France?"
+    store.set(_params(prompt), "Paris", endpoint="local\nhttp://127.0.0.1:8799/v1")
+
+    assert store.get(_params(prompt), endpoint="local\nhttp://127.0.0.1:8799/v1") == "Paris"
+    assert store.get(_params(prompt), endpoint="remote\n") is None
+    assert store.get(_params(prompt, model="gpt-4o-mini"), endpoint="local\nhttp://127.0.0.1:8799/v1") is None
+    assert store.get(_params(prompt, system="Answer in French."), endpoint="local\nhttp://127.0.0.1:8799/v1") is None
+
+
+def test_only_prompts_ending_in_a_user_message_are_cached(tmp_path):
+    store = _cache(tmp_path)
+    params = _params("hi")
+    params["messages"].append({"role": "assistant", "content": "hello"})
+    store.set(params, "ignored")
+
+    assert store.stats()["entries"] == 0
+    assert store.get(params) is None
+
+
+def test_entries_are_shared_between_instances(tmp_path):
+    first, second = _cache(tmp_path), _cache(tmp_path)
+    # Load the (empty) index before the other instance writes
+    assert second.get(_params("What is the capital of France?")) is None
+    first.set(_params("What is the capital of France?"), "Paris")
+
+    assert second.get(_params("What is the capital of France?")) == "Paris"
+
+
+def test_prune_keeps_the_newest_entries(tmp_path, monkeypatch):
+    monkeypatch.setattr(semantic_cache, "PRUNE_PROBABILITY", 0)
+    store = _cache(tmp_path, max_entries=2)
+    for prompt in ("What is the capital of France?", "How do I reverse a list?", "Why is the sky blue?"):
+        store.set(_params(prompt), prompt.split()[-1])
+
+    assert store.prune() == 1
+    assert store.stats()["entries"] == 2
+    assert store.get(_params("What is the capital of France?")) is None
+    assert store.get(_params("Why is the sky blue?")) == "blue?"
+
+
+def test_expired_entries_miss_and_are_pruned(tmp_path, monkeypatch):
+    store = _cache(tmp_path, ttl_seconds=60)
+    store.set(_params("What is the capital of France?"), "Paris")
+    later = time.time() + 61
+    monkeypatch.setattr(semantic_cache.time, "time", lambda: later)
+
+    assert store.get(_params("What is the capital of France?")) is None
+    assert store.prune() == 1